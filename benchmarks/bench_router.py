@@ -0,0 +1,240 @@
+"""Benchmark router throughput, overhead, failover, memory, classification and startup.
+
+Everything runs against local mock providers, so no network or API keys
+are needed and numbers are comparable between runs.
+
+Usage: python -m benchmarks.bench_router [throughput|overhead|failover|memory|classify|startup|all ...]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+import requests
+
+from llm_router import Router
+from llm_router.classify import TaskClassifier
+from .mock_server import MockServer
+
+_TMP = tempfile.mkdtemp(prefix="llm-router-bench-")
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _router(primary: str, fallback: str = None, **config) -> Router:
+    os.environ["OLLAMA_PRIMARY_URL"] = primary
+    if fallback:
+        os.environ["OLLAMA_FALLBACK_URL"] = fallback
+    else:
+        os.environ.pop("OLLAMA_FALLBACK_URL", None)
+    os.environ.pop("OLLAMA_NODES", None)
+    config.setdefault("usage", {"storage_path": os.path.join(_TMP, "usage.json")})
+    config.setdefault("pool", {"pool_maxsize": 64, "max_retries": 0})
+    # Let the benchmark, not the Ollama slot cap, decide concurrency
+    config.setdefault("concurrency", {"ollama": 1024, "ollama_fallback": 1024})
+    return Router(config)
+
+
+def bench_throughput(calls: int = 2000, concurrency=(1, 8, 32)) -> list:
+    """Requests per second through query_many against an instant provider."""
+    rows = []
+    with MockServer() as mock:
+        router = _router(mock.url)
+        router.query("warm up")
+        for workers in concurrency:
+            start = time.perf_counter()
+            results = router.query_many(["ping"] * calls, max_concurrency=workers)
+            elapsed = time.perf_counter() - start
+            rows.append({
+                "bench": "throughput",
+                "concurrency": workers,
+                "req_per_s": round(calls / elapsed),
+                "errors": sum(1 for r in results if r.get("error"))
+            })
+        router.close()
+    return rows
+
+
+def bench_overhead(calls: int = 300, latency_ms: float = 20) -> list:
+    """Time the router adds on top of a provider with fixed latency."""
+    with MockServer(latency=("fixed", latency_ms)) as mock:
+        session = requests.Session()
+        router = _router(mock.url)
+        payload = {"model": "qwen2.5:3b", "prompt": "ping", "stream": False}
+
+        def timed(fn):
+            fn()
+            samples = []
+            for _ in range(calls):
+                start = time.perf_counter()
+                fn()
+                samples.append((time.perf_counter() - start) * 1000)
+            return samples
+
+        raw = timed(lambda: session.post(f"{mock.url}/api/generate", json=payload).json())
+        provider = timed(lambda: router.providers["ollama"].generate("ping", model="qwen2.5:3b"))
+        routed = timed(lambda: router.query("ping"))
+        router.close()
+
+    def summary(name, samples):
+        return {
+            "bench": "overhead",
+            "path": name,
+            "p50_ms": round(statistics.median(samples), 3),
+            "p99_ms": round(sorted(samples)[int(len(samples) * 0.99) - 1], 3),
+            "overhead_p50_ms": round(statistics.median(samples) - statistics.median(raw), 3)
+        }
+
+    return [summary("raw requests", raw), summary("provider.generate", provider), summary("router.query", routed)]
+
+
+def bench_failover(calls: int = 50) -> list:
+    """Time to an answer when the primary is down, erroring or hanging."""
+    rows = []
+    with MockServer() as fallback, MockServer(error_rate=1.0) as failing, MockServer(hang_rate=1.0) as hanging:
+        cases = [
+            ("connection refused", "http://127.0.0.1:9", None),
+            ("HTTP 500", failing.url, None),
+            ("hang (0.5s timeout)", hanging.url, 0.5),
+        ]
+        for name, primary, timeout in cases:
+            samples = []
+            for _ in range(calls if timeout is None else 5):
+                # A fresh router each time so the breaker never skips the primary
+                router = _router(primary, fallback.url)
+                if timeout is not None:
+                    router.providers["ollama"].timeout = timeout
+                start = time.perf_counter()
+                result = router.query("ping")
+                samples.append((time.perf_counter() - start) * 1000)
+                assert result.get("content"), result
+                router.close()
+            rows.append({
+                "bench": "failover",
+                "primary": name,
+                "p50_ms": round(statistics.median(samples), 2),
+                "max_ms": round(max(samples), 2)
+            })
+
+        # With the breaker open the dead primary costs nothing
+        router = _router("http://127.0.0.1:9", fallback.url)
+        for _ in range(5):
+            router.query("trip")
+        samples = []
+        for _ in range(calls):
+            start = time.perf_counter()
+            router.query("ping")
+            samples.append((time.perf_counter() - start) * 1000)
+        router.close()
+        rows.append({"bench": "failover", "primary": "breaker open", "p50_ms": round(statistics.median(samples), 2)})
+    return rows
+
+
+def bench_memory(in_flight=(10, 100)) -> list:
+    """Python heap held per in-flight request (tracemalloc; excludes thread stacks)."""
+    rows = []
+    for n in in_flight:
+        with MockServer(latency=("fixed", 2000)) as mock:
+            router = _router(mock.url, pool={"pool_maxsize": n, "max_retries": 0})
+            router.query("warm up")
+            tracemalloc.start()
+            before = tracemalloc.take_snapshot()
+            threads = [threading.Thread(target=router.query, args=(f"prompt {i}",)) for i in range(n)]
+            for t in threads:
+                t.start()
+            deadline = time.monotonic() + 30
+            while mock.in_flight < n and time.monotonic() < deadline:
+                time.sleep(0.01)
+            reached = mock.in_flight
+            during = tracemalloc.take_snapshot()
+            tracemalloc.stop()
+            for t in threads:
+                t.join()
+            router.close()
+        if reached < n:
+            raise RuntimeError(f"only {reached} of {n} requests reached the mock provider within 30s")
+        held = sum(stat.size_diff for stat in during.compare_to(before, "filename"))
+        rows.append({"bench": "memory", "in_flight": n, "bytes_per_request": held // n})
+    return rows
+
+
+def bench_classify(rounds: int = 2000) -> list:
+    """Per-prompt cost of task="auto" classification by prompt size."""
+    classifier = TaskClassifier()
+    prompts = {
+        "short": "What is the capital of Australia?",
+        "code": "Write a Python function that merges two sorted lists",
+        "1 KB": "Summarize these notes for the team. " * 28,
+        "100 KB": "lorem ipsum dolor sit amet " * 3800,
+    }
+    rows = []
+    for name, prompt in prompts.items():
+        start = time.perf_counter()
+        for _ in range(rounds):
+            classifier.classify(prompt)
+        rows.append({
+            "bench": "classify",
+            "prompt": name,
+            "task": classifier.classify(prompt),
+            "us_per_prompt": round((time.perf_counter() - start) / rounds * 1e6, 2)
+        })
+    return rows
+
+
+def bench_startup(runs: int = 10) -> list:
+    """Wall time of fresh processes, as when scripts call the CLI in a loop."""
+    rows = []
+    with MockServer() as mock:
+        env = {k: v for k, v in os.environ.items() if k not in ("OLLAMA_FALLBACK_URL", "OLLAMA_NODES")}
+        env.update(OLLAMA_PRIMARY_URL=mock.url, HOME=_TMP, PYTHONPATH=_ROOT)
+        cases = [
+            ("python -c pass", ["-c", "pass"]),
+            ("import llm_router", ["-c", "import llm_router"]),
+            ("Router()", ["-c", "from llm_router import Router; Router()"]),
+            ("cli --usage", ["-m", "llm_router.cli", "--usage"]),
+            ("cli first query", ["-m", "llm_router.cli", "--json", "ping"]),
+        ]
+        for name, args in cases:
+            samples = []
+            for _ in range(runs):
+                start = time.perf_counter()
+                subprocess.run([sys.executable, *args], env=env, stdout=subprocess.DEVNULL, check=True)
+                samples.append((time.perf_counter() - start) * 1000)
+            rows.append({
+                "bench": "startup",
+                "command": name,
+                "p50_ms": round(statistics.median(samples), 1),
+                "min_ms": round(min(samples), 1)
+            })
+    return rows
+
+
+BENCHES = {
+    "throughput": bench_throughput,
+    "overhead": bench_overhead,
+    "failover": bench_failover,
+    "memory": bench_memory,
+    "classify": bench_classify,
+    "startup": bench_startup,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Router benchmarks against local mock providers")
+    # A string default: argparse checks a list default against choices as a whole
+    parser.add_argument("benches", nargs="*", choices=[*BENCHES, "all"], default="all", metavar="bench",
+                        help=f"benchmarks to run: {', '.join(BENCHES)} or all (the default)")
+    benches = parser.parse_args().benches
+    names = list(BENCHES) if "all" in benches else benches
+    for name in names:
+        for row in BENCHES[name]():
+            print(row)
+
+
+if __name__ == "__main__":
+    main()
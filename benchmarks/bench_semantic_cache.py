@@ -0,0 +1,58 @@
+"""Benchmark semantic cache lookup cost as the cache grows.
+
+Usage: python -m benchmarks.bench_semantic_cache [sizes...]
+"""
+
+import random
+import sys
+import time
+
+from llm_router.semantic_cache import SemanticCache
+
+WORDS = (
+    "python function sort list explain recursion capital france write binary search "
+    "tree graph database query optimize latency cache model token stream error retry "
+    "network socket thread async await compile parse json http server client"
+).split()
+
+
+def _prompt(rng: random.Random) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(6, 20)))
+
+
+def bench(size: int, lookups: int = 200) -> dict:
+    rng = random.Random(size)
+    cache = SemanticCache(capacity=size)
+    start = time.perf_counter()
+    for i in range(size):
+        cache.store("routine", _prompt(rng), {"content": str(i)})
+    fill_s = time.perf_counter() - start
+
+    prompts = [_prompt(rng) for _ in range(lookups)]
+    embed_start = time.perf_counter()
+    for p in prompts:
+        cache.embedder.embed(p)
+    embed_us = (time.perf_counter() - embed_start) / lookups * 1e6
+
+    start = time.perf_counter()
+    for p in prompts:
+        cache.lookup("routine", p)
+    lookup_us = (time.perf_counter() - start) / lookups * 1e6
+    return {
+        "entries": size,
+        "fill_s": round(fill_s, 2),
+        "embed_us": round(embed_us, 1),
+        "lookup_us": round(lookup_us, 1),
+        "scan_us": round(lookup_us - embed_us, 1),
+        "matrix_mb": round(cache._matrix.nbytes / 1e6, 1)
+    }
+
+
+def main():
+    sizes = [int(a) for a in sys.argv[1:]] or [10_000, 100_000]
+    for size in sizes:
+        print(bench(size))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+"""Local stand-in for Ollama and OpenAI-style providers.
+
+Serves ``/api/generate``, ``/api/tags`` and ``/chat/completions`` (also
+under ``/v1``), streaming included, with configurable latency, error
+rate and hangs.
+
+Usage: python -m benchmarks.mock_server [--port 11434] [--latency lognormal:200:0.5]
+                                        [--error-rate 0.05] [--hang-rate 0.01]
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+
+
+def parse_latency(spec: str) -> Tuple:
+    """Parse ``fixed:MS``, ``uniform:LO:HI`` or ``lognormal:MEDIAN:SIGMA``."""
+    kind, *args = spec.split(":")
+    if kind not in ("fixed", "uniform", "lognormal"):
+        raise ValueError(f"Unknown latency distribution: {kind}")
+    return (kind, *(float(a) for a in args))
+
+
+class Behavior:
+    """How the mock answers; all latencies are in milliseconds."""
+
+    def __init__(
+        self,
+        latency: Tuple = ("fixed", 0),
+        error_rate: float = 0.0,
+        error_status: int = 500,
+        hang_rate: float = 0.0,
+        hang_s: float = 3600.0,
+        tokens: int = 32,
+        chunks: int = 8,
+        models: Optional[List[str]] = None,
+        seed: Optional[int] = None
+    ):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.hang_rate = hang_rate
+        self.hang_s = hang_s
+        self.tokens = tokens
+        self.chunks = chunks
+        self.models = models or ["qwen2.5:3b", "phi3:mini", "deepseek-coder:6.7b"]
+        self.rng = random.Random(seed)
+
+    def delay(self) -> float:
+        """Seconds to wait before answering."""
+        kind, *args = self.latency
+        if kind == "fixed":
+            ms = args[0]
+        elif kind == "uniform":
+            ms = self.rng.uniform(args[0], args[1])
+        else:
+            ms = self.rng.lognormvariate(0, args[1]) * args[0]
+        return ms / 1000
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; without this, delayed ACKs add ~40ms
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status: int, body: bytes, content_type: str = "application/json"):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _stream(self, lines: List[bytes], content_type: str, gap: float):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for line in lines:
+            if gap:
+                time.sleep(gap)
+            self.wfile.write(b"%x\r\n%s\r\n" % (len(line), line))
+            self.wfile.flush()
+        self.wfile.write(b"0\r\n\r\n")
+
+    def do_GET(self):
+        server: MockServer = self.server.mock
+        if self.path == "/api/tags":
+            self._send(200, json.dumps({"models": [{"name": m} for m in server.behavior.models]}).encode())
+        else:
+            self._send(404, b'{"error": "not found"}')
+
+    def do_POST(self):
+        server: MockServer = self.server.mock
+        length = int(self.headers.get("Content-Length") or 0)
+        body = json.loads(self.rfile.read(length) or b"{}")
+        path = self.path[3:] if self.path.startswith("/v1/") else self.path
+        if path not in ("/api/generate", "/chat/completions"):
+            self._send(404, b'{"error": "not found"}')
+            return
+
+        behavior = server.behavior
+        server._enter()
+        try:
+            roll = behavior.rng.random()
+            if roll < behavior.hang_rate:
+                server._hung.wait(behavior.hang_s)
+                return
+            delay = behavior.delay()
+            if roll < behavior.hang_rate + behavior.error_rate:
+                time.sleep(delay)
+                self._send(behavior.error_status, b'{"error": "mock failure"}')
+                return
+
+            model = body.get("model", "mock")
+            words = [f"tok{i} " for i in range(behavior.chunks)]
+            if body.get("stream"):
+                # Latency is spread over the stream; first chunk after the first gap
+                gap = delay / max(1, behavior.chunks)
+                if path == "/api/generate":
+                    lines = [json.dumps({"response": w, "done": False}).encode() + b"\n" for w in words]
+                    lines.append(json.dumps({"response": "", "done": True, "eval_count": behavior.tokens}).encode() + b"\n")
+                    self._stream(lines, "application/x-ndjson", gap)
+                else:
+                    lines = [b"data: " + json.dumps({"choices": [{"delta": {"content": w}}]}).encode() + b"\n\n"
+                             for w in words]
+                    usage = {"choices": [], "usage": {"total_tokens": behavior.tokens}}
+                    lines.append(b"data: " + json.dumps(usage).encode() + b"\n\n")
+                    lines.append(b"data: [DONE]\n\n")
+                    self._stream(lines, "text/event-stream", gap)
+                return
+
+            time.sleep(delay)
+            text = "".join(words)
+            if path == "/api/generate":
+                payload: Dict[str, Any] = {"model": model, "response": text, "done": True, "eval_count": behavior.tokens}
+            else:
+                payload = {
+                    "model": model,
+                    "choices": [{"message": {"role": "assistant", "content": text}}],
+                    "usage": {"total_tokens": behavior.tokens}
+                }
+            self._send(200, json.dumps(payload).encode())
+        finally:
+            server._exit()
+
+
+class MockServer:
+    """Threaded mock provider; use as a context manager or start()/stop()."""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, **behavior):
+        self.behavior = Behavior(**behavior)
+        self._httpd = ThreadingHTTPServer((host, port), _Handler)
+        self._httpd.daemon_threads = True
+        self._httpd.mock = self
+        self._hung = threading.Event()
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def configure(self, **behavior):
+        """Replace the behavior (e.g. take a healthy node down mid-run)."""
+        self.behavior = Behavior(**behavior)
+
+    def _enter(self):
+        with self._lock:
+            self.requests += 1
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+
+    def _exit(self):
+        with self._lock:
+            self.in_flight -= 1
+
+    def start(self) -> "MockServer":
+        threading.Thread(target=self._httpd.serve_forever, name="mock-provider", daemon=True).start()
+        return self
+
+    def stop(self):
+        self._hung.set()  # release hung requests
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self) -> "MockServer":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock Ollama / OpenAI-compatible provider")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11434)
+    parser.add_argument("--latency", type=parse_latency, default=("fixed", 0),
+                        help="fixed:MS, uniform:LO:HI or lognormal:MEDIAN:SIGMA")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--hang-rate", type=float, default=0.0)
+    parser.add_argument("--tokens", type=int, default=32)
+    args = parser.parse_args()
+
+    server = MockServer(args.host, args.port, latency=args.latency, error_rate=args.error_rate,
+                        hang_rate=args.hang_rate, tokens=args.tokens)
+    print(f"Mock provider on {server.url}")
+    try:
+        server._httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server._httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
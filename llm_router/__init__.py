@@ -1,16 +1,49 @@
 """LLM Router - Intelligent routing for LLM requests."""
-from .router import Router
-from .providers import OllamaProvider, NvidiaProvider, OpenRouterProvider, PerplexityProvider
-from .health import HealthChecker
-from .usage import UsageTracker
+from importlib import import_module
+from typing import TYPE_CHECKING
 
 __version__ = "1.0.0"
 __all__ = [
     "Router",
+    "AsyncRouter",
     "OllamaProvider",
+    "OllamaPool",
     "NvidiaProvider",
     "OpenRouterProvider",
     "PerplexityProvider",
     "HealthChecker",
     "UsageTracker"
 ]
+
+# Exports are imported on first access, so ``import llm_router`` stays cheap
+_EXPORTS = {
+    "Router": "router",
+    "AsyncRouter": "async_router",
+    "OllamaProvider": "providers",
+    "OllamaPool": "providers",
+    "NvidiaProvider": "providers",
+    "OpenRouterProvider": "providers",
+    "PerplexityProvider": "providers",
+    "HealthChecker": "health",
+    "UsageTracker": "usage",
+}
+
+if TYPE_CHECKING:
+    from .router import Router
+    from .async_router import AsyncRouter
+    from .providers import OllamaProvider, OllamaPool, NvidiaProvider, OpenRouterProvider, PerplexityProvider
+    from .health import HealthChecker
+    from .usage import UsageTracker
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,353 @@
+"""Asyncio routing path for LLM requests."""
+
+import asyncio
+import time
+from functools import partial
+from typing import Optional, Dict, Any, AsyncIterator, Iterator, Tuple
+from .providers import ProviderError
+from .health import HealthProber
+from .router import Router
+from .scheduler import ProviderQueue
+from .sessions import AsyncSessionPool
+from .tokens import estimate_tokens
+
+
+class AsyncRouter(Router):
+    """Asyncio twin of Router with the same routing and failover rules.
+
+    Cancelling the task running ``aquery`` cancels the in-flight provider
+    call; ``deadline`` bounds the whole fallback chain, not each attempt.
+    """
+
+    def __init__(self, config: Optional[Dict] = None):
+        # Set first: providers built during Router.__init__ (warm-up, prober) need it
+        self.async_pool = AsyncSessionPool(**(config or {}).get("pool", {}))
+        super().__init__(config)
+
+    def _setup_provider(self, provider_id: str, provider):
+        super()._setup_provider(provider_id, provider)
+        provider.async_pool = self.async_pool
+
+    async def aquery(
+        self,
+        prompt: str,
+        task: str = "routine",
+        image_url: Optional[str] = None,
+        force_provider: Optional[str] = None,
+        cost_sensitive: bool = True,
+        deadline: Optional[float] = None,
+        priority: str = "interactive"
+    ) -> Dict[str, Any]:
+        """Route and execute a query; ``deadline`` is in seconds."""
+        loop = asyncio.get_running_loop()
+        self._start_tasks()
+        expires = loop.time() + deadline if deadline is not None else None
+        await self._aload_usage()
+
+        if task == "auto":
+            task = self.classifier.classify(prompt)
+        with self.metrics.span("query", task=task) as span:
+            # Force specific provider
+            if force_provider and force_provider in self.providers:
+                return await self._acall_with_deadline(
+                    expires, force_provider, prompt, image_url=image_url, task=task, priority=priority
+                )
+
+            cached = self._semantic_lookup(task, prompt, image_url)
+            if cached:
+                return cached
+
+            route = self._route(task, image_url, estimate_tokens(prompt), cost_sensitive)
+            for provider_id, model, image in route:
+                if self.hedge is not None:
+                    result = await self._acall_hedged(expires, prompt, (provider_id, model, image), route, task, priority)
+                else:
+                    result = await self._acall_with_deadline(
+                        expires, provider_id, prompt, model=model, image_url=image, task=task, priority=priority
+                    )
+                if not result.get("error"):
+                    self._semantic_store(task, prompt, image_url, result)
+                    return result
+                if expires is not None and loop.time() >= expires:
+                    span.set(error="Deadline exceeded")
+                    return {"error": "Deadline exceeded", "content": ""}
+
+            span.set(error="All providers failed")
+            return {"error": "All providers failed", "content": ""}
+
+    async def astream(
+        self,
+        prompt: str,
+        task: str = "routine",
+        image_url: Optional[str] = None,
+        force_provider: Optional[str] = None,
+        info: Optional[Dict[str, Any]] = None,
+        priority: str = "interactive",
+        deadline: Optional[float] = None
+    ) -> AsyncIterator[str]:
+        """Async twin of ``Router.stream``."""
+        self._start_tasks()
+        await self._aload_usage()
+        if task == "auto":
+            task = self.classifier.classify(prompt)
+        expires = asyncio.get_running_loop().time() + deadline if deadline is not None else None
+        error = "All providers failed"
+        for provider_id, model, image in self._stream_candidates(prompt, task, image_url, force_provider):
+            queue, reason = await self._aadmit(provider_id, model, priority, expires)
+            try:
+                if not reason:
+                    reason = self.limiter.acquire(provider_id)
+                if reason:
+                    self.health.release_trial(provider_id)
+                    if force_provider:
+                        error = reason
+                    continue
+                meta: Dict[str, Any] = {}
+                chunks = self.providers[provider_id].astream(
+                    prompt, model=model, image_url=image, info=meta, **self._output_budget(provider_id, model, prompt)
+                )
+                try:
+                    first = await chunks.__anext__()
+                except StopAsyncIteration:
+                    first = None
+                except ProviderError as e:
+                    self._handle_result(provider_id, {"error": str(e), "retry_after": e.retry_after})
+                    if force_provider:
+                        error = str(e)
+                    continue
+
+                if first is not None:
+                    yield first
+                    async for chunk in chunks:
+                        yield chunk
+                self._handle_result(provider_id, meta)
+                if info is not None:
+                    info.update(meta)
+                return
+            finally:
+                if queue is not None:
+                    queue.release()
+
+        raise ProviderError(error)
+
+    async def _acall_hedged(
+        self,
+        expires: Optional[float],
+        prompt: str,
+        candidate: Tuple,
+        route: Iterator[Tuple],
+        task: Optional[str] = None,
+        priority: str = "interactive"
+    ) -> Dict[str, Any]:
+        """Call a candidate, racing the next one in ``route`` if it is slow.
+
+        Unlike the blocking path, the loser is cancelled outright, so the
+        time saved is estimated from the provider's median latency.
+        """
+        provider_id, model, image = candidate
+        delay = self._hedge_delay(provider_id)
+        if delay is None:
+            return await self._acall_with_deadline(expires, provider_id, prompt, model=model, image_url=image, task=task, priority=priority)
+
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        primary = asyncio.ensure_future(
+            self._acall_with_deadline(expires, provider_id, prompt, model=model, image_url=image, task=task, priority=priority)
+        )
+        tasks = [primary]
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if done:
+                return primary.result()
+
+            backup_candidate = next(route, None)
+            if backup_candidate is None:
+                return await primary
+
+            backup_id, backup_model, backup_image = backup_candidate
+            tasks.append(asyncio.ensure_future(
+                self._acall_with_deadline(
+                    expires, backup_id, prompt, model=backup_model, image_url=backup_image, task=task, priority=priority
+                )
+            ))
+
+            pending = set(tasks)
+            result: Dict[str, Any] = {}
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                winner = next((t for t in done if not t.result().get("error")), None)
+                if winner is None:
+                    result = next(iter(done)).result()
+                    continue
+
+                saved_ms = 0
+                if winner is not primary and primary in pending:
+                    expected = self.latency.percentile(provider_id, 0.5) or 0
+                    saved_ms = max(0, int(expected - (loop.time() - start) * 1000))
+                self.usage.record_hedge(provider_id, wasted=len(done) + len(pending) - 1, saved_ms=saved_ms)
+                return winner.result()
+
+            self.usage.record_hedge(provider_id)
+            return result
+        finally:
+            for pending_task in tasks:
+                pending_task.cancel()
+
+    async def _acall_with_deadline(self, expires: Optional[float], provider_id: str, prompt: str, **kwargs) -> Dict[str, Any]:
+        if expires is None:
+            return await self._acall_provider(provider_id, prompt, **kwargs)
+
+        remaining = expires - asyncio.get_running_loop().time()
+        if remaining <= 0:
+            return dict(self._refused(provider_id, "Deadline exceeded"), content="")
+        try:
+            return await asyncio.wait_for(self._acall_provider(provider_id, prompt, expires=expires, **kwargs), remaining)
+        except asyncio.TimeoutError:
+            # The cancelled call never reported back to the breaker
+            return dict(self._refused(provider_id, "Deadline exceeded"), content="")
+
+    async def _acall_provider(
+        self,
+        provider_id: str,
+        prompt: str,
+        model: Optional[str] = None,
+        image_url: Optional[str] = None,
+        task: Optional[str] = None,
+        priority: str = "interactive",
+        expires: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """Call a specific provider; ``expires`` is in event-loop time."""
+        provider = self.providers.get(provider_id)
+        if not provider:
+            return {"error": f"Unknown provider: {provider_id}"}
+
+        cache_key = self._cache_key(provider_id, task, model, prompt, image_url)
+        if cache_key:
+            if self.cache.disk is not None:
+                cached = await self._off_loop(self._cache_lookup, provider_id, cache_key)
+            else:
+                cached = self._cache_lookup(provider_id, cache_key)
+            if cached:
+                return cached
+
+        if self.coalescer is None:
+            return await self._ainvoke(provider_id, prompt, model, image_url, cache_key, priority, expires)
+        key = self._flight_key(provider_id, model, prompt, image_url)
+        return await self.coalescer.ado(
+            key, lambda: self._ainvoke(provider_id, prompt, model, image_url, cache_key, priority, expires)
+        )
+
+    async def _ainvoke(
+        self,
+        provider_id: str,
+        prompt: str,
+        model: Optional[str],
+        image_url: Optional[str],
+        cache_key: Optional[str],
+        priority: str = "interactive",
+        expires: Optional[float] = None
+    ) -> Dict[str, Any]:
+        queue, reason = await self._aadmit(provider_id, model, priority, expires)
+        if reason:
+            return self._refused(provider_id, reason)
+        try:
+            reason = self.limiter.acquire(provider_id)
+            if reason:
+                return self._refused(provider_id, reason)
+
+            with self.metrics.span("attempt", provider=provider_id, model=model) as span:
+                result = await self.providers[provider_id].agenerate(
+                    prompt, model=model, image_url=image_url, **self._output_budget(provider_id, model, prompt)
+                )
+                span.set(error=result.get("error"))
+        finally:
+            if queue is not None:
+                queue.release()
+        if cache_key and self.cache.disk is not None:
+            return await self._off_loop(self._handle_result, provider_id, result, cache_key)
+        return self._handle_result(provider_id, result, cache_key)
+
+    async def _aload_usage(self):
+        """Read usage history before routing: the limiter's first read would block the loop."""
+        if not self.usage.loaded:
+            await self._off_loop(lambda: self.usage.stats)
+
+    @staticmethod
+    async def _off_loop(func, *args):
+        """Run blocking work (SQLite, locked files) in the loop's default executor."""
+        return await asyncio.get_running_loop().run_in_executor(None, partial(func, *args))
+
+    async def _aadmit(
+        self, provider_id: str, model: Optional[str], priority: str, expires: Optional[float]
+    ) -> Tuple[Optional[ProviderQueue], Optional[str]]:
+        """``Router._admit`` without blocking the loop; ``expires`` is in event-loop time."""
+        if expires is not None:
+            # The queue keeps time on the monotonic clock
+            remaining = expires - asyncio.get_running_loop().time()
+            if remaining <= 0:
+                return None, "Deadline exceeded"
+            expires = time.monotonic() + remaining
+        queue = self._queue(provider_id)
+        if queue is None:
+            return None, None
+        service_ms = self.latency.expected(provider_id, model) if expires is not None else None
+        waited = time.perf_counter()
+        reason = await queue.aacquire(priority, expires, service_ms)
+        if self.metrics.enabled:
+            self.metrics.observe_stage("queue", time.perf_counter() - waited, provider_id)
+        return (None, reason) if reason else (queue, None)
+
+    async def acheck_health(self, timeout: float = 10.0, max_age: Optional[float] = None) -> Dict[str, Any]:
+        """Check health of all providers concurrently, within ``timeout`` seconds overall."""
+        self._track_state()
+        self._start_tasks()
+        tasks = {
+            pid: asyncio.ensure_future(self.health.acheck(pid, provider, max_age))
+            for pid, provider in self.providers.items()
+        }
+        if tasks:
+            await asyncio.wait(tasks.values(), timeout=timeout)
+        timed_out = {"healthy": False, "error": f"Health check timed out after {timeout:g}s"}
+        results = {}
+        for pid, task in tasks.items():
+            if task.done():
+                results[pid] = task.result()
+            else:
+                task.cancel()
+                results[pid] = timed_out
+        return results
+
+    def start_health_prober(self, interval: float = 30.0) -> HealthProber:
+        """Check provider health as a task on the running loop.
+
+        Called outside a loop (e.g. from ``__init__`` via ``probe_interval``),
+        the task starts with ``astart`` or the first ``aquery``/``astream``.
+        """
+        if self.prober is None:
+            self.prober = HealthProber(self.health, self.providers, interval=interval)
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return self.prober
+        self.prober.astart()
+        return self.prober
+
+    async def astart(self) -> "AsyncRouter":
+        """Start background tasks (the health prober) on the running loop."""
+        self._start_tasks()
+        return self
+
+    def _start_tasks(self):
+        if self.prober is not None:
+            self.prober.astart()
+
+    async def aclose(self):
+        """Release pooled connections."""
+        await self.async_pool.aclose()
+        self.close()
+
+    async def __aenter__(self) -> "AsyncRouter":
+        return await self.astart()
+
+    async def __aexit__(self, *exc):
+        await self.aclose()
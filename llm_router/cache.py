@@ -0,0 +1,164 @@
+"""Response caching for repeated prompts."""
+
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple, Union
+
+
+class DiskCache:
+    """SQLite-backed second cache tier that survives restarts."""
+
+    def __init__(self, path: Union[str, Path]):
+        import sqlite3
+
+        self.path = Path(path).expanduser()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, expires REAL, value TEXT)")
+        self._conn.commit()
+        self.prune()
+
+    def get(self, key: str) -> Optional[Tuple[float, str]]:
+        """Return (expires, serialized result) if present and fresh."""
+        with self._lock:
+            row = self._conn.execute("SELECT expires, value FROM cache WHERE key = ?", (key,)).fetchone()
+        if row is None or row[0] < time.time():
+            return None
+        return row
+
+    def put(self, key: str, expires: float, value: str):
+        with self._lock:
+            with self._conn:
+                self._conn.execute("INSERT OR REPLACE INTO cache VALUES (?, ?, ?)", (key, expires, value))
+
+    def prune(self) -> int:
+        """Delete expired entries; returns how many were removed."""
+        with self._lock:
+            with self._conn:
+                return self._conn.execute("DELETE FROM cache WHERE expires < ?", (time.time(),)).rowcount
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class ResponseCache:
+    """LRU cache of successful results with a TTL and a size bound in bytes."""
+
+    def __init__(
+        self,
+        max_bytes: int = 64 * 1024 * 1024,
+        ttl: float = 3600,
+        disk_path: Optional[str] = None
+    ):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.disk = DiskCache(disk_path) if disk_path else None
+        # key -> (expires, size, result)
+        self._entries: "OrderedDict[str, Tuple[float, int, Dict[str, Any]]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(task: str, provider_id: str, model: Optional[str], prompt: str) -> str:
+        """Cache key for (task, provider, model, prompt)."""
+        raw = json.dumps([task, provider_id, model or "", prompt], separators=(",", ":"))
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return a copy of a cached result, or None."""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] >= now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return dict(entry[2])
+                self._remove(key)
+
+        if self.disk is not None:
+            row = self.disk.get(key)
+            if row is not None:
+                result = json.loads(row[1])
+                self._insert(key, row[0], len(row[1]), result)
+                with self._lock:
+                    self.disk_hits += 1
+                return dict(result)
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key: str, result: Dict[str, Any]):
+        """Cache a successful result."""
+        value = json.dumps(result, separators=(",", ":"))
+        expires = time.time() + self.ttl
+        self._insert(key, expires, len(value), dict(result))
+        if self.disk is not None:
+            self.disk.put(key, expires, value)
+
+    def _insert(self, key: str, expires: float, size: int, result: Dict[str, Any]):
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (expires, size, result)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def _remove(self, key: str):
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def export(self, max_entries: int = 256, max_bytes: int = 1024 * 1024) -> List[List[Any]]:
+        """Most recently used fresh entries as [key, expires, result], oldest first."""
+        now = time.time()
+        with self._lock:
+            recent = list(reversed(self._entries.items()))
+        entries, total = [], 0
+        for key, (expires, size, result) in recent:
+            if len(entries) >= max_entries or total + size > max_bytes:
+                break
+            if expires >= now:
+                entries.append([key, expires, dict(result)])
+                total += size
+        entries.reverse()
+        return entries
+
+    def restore(self, entries: List[List[Any]]):
+        """Load exported entries that have not expired."""
+        now = time.time()
+        for key, expires, result in entries:
+            if expires >= now and key not in self._entries:
+                self._insert(key, expires, len(json.dumps(result, separators=(",", ":"))), result)
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss/eviction counters and current size."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._bytes
+            }
+
+    def close(self):
+        if self.disk is not None:
+            self.disk.close()
@@ -0,0 +1,141 @@
+"""Prompt classification for ``task="auto"``.
+
+Keywords for every task are compiled into one table keyed by word and
+by word pair, so a prompt is tokenized once (``str.translate`` plus
+``split``) and each token costs one dict lookup however many keywords
+there are. A combined regex was about 1 ms per KB: Python's ``re``
+tries every alternative at every position. Prompts with no keyword hit
+can fall through to a small hashed bag-of-words linear model.
+"""
+
+import json
+import re
+import string
+import zlib
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+# Only the head of a prompt is scanned; it carries the intent and bounds the cost
+SCAN_CHARS = 1000
+
+# Checked in this order when scores tie; entries are words or "word word" pairs
+TASK_KEYWORDS: List[Tuple[str, str]] = [
+    ("debug", "traceback stacktrace segfault bug bugs debug debugging crash crashes crashing "
+              "stack_trace t_work t_working not_work not_working t_compile fix_this fix_my"),
+    ("code", "def code function functions script program method endpoint refactor "
+             "implement compile compiler python javascript typescript java rust golang sql bash regex "
+             "html css api json pytest unittest unit_test unit_tests shell_script console_log"),
+    ("research", "latest recent recently current currently today todays news weather research sources "
+                 "citation citations 2023 2024 2025 2026 2027 2028 2029 this_week this_month this_year "
+                 "who_won who_runs price_of search_for the_web look_up"),
+    ("reasoning", "why explain explains compare comparison analyze analyse analysis prove evaluate "
+                  "implication implications tradeoff tradeoffs trade_offs pros_and step_by reason_about"),
+    ("fast", "hi hello hey thanks define definition translate convert synonym synonyms spell "
+             "capital_of what_time"),
+]
+
+_KEYWORDS: Dict[str, str] = {}
+_PAIRS: Dict[Tuple[str, str], str] = {}
+for _task, _words in reversed(TASK_KEYWORDS):
+    for _word in _words.split():
+        if "_" in _word:
+            _PAIRS[tuple(_word.split("_"))] = _task
+        else:
+            _KEYWORDS[_word] = _task
+del _task, _words, _word
+_PRIORITY = {task: rank for rank, (task, _) in enumerate(TASK_KEYWORDS)}
+_SPACES = str.maketrans(string.punctuation, " " * len(string.punctuation))
+_WORD = re.compile(r"\w+")
+# Substrings that count once each; the debug ones also catch names like TypeError
+_MARKERS = [("debug", "error"), ("debug", "exception"), ("code", "```"), ("code", "=>"), ("code", "#include")]
+
+# Prompts this short with no keyword are treated as quick questions
+FAST_MAX_WORDS = 8
+
+
+class LinearModel:
+    """Hashed bag-of-words linear classifier (averaged perceptron)."""
+
+    def __init__(self, weights: Optional[Dict[str, List[float]]] = None, dim: int = 4096):
+        self.dim = dim
+        self.weights: Dict[str, List[float]] = weights or {}
+
+    def _features(self, text: str) -> List[int]:
+        words = _WORD.findall(text[:SCAN_CHARS].lower())
+        return [zlib.crc32(w.encode()) % self.dim for w in words]
+
+    def predict(self, text: str) -> Tuple[Optional[str], float]:
+        """Best label and its margin over the runner-up."""
+        features = self._features(text)
+        if not self.weights or not features:
+            return None, 0.0
+        scores = sorted(
+            ((sum(w[f] for f in features), label) for label, w in self.weights.items()),
+            reverse=True
+        )
+        runner_up = scores[1][0] if len(scores) > 1 else 0.0
+        return scores[0][1], scores[0][0] - runner_up
+
+    @classmethod
+    def train(cls, examples: Iterable[Tuple[str, str]], epochs: int = 10, dim: int = 4096) -> "LinearModel":
+        """Fit on (prompt, task) pairs."""
+        model = cls(dim=dim)
+        data = [(model._features(text), label) for text, label in examples]
+        labels = sorted({label for _, label in data})
+        weights = {label: [0.0] * dim for label in labels}
+        totals = {label: [0.0] * dim for label in labels}
+        steps = 0
+        for _ in range(epochs):
+            for features, label in data:
+                steps += 1
+                guess = max(labels, key=lambda l: sum(weights[l][f] for f in features))
+                if guess != label:
+                    for f in features:
+                        weights[label][f] += 1
+                        weights[guess][f] -= 1
+                        # Averaging trick: credit updates by how long they will survive
+                        totals[label][f] += steps
+                        totals[guess][f] -= steps
+        model.weights = {
+            label: [w - t / (steps + 1) for w, t in zip(weights[label], totals[label])]
+            for label in labels
+        }
+        return model
+
+    def save(self, path: Union[str, Path]):
+        Path(path).write_text(json.dumps({"dim": self.dim, "weights": self.weights}))
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "LinearModel":
+        data = json.loads(Path(path).expanduser().read_text())
+        return cls(data["weights"], data["dim"])
+
+
+class TaskClassifier:
+    """Maps a prompt to a ``TASK_ROUTING`` key."""
+
+    def __init__(self, linear: Optional[LinearModel] = None, min_margin: float = 1.0, default: str = "routine"):
+        self.linear = linear
+        self.min_margin = min_margin
+        self.default = default
+
+    def classify(self, prompt: str) -> str:
+        head = prompt[:SCAN_CHARS].lower()
+        tokens = head.translate(_SPACES).split()
+        # filter() drops the misses in C; most tokens are not keywords
+        hits = list(filter(None, map(_KEYWORDS.get, tokens)))
+        hits += filter(None, map(_PAIRS.get, zip(tokens, tokens[1:])))
+        hits += [task for task, marker in _MARKERS if marker in head]
+        if hits:
+            scores = Counter(hits)
+            return max(scores, key=lambda task: (scores[task], -_PRIORITY[task]))
+
+        if self.linear is not None:
+            label, margin = self.linear.predict(head)
+            if label is not None and margin >= self.min_margin:
+                return label
+
+        if len(tokens) <= FAST_MAX_WORDS and len(prompt) < 80:
+            return "fast"
+        return self.default
@@ -2,10 +2,35 @@
 
 import argparse
 import json
+import os
+import sys
 from .router import Router
+from .providers import ProviderError
+
+
+def serve_main(argv):
+    parser = argparse.ArgumentParser(prog="llm-router serve", description="Run the LLM Router HTTP gateway")
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to bind")
+    parser.add_argument("--port", type=int, default=8080, help="Port to listen on")
+    parser.add_argument("--config", help="JSON file with Router options")
+    parser.add_argument("--api-key", default=os.getenv("LLM_ROUTER_API_KEY"),
+                        help="Require this bearer token (default: $LLM_ROUTER_API_KEY)")
+    args = parser.parse_args(argv)
+    
+    config = None
+    if args.config:
+        with open(args.config) as f:
+            config = json.load(f)
+    
+    from .server import serve
+    serve(args.host, args.port, config=config, api_key=args.api_key)
 
 
 def main():
+    if sys.argv[1:2] == ["serve"]:
+        serve_main(sys.argv[2:])
+        return
+    
     parser = argparse.ArgumentParser(description="LLM Router CLI")
     parser.add_argument("prompt", nargs="?", help="Query prompt")
     parser.add_argument("--task", "-t", default="routine", help="Task type (code, fast, research, etc)")
@@ -14,9 +39,12 @@ def main():
     parser.add_argument("--health", action="store_true", help="Check provider health")
     parser.add_argument("--usage", action="store_true", help="Show usage statistics")
     parser.add_argument("--json", action="store_true", help="Output as JSON")
+    parser.add_argument("--no-stream", action="store_true", help="Wait for the full response instead of streaming")
+    parser.add_argument("--state", action="store_true",
+                        help="Keep breaker, health and latency state in ~/.llm-router/state.json across runs")
     
     args = parser.parse_args()
-    router = Router()
+    router = Router({"state": True} if args.state else None)
     
     if args.health:
         result = router.check_health()
@@ -43,6 +71,23 @@ def main():
         parser.print_help()
         return
     
+    if not args.json and not args.no_stream:
+        info = {}
+        streamed = False
+        try:
+            for chunk in router.stream(args.prompt, task=args.task, image_url=args.image,
+                                       force_provider=args.provider, info=info):
+                sys.stdout.write(chunk)
+                sys.stdout.flush()
+                streamed = True
+        except ProviderError as e:
+            if streamed:
+                print()
+            print(f"Error: {e}")
+            return
+        print(f"\n\n---\nProvider: {info.get('provider')} | Model: {info.get('model')} | {info.get('elapsed_ms', 0)}ms")
+        return
+    
     result = router.query(
         args.prompt,
         task=args.task,
@@ -0,0 +1,98 @@
+"""Single-flight coalescing of identical concurrent calls."""
+
+import threading
+from typing import Dict, Any, Awaitable, Callable, Hashable, Optional, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import asyncio
+
+
+class _Flight:
+    __slots__ = ("done", "result")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Optional[Dict[str, Any]] = None
+
+
+class SingleFlight:
+    """Runs one call per key at a time; concurrent callers share its result.
+
+    Followers receive a copy of the leader's result marked
+    ``coalesced=True``. If the leader fails with an exception (or is
+    cancelled, in the async path) followers retry on their own.
+    """
+
+    def __init__(self):
+        self._flights: Dict[Hashable, _Flight] = {}
+        self._afutures: Dict[Hashable, "asyncio.Future"] = {}
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.coalesced = 0
+
+    def do(self, key: Hashable, fn: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        """Call ``fn`` unless an identical call is already in flight."""
+        while True:
+            with self._lock:
+                flight = self._flights.get(key)
+                if flight is None:
+                    flight = self._flights[key] = _Flight()
+                    self.calls += 1
+                    break
+            flight.done.wait()
+            if flight.result is not None:
+                return self._share(flight.result)
+
+        try:
+            flight.result = fn()
+            return flight.result
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+
+    async def ado(self, key: Hashable, factory: Callable[[], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+        """Async twin of ``do``; ``factory`` returns the awaitable to share."""
+        import asyncio
+
+        while True:
+            future = self._afutures.get(key)
+            if future is None:
+                break
+            try:
+                # Shielded so one impatient follower cannot cancel the shared call
+                return self._share(await asyncio.shield(future))
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise
+
+        future = asyncio.get_running_loop().create_future()
+        self._afutures[key] = future
+        with self._lock:
+            self.calls += 1
+        try:
+            result = await factory()
+        except BaseException:
+            future.cancel()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self._afutures[key]
+
+    def _share(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        with self._lock:
+            self.coalesced += 1
+        shared = dict(result)
+        shared["coalesced"] = True
+        return shared
+
+    def stats(self) -> Dict[str, Any]:
+        """Calls made, calls answered by another in-flight call, and current flights."""
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "coalesced": self.coalesced,
+                "in_flight": len(self._flights) + len(self._afutures)
+            }
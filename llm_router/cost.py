@@ -0,0 +1,84 @@
+"""Per-model prices and call cost estimates."""
+
+from typing import Any, Dict, Optional, Tuple, Union
+
+Price = Tuple[float, float, float]
+
+# USD per million input tokens, per million output tokens, and per request.
+# Keys are provider names or "provider/model"; the model entry wins.
+PRICES: Dict[str, Price] = {
+    "ollama": (0, 0, 0),
+    "nvidia": (0, 0, 0),
+    "openrouter": (2.0, 2.0, 0),
+    "openrouter/openai/gpt-4o-mini": (0.15, 0.6, 0),
+    "perplexity": (1.0, 1.0, 0.005),
+    "perplexity/sonar-pro": (3.0, 15.0, 0.006),
+}
+
+# Answer length assumed when estimating a call before it is made
+EXPECTED_OUTPUT_TOKENS = 300
+
+_FREE: Price = (0, 0, 0)
+
+
+def _price(value: Union[Dict[str, float], Tuple, list]) -> Price:
+    """Normalize ``{"input": .., "output": .., "request": ..}`` or a 2/3-tuple."""
+    if isinstance(value, dict):
+        return float(value.get("input", 0)), float(value.get("output", 0)), float(value.get("request", 0))
+    values = tuple(float(v) for v in value)
+    return values + (0.0,) * (3 - len(values))
+
+
+class CostModel:
+    """Prices calls from a table resolved once into per-token rates.
+
+    ``prices`` adds to or overrides ``PRICES``, in the same units. Each
+    (provider, model) pair is looked up once and memoized, so pricing a
+    call is a dict hit, two multiplies and two adds.
+    """
+
+    def __init__(self, prices: Optional[Dict[str, Any]] = None):
+        table = dict(PRICES)
+        for key, value in (prices or {}).items():
+            table[key] = _price(value)
+        self._rates: Dict[str, Price] = {
+            key: (input_price / 1e6, output_price / 1e6, request_price)
+            for key, (input_price, output_price, request_price) in table.items()
+        }
+        self._resolved: Dict[Tuple[str, Optional[str]], Price] = {}
+
+    def rates(self, provider: str, model: Optional[str] = None) -> Price:
+        """USD per input token, per output token and per request."""
+        key = (provider, model)
+        rates = self._resolved.get(key)
+        if rates is None:
+            rates = self._rates.get(f"{provider}/{model}") or self._rates.get(provider, _FREE)
+            if len(self._resolved) < 4096:
+                self._resolved[key] = rates
+        return rates
+
+    def cost(self, provider: str, model: Optional[str], prompt_tokens: int, completion_tokens: int) -> float:
+        """USD for a finished call."""
+        per_input, per_output, per_request = self.rates(provider, model)
+        return prompt_tokens * per_input + completion_tokens * per_output + per_request
+
+    def estimate(
+        self,
+        provider: str,
+        model: Optional[str],
+        prompt_tokens: int,
+        output_tokens: int = EXPECTED_OUTPUT_TOKENS
+    ) -> float:
+        """USD a call is expected to cost, from its prompt size."""
+        return self.cost(provider, model, prompt_tokens, output_tokens)
+
+    def table(self) -> Dict[str, Dict[str, float]]:
+        """Prices in use, in the configuration units."""
+        return {
+            key: {"input": round(i * 1e6, 6), "output": round(o * 1e6, 6), "request": r}
+            for key, (i, o, r) in sorted(self._rates.items())
+        }
+
+
+# Used by providers that were not built by a Router
+DEFAULT_COSTS = CostModel()
@@ -1,35 +1,384 @@
 """Health checking for LLM providers."""
 
+import threading
 import time
-from typing import Dict, Any
+from collections import deque
+from typing import Dict, Any, Optional, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import asyncio
+
+
+class CircuitBreaker:
+    """Closed/open/half-open breaker driven by live call outcomes.
+
+    Trips open after ``consecutive_failures`` failures in a row, or when
+    the error rate over the last ``window`` calls reaches
+    ``failure_rate``. While open, calls are refused until an exponential
+    backoff expires; then a single trial call (or probe) is let through
+    and its outcome closes the breaker or reopens it with a longer wait.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        failure_rate: float = 0.5,
+        consecutive_failures: int = 3,
+        window: int = 20,
+        min_calls: int = 5,
+        base_backoff: float = 5.0,
+        max_backoff: float = 300.0,
+        trial_timeout: float = 180.0
+    ):
+        self.failure_rate = failure_rate
+        self.consecutive_failures = consecutive_failures
+        self.min_calls = min_calls
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.trial_timeout = trial_timeout
+        self.state = self.CLOSED
+        self.trips = 0
+        self.open_until = 0.0
+        self.opened_at = 0.0
+        self.failed_at = 0.0
+        self.last_failure: Optional[str] = None
+        self._outcomes = deque(maxlen=window)
+        self._streak = 0
+        self._trial_started: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """Whether a call may go through now (claims the half-open trial)."""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            now = time.time()
+            if self.state == self.OPEN:
+                if now < self.open_until:
+                    return False
+                self.state = self.HALF_OPEN
+                self._trial_started = None
+            # Half-open: one trial at a time; a lost trial is retried after trial_timeout
+            if self._trial_started is None or now - self._trial_started > self.trial_timeout:
+                self._trial_started = now
+                return True
+            return False
+
+    def release_trial(self):
+        """Give back a half-open trial claimed by a call that was never made."""
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self._trial_started = None
+
+    def ready_to_probe(self) -> bool:
+        """Whether an open breaker's backoff has expired."""
+        return self.state == self.OPEN and time.time() >= self.open_until
+
+    def record_success(self):
+        with self._lock:
+            self._outcomes.append(True)
+            self._streak = 0
+            if self.state != self.CLOSED:
+                self.state = self.CLOSED
+                self.trips = 0
+                self._outcomes.clear()
+
+    def record_failure(self, reason: str = ""):
+        with self._lock:
+            self.last_failure = reason
+            self.failed_at = time.time()
+            self._outcomes.append(False)
+            self._streak += 1
+            if self.state == self.HALF_OPEN:
+                self._open()
+                return
+            if self.state == self.OPEN:
+                return
+            failures = self._outcomes.count(False)
+            if (self._streak >= self.consecutive_failures or
+                    (len(self._outcomes) >= self.min_calls and failures / len(self._outcomes) >= self.failure_rate)):
+                self._open()
+
+    def trip(self, reason: str = ""):
+        """Force the breaker open (e.g. after a failed health probe)."""
+        with self._lock:
+            self.last_failure = reason
+            # An expired open breaker that fails again backs off further
+            if self.state != self.OPEN or time.time() >= self.open_until:
+                self._open()
+
+    def _open(self):
+        self.trips += 1
+        backoff = min(self.max_backoff, self.base_backoff * 2 ** (self.trips - 1))
+        self.state = self.OPEN
+        self.opened_at = time.time()
+        self.open_until = self.opened_at + backoff
+        self._trial_started = None
+
+    @property
+    def failing(self) -> bool:
+        """Open, half-open, or closed with failures since the last success."""
+        return self.state != self.CLOSED or self._streak > 0
+
+    def export(self) -> Dict[str, Any]:
+        """State worth keeping across restarts (see ``restore``)."""
+        return {
+            "state": self.state,
+            "trips": self.trips,
+            "streak": self._streak,
+            "opened_at": self.opened_at,
+            "open_until": self.open_until,
+            "failed_at": self.failed_at,
+            "last_failure": self.last_failure
+        }
+
+    def restore(self, saved: Dict[str, Any]):
+        """Resume an exported state; a half-open trial starts over as open."""
+        with self._lock:
+            self.state = self.CLOSED if saved["state"] == self.CLOSED else self.OPEN
+            self.trips = saved["trips"]
+            self._streak = saved["streak"]
+            self._outcomes.extend([False] * self._streak)
+            self.opened_at = saved["opened_at"]
+            self.open_until = saved["open_until"]
+            self.failed_at = saved["failed_at"]
+            self.last_failure = saved.get("last_failure")
+            self._trial_started = None
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "trips": self.trips,
+            "open_until": self.open_until,
+            "last_failure": self.last_failure
+        }
+
 
 class HealthChecker:
-    """Tracks health status of providers."""
-    
-    def __init__(self):
-        self.status: Dict[str, Dict] = {}
+    """Tracks health status of providers.
+
+    Probe results are cached for ``ttl`` seconds: ``check`` reuses a
+    fresh result instead of probing again, and a fresh failed result
+    keeps ``is_healthy`` false for the provider without waiting for its
+    breaker to trip on live traffic.
+    """
+
+    def __init__(self, breaker: Optional[Dict[str, Any]] = None, ttl: float = 10.0):
+        self.ttl = ttl
+        self._cache: Dict[str, Dict] = {}
         self.last_check: Dict[str, float] = {}
-    
+        self.breaker_config = breaker or {}
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def breaker(self, provider_id: str) -> CircuitBreaker:
+        """Get (or create) the circuit breaker for a provider."""
+        breaker = self.breakers.get(provider_id)
+        if breaker is None:
+            with self._lock:
+                breaker = self.breakers.setdefault(provider_id, CircuitBreaker(**self.breaker_config))
+        return breaker
+
+    @property
+    def status(self) -> Dict[str, Dict]:
+        """Last probe result per provider."""
+        return self._cache
+
+    def _fresh(self, provider_id: str, max_age: Optional[float] = None) -> bool:
+        checked = self.last_check.get(provider_id)
+        return checked is None or time.time() - checked <= (self.ttl if max_age is None else max_age)
+
+    def cached(self, provider_id: str, max_age: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """The last probe result if it is at most ``max_age`` (default ``ttl``) seconds old."""
+        result = self._cache.get(provider_id)
+        if result is None or provider_id not in self.last_check or not self._fresh(provider_id, max_age):
+            return None
+        return result
+
     def is_healthy(self, provider_id: str) -> bool:
         """Check if a provider is healthy."""
-        status = self.status.get(provider_id, {})
-        return status.get("healthy", True)
-    
-    def check(self, provider_id: str, provider) -> Dict[str, Any]:
-        """Run health check on a provider."""
+        result = self._cache.get(provider_id)
+        if result is not None and not result.get("healthy", True) and self._fresh(provider_id):
+            return False
+        return self.breaker(provider_id).allow()
+
+    def record_success(self, provider_id: str):
+        """Record a call that reached the provider."""
+        self.breaker(provider_id).record_success()
+        result = self._cache.get(provider_id)
+        if result is not None and not result.get("healthy", True):
+            # A live answer beats a failed probe
+            self._cache.pop(provider_id, None)
+
+    def record_failure(self, provider_id: str, reason: str):
+        """Record a call that failed to reach the provider or timed out."""
+        self.breaker(provider_id).record_failure(reason)
+
+    def release_trial(self, provider_id: str):
+        """Record a routed call that was refused before reaching the provider."""
+        breaker = self.breakers.get(provider_id)
+        if breaker is not None:
+            breaker.release_trial()
+
+    def check(self, provider_id: str, provider, max_age: Optional[float] = None) -> Dict[str, Any]:
+        """Run health check on a provider, reusing a result up to ``max_age`` seconds old."""
+        cached = self.cached(provider_id, max_age)
+        if cached is not None:
+            return dict(cached, cached=True)
+
         if hasattr(provider, "health_check"):
-            result = provider.health_check()
+            start = time.perf_counter()
+            result = dict(provider.health_check(), latency_ms=round((time.perf_counter() - start) * 1000, 1))
+            self._apply_probe(provider_id, result)
         else:
             result = {"healthy": True, "note": "No health check available"}
-        
-        self.status[provider_id] = result
+
+        return self._store(provider_id, result)
+
+    async def acheck(self, provider_id: str, provider, max_age: Optional[float] = None) -> Dict[str, Any]:
+        """Run health check on a provider without blocking the event loop."""
+        cached = self.cached(provider_id, max_age)
+        if cached is not None:
+            return dict(cached, cached=True)
+
+        if hasattr(provider, "ahealth_check"):
+            start = time.perf_counter()
+            result = dict(await provider.ahealth_check(), latency_ms=round((time.perf_counter() - start) * 1000, 1))
+            self._apply_probe(provider_id, result)
+        else:
+            result = {"healthy": True, "note": "No health check available"}
+
+        return self._store(provider_id, result)
+
+    def _apply_probe(self, provider_id: str, result: Dict[str, Any]):
+        if result.get("configured") is False:
+            return  # nothing was probed; no reason to trip the breaker
+        if result.get("healthy"):
+            self.record_success(provider_id)
+        else:
+            self.breaker(provider_id).trip(result.get("error", "health check failed"))
+
+    def _store(self, provider_id: str, result: Dict[str, Any]) -> Dict[str, Any]:
+        self._cache[provider_id] = result
         self.last_check[provider_id] = time.time()
         return result
-    
+
     def mark_unhealthy(self, provider_id: str, reason: str):
         """Mark a provider as unhealthy."""
-        self.status[provider_id] = {"healthy": False, "reason": reason}
-    
+        self._store(provider_id, {"healthy": False, "reason": reason})
+        self.breaker(provider_id).trip(reason)
+
     def get_all_status(self) -> Dict[str, Dict]:
         """Get status of all providers."""
-        return self.status
+        return self._cache
+
+    def get_breakers(self) -> Dict[str, Dict]:
+        """Get circuit breaker state of all providers."""
+        return {pid: b.snapshot() for pid, b in self.breakers.items()}
+
+    def export(self) -> Dict[str, Any]:
+        """Failing breakers and last check results, for a state snapshot."""
+        return {
+            "breakers": {pid: b.export() for pid, b in list(self.breakers.items()) if b.failing},
+            "checks": {
+                pid: [self.last_check[pid], result] for pid, result in list(self.status.items()) if pid in self.last_check
+            }
+        }
+
+    def restore(self, saved: Dict[str, Any], max_age: float):
+        """Apply an ``export`` from an earlier run, skipping entries older than ``max_age``."""
+        now = time.time()
+        for pid, state in saved.get("breakers", {}).items():
+            if now - max(state["opened_at"], state["failed_at"]) <= max_age and pid not in self.breakers:
+                self.breaker(pid).restore(state)
+        for pid, (checked, result) in saved.get("checks", {}).items():
+            if now - checked <= max_age and pid not in self._cache:
+                self._cache[pid] = result
+                self.last_check[pid] = checked
+
+
+class HealthProber:
+    """Background prober that runs health checks on a schedule.
+
+    Healthy providers are checked every ``interval`` seconds; providers
+    with an open breaker are re-probed once their backoff expires.
+    """
+
+    def __init__(self, checker: HealthChecker, providers: Dict[str, Any], interval: float = 30.0, tick: float = 1.0):
+        self.checker = checker
+        self.providers = providers
+        self.interval = interval
+        self.tick = min(tick, interval)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._task: Optional["asyncio.Task"] = None
+
+    def _due(self, provider_id: str, now: float) -> bool:
+        breaker = self.checker.breaker(provider_id)
+        if breaker.state != CircuitBreaker.CLOSED:
+            return breaker.ready_to_probe()
+        return now - self.checker.last_check.get(provider_id, 0) >= self.interval
+
+    def probe_once(self):
+        """Check every provider that is due."""
+        now = time.time()
+        for pid, provider in list(self.providers.items()):
+            if hasattr(provider, "health_check") and self._due(pid, now):
+                self.checker.check(pid, provider, max_age=0)
+
+    async def aprobe_once(self):
+        """Check every provider that is due, concurrently."""
+        import asyncio
+
+        now = time.time()
+        due = [
+            self.checker.acheck(pid, provider, max_age=0)
+            for pid, provider in list(self.providers.items())
+            if hasattr(provider, "ahealth_check") and self._due(pid, now)
+        ]
+        await asyncio.gather(*due)
+
+    def start(self):
+        """Start probing in a daemon thread."""
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="llm-router-health", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.probe_once()
+            self._stop.wait(self.tick)
+
+    def astart(self) -> "asyncio.Task":
+        """Start probing as a task on the running event loop.
+
+        Must be called from a coroutine. A task left behind on an earlier,
+        finished loop is replaced.
+        """
+        import asyncio
+
+        loop = asyncio.get_running_loop()
+        if self._task is None or self._task.done() or self._task.get_loop() is not loop:
+            self._task = loop.create_task(self._arun())
+        return self._task
+
+    async def _arun(self):
+        import asyncio
+
+        while True:
+            await self.aprobe_once()
+            await asyncio.sleep(self.tick)
+
+    def stop(self):
+        """Stop the prober thread or task."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
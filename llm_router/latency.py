@@ -0,0 +1,120 @@
+"""Observed latency statistics for providers and models."""
+
+import math
+import threading
+import time
+from typing import Dict, Any, List, Optional, Tuple
+
+
+class LatencySketch:
+    """Fixed-memory latency distribution with an EWMA.
+
+    Samples fall into log-spaced buckets (about 5% relative error) from
+    1 ms to ~10 minutes, so quantiles cost a walk over ~270 counters no
+    matter how many samples were seen. Counts are halved once they pass
+    ``max_count`` so old traffic fades out.
+    """
+
+    GAMMA = 1.05
+    BUCKETS = 275
+    _LOG_GAMMA = math.log(GAMMA)
+
+    def __init__(self, alpha: float = 0.2, max_count: int = 10000):
+        self.alpha = alpha
+        self.max_count = max_count
+        self.counts = [0] * self.BUCKETS
+        self.total = 0
+        self.ewma: Optional[float] = None
+        self.updated = 0.0
+
+    def add(self, ms: float):
+        index = 0 if ms <= 1 else min(self.BUCKETS - 1, int(math.ceil(math.log(ms) / self._LOG_GAMMA)))
+        self.counts[index] += 1
+        self.total += 1
+        self.ewma = ms if self.ewma is None else self.ewma + self.alpha * (ms - self.ewma)
+        self.updated = time.time()
+        if self.total > self.max_count:
+            self.counts = [c // 2 for c in self.counts]
+            self.total = sum(self.counts)
+
+    def quantile(self, q: float) -> Optional[float]:
+        if not self.total:
+            return None
+        rank = q * (self.total - 1)
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen > rank:
+                # Midpoint of the bucket (GAMMA**(i-1), GAMMA**i]
+                return 2 * self.GAMMA ** index / (1 + self.GAMMA)
+        return self.GAMMA ** (self.BUCKETS - 1)
+
+
+class LatencyTracker:
+    """Streaming latency statistics per provider and per (provider, model)."""
+
+    def __init__(self):
+        self._sketches: Dict[Tuple[str, Optional[str]], LatencySketch] = {}
+        self._lock = threading.Lock()
+
+    def record(self, provider_id: str, elapsed_ms: int, model: Optional[str] = None):
+        """Record the latency of a successful call."""
+        keys = [(provider_id, None)] if model is None else [(provider_id, None), (provider_id, model)]
+        with self._lock:
+            for key in keys:
+                sketch = self._sketches.get(key)
+                if sketch is None:
+                    sketch = self._sketches[key] = LatencySketch()
+                sketch.add(elapsed_ms)
+
+    def count(self, provider_id: str, model: Optional[str] = None) -> int:
+        """Number of samples behind a provider's (or model's) statistics."""
+        sketch = self._sketches.get((provider_id, model))
+        return sketch.total if sketch else 0
+
+    def percentile(self, provider_id: str, q: float, model: Optional[str] = None) -> Optional[float]:
+        """Latency at quantile ``q`` (0-1), or None without samples."""
+        with self._lock:
+            sketch = self._sketches.get((provider_id, model))
+            return sketch.quantile(q) if sketch else None
+
+    def expected(self, provider_id: str, model: Optional[str] = None) -> Optional[float]:
+        """EWMA latency for a model on a provider, falling back to the provider's."""
+        sketch = self._sketches.get((provider_id, model)) or self._sketches.get((provider_id, None))
+        return sketch.ewma if sketch else None
+
+    def export(self) -> List[List[Any]]:
+        """Sketches as compact lists: provider, model, EWMA, updated, sparse bucket counts."""
+        with self._lock:
+            return [
+                [pid, model, sketch.ewma, sketch.updated, [[i, c] for i, c in enumerate(sketch.counts) if c]]
+                for (pid, model), sketch in self._sketches.items()
+            ]
+
+    def restore(self, saved: List[List[Any]], max_age: float):
+        """Load exported sketches, dropping ones not updated within ``max_age`` seconds."""
+        now = time.time()
+        with self._lock:
+            for pid, model, ewma, updated, counts in saved:
+                if now - updated > max_age or (pid, model) in self._sketches:
+                    continue
+                sketch = self._sketches[(pid, model)] = LatencySketch()
+                for index, count in counts:
+                    sketch.counts[index] = count
+                sketch.total = sum(sketch.counts)
+                sketch.ewma = ewma
+                sketch.updated = updated
+
+    def stats(self) -> Dict[str, Any]:
+        """EWMA, p50 and p95 for every tracked provider and model."""
+        with self._lock:
+            items = list(self._sketches.items())
+            return {
+                f"{pid}/{model}" if model else pid: {
+                    "samples": sketch.total,
+                    "ewma_ms": round(sketch.ewma or 0, 1),
+                    "p50_ms": round(sketch.quantile(0.5) or 0, 1),
+                    "p95_ms": round(sketch.quantile(0.95) or 0, 1)
+                }
+                for (pid, model), sketch in items
+            }
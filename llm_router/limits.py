@@ -0,0 +1,175 @@
+"""Rate limits and daily budgets per provider."""
+
+import os
+import threading
+import time
+from typing import Dict, Any, Optional
+
+
+class TokenBucket:
+    """Thread-safe token bucket refilled continuously at ``rate`` per minute.
+
+    The bucket may be driven into debt by ``consume`` (e.g. when a call's
+    token count is only known afterwards); it then refuses until refilled.
+    """
+
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        self.rate = rate / 60.0
+        self.capacity = burst if burst is not None else rate
+        self.level = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def available(self) -> float:
+        with self._lock:
+            self._refill()
+            return self.level
+
+    def try_acquire(self, amount: float = 1) -> bool:
+        """Take ``amount`` if the bucket holds it."""
+        with self._lock:
+            self._refill()
+            if self.level < amount:
+                return False
+            self.level -= amount
+            return True
+
+    def consume(self, amount: float):
+        """Take ``amount`` unconditionally, possibly going into debt."""
+        with self._lock:
+            self._refill()
+            self.level -= amount
+
+    def wait_time(self, amount: float = 1) -> float:
+        """Seconds until ``amount`` is available."""
+        with self._lock:
+            self._refill()
+            return max(0.0, (amount - self.level) / self.rate) if self.rate else float("inf")
+
+
+def _over(spent: float, extra: float, budget: float) -> bool:
+    return spent >= budget or spent + extra > budget
+
+
+class RateLimiter:
+    """Per-provider request/token rate limits, daily budgets and Retry-After.
+
+    ``limits`` maps a provider id to any of ``rpm``, ``tpm`` (with optional
+    ``burst``/``token_burst``), ``daily_calls``, ``daily_tokens`` and
+    ``daily_cost``. ``<PROVIDER>_DAILY_LIMIT`` environment variables set
+    ``daily_calls``. ``budget`` caps spend across all providers with
+    ``daily_cost``. Daily budgets are read from the usage tracker; cost
+    budgets also refuse a call whose estimated cost would overrun them.
+    """
+
+    def __init__(
+        self,
+        limits: Optional[Dict[str, Dict[str, Any]]] = None,
+        usage=None,
+        retry_after: float = 5.0,
+        budget: Optional[Dict[str, float]] = None
+    ):
+        self.limits: Dict[str, Dict[str, Any]] = {pid: dict(l) for pid, l in (limits or {}).items()}
+        self.usage = usage
+        self.budget: Dict[str, float] = dict(budget or {})
+        self.retry_after = retry_after
+        self._requests: Dict[str, TokenBucket] = {}
+        self._tokens: Dict[str, TokenBucket] = {}
+        self._blocked_until: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def configure(self, provider_id: str):
+        """Create the buckets for a provider (env limits included)."""
+        with self._lock:
+            limit = self.limits.setdefault(provider_id, {})
+            env_limit = os.getenv(f"{provider_id.upper()}_DAILY_LIMIT")
+            if env_limit and "daily_calls" not in limit:
+                limit["daily_calls"] = int(env_limit)
+            if limit.get("rpm"):
+                self._requests[provider_id] = TokenBucket(limit["rpm"], limit.get("burst"))
+            if limit.get("tpm"):
+                self._tokens[provider_id] = TokenBucket(limit["tpm"], limit.get("token_burst"))
+
+    def limits_cost(self, provider_id: str) -> bool:
+        """Whether calls to a provider are checked against a cost budget."""
+        return "daily_cost" in self.budget or "daily_cost" in self.limits.get(provider_id, {})
+
+    def check(self, provider_id: str, cost: float = 0.0) -> Optional[str]:
+        """Reason the provider must be skipped right now, or None.
+
+        ``cost`` is the estimated cost of the call about to be made.
+        """
+        wait = self._blocked_until.get(provider_id, 0) - time.monotonic()
+        if wait > 0:
+            return f"Rate limited: retry after {wait:.1f}s"
+
+        limit = self.limits.get(provider_id)
+        if limit and self.usage is not None:
+            today = self.usage.get_today(provider_id)
+            for counter in ("calls", "tokens", "cost"):
+                budget = limit.get(f"daily_{counter}")
+                if budget is not None and _over(today.get(counter, 0), cost if counter == "cost" else 0, budget):
+                    return f"Daily {counter} limit reached"
+        budget = self.budget.get("daily_cost")
+        if budget is not None and self.usage is not None and _over(self.usage.spent_today(), cost, budget):
+            return "Daily budget reached"
+
+        tokens = self._tokens.get(provider_id)
+        if tokens is not None and tokens.available() <= 0:
+            return "Rate limited: tokens per minute"
+        requests = self._requests.get(provider_id)
+        if requests is not None and requests.available() < 1:
+            return "Rate limited: requests per minute"
+        return None
+
+    def acquire(self, provider_id: str) -> Optional[str]:
+        """Claim one request for a provider; returns the refusal reason, if any."""
+        reason = self.check(provider_id)
+        if reason:
+            return reason
+        requests = self._requests.get(provider_id)
+        if requests is not None and not requests.try_acquire():
+            return "Rate limited: requests per minute"
+        return None
+
+    def record(self, provider_id: str, result: Dict[str, Any]):
+        """Charge a finished call's tokens and honor a Retry-After."""
+        tokens = self._tokens.get(provider_id)
+        if tokens is not None and result.get("tokens"):
+            tokens.consume(result["tokens"])
+
+        retry_after = result.get("retry_after")
+        if retry_after is None and result.get("error") == "HTTP 429":
+            retry_after = self.retry_after
+        if retry_after is not None:
+            self.block(provider_id, retry_after)
+
+    def block(self, provider_id: str, seconds: float):
+        """Refuse calls to a provider for ``seconds``."""
+        until = time.monotonic() + seconds
+        with self._lock:
+            self._blocked_until[provider_id] = max(until, self._blocked_until.get(provider_id, 0))
+
+    def stats(self) -> Dict[str, Any]:
+        """Remaining rate capacity, block time and daily budgets per provider."""
+        now = time.monotonic()
+        stats: Dict[str, Any] = {}
+        if self.budget and self.usage is not None:
+            stats["budget"] = dict(self.budget, spent_today=round(self.usage.spent_today(), 6))
+        for pid, limit in self.limits.items():
+            entry: Dict[str, Any] = {k: v for k, v in limit.items() if k.startswith("daily_")}
+            if pid in self._requests:
+                entry["requests_available"] = round(self._requests[pid].available(), 2)
+            if pid in self._tokens:
+                entry["tokens_available"] = round(self._tokens[pid].available())
+            blocked = self._blocked_until.get(pid, 0) - now
+            if blocked > 0:
+                entry["blocked_for"] = round(blocked, 1)
+            if entry:
+                stats[pid] = entry
+        return stats
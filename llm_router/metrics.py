@@ -0,0 +1,232 @@
+"""Timing spans, histograms and a Prometheus text exporter.
+
+Instrumentation is off unless the router is given a ``metrics`` config;
+the default ``NULL_METRICS`` hands out one shared no-op span, so the
+hot path pays only a method call per stage.
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from typing import Dict, Any, List, Optional, Tuple
+
+# Seconds; tuned for LLM calls (sub-second local models to multi-minute reasoning)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+TOKEN_BUCKETS = (16, 64, 256, 1024, 4096, 16384, 65536)
+
+
+class Hook:
+    """Receives every span; subclass to forward spans to a tracing system.
+
+    ``span_start`` may return a handle (e.g. an OpenTelemetry span) that
+    is passed back to ``span_end``.
+    """
+
+    def span_start(self, name: str, attributes: Dict[str, Any]) -> Any:
+        return None
+
+    def span_end(self, handle: Any, name: str, duration: float, attributes: Dict[str, Any], error: Optional[str]):
+        pass
+
+
+class Histogram:
+    """Fixed-bucket histogram in Prometheus' cumulative layout."""
+
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding quantile ``q``."""
+        if not self.count:
+            return None
+        rank, seen = q * self.count, 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+
+class Span:
+    """Times one stage; use as a context manager."""
+
+    __slots__ = ("metrics", "name", "attributes", "error", "start", "handles")
+
+    def __init__(self, metrics: "Metrics", name: str, attributes: Dict[str, Any]):
+        self.metrics = metrics
+        self.name = name
+        self.attributes = attributes
+        self.error: Optional[str] = None
+
+    def set(self, **attributes):
+        """Add attributes, e.g. the outcome once it is known."""
+        self.attributes.update(attributes)
+
+    def __enter__(self) -> "Span":
+        self.handles = [hook.span_start(self.name, self.attributes) for hook in self.metrics.hooks]
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duration = time.perf_counter() - self.start
+        if exc is not None:
+            self.error = repr(exc)
+        elif self.error is None and self.attributes.get("error"):
+            self.error = str(self.attributes["error"])
+        # Failed stages get their own series, e.g. time lost on a dead primary
+        stage = self.name if self.error is None else self.name + ".error"
+        self.metrics.observe_stage(stage, duration, self.attributes.get("provider", ""))
+        for hook, handle in zip(self.metrics.hooks, self.handles):
+            hook.span_end(handle, self.name, duration, self.attributes, self.error)
+        return False
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def set(self, **attributes):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class NullMetrics:
+    """Disabled instrumentation: every call is a no-op."""
+
+    enabled = False
+    hooks: List[Hook] = []
+
+    def span(self, name: str, **attributes) -> _NullSpan:
+        return _NULL_SPAN
+
+    def observe_stage(self, name: str, seconds: float, provider: str = ""):
+        pass
+
+    def observe_call(self, provider: str, model: Optional[str], seconds: float, tokens: int, error: Optional[str] = None):
+        pass
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {}
+
+    def prometheus(self) -> str:
+        return ""
+
+
+NULL_METRICS = NullMetrics()
+
+
+class Metrics(NullMetrics):
+    """Per-stage timings plus latency/token histograms per provider and model."""
+
+    enabled = True
+
+    def __init__(
+        self,
+        hooks: Optional[List[Hook]] = None,
+        latency_buckets: Tuple[float, ...] = LATENCY_BUCKETS,
+        token_buckets: Tuple[float, ...] = TOKEN_BUCKETS
+    ):
+        self.hooks = list(hooks or [])
+        self.latency_buckets = tuple(latency_buckets)
+        self.token_buckets = tuple(token_buckets)
+        self._stages: Dict[Tuple[str, str], Histogram] = {}
+        self._latency: Dict[Tuple[str, str], Histogram] = {}
+        self._tokens: Dict[Tuple[str, str], Histogram] = {}
+        self._calls: Dict[Tuple[str, str], int] = {}
+        self._lock = threading.Lock()
+
+    def span(self, name: str, **attributes) -> Span:
+        """Time a stage: ``with metrics.span("attempt", provider="ollama"):``."""
+        return Span(self, name, attributes)
+
+    def _observe(self, table: Dict, key: Tuple[str, str], buckets: Tuple[float, ...], value: float):
+        histogram = table.get(key)
+        if histogram is None:
+            histogram = table[key] = Histogram(buckets)
+        histogram.observe(value)
+
+    def observe_stage(self, name: str, seconds: float, provider: str = ""):
+        """Record a stage duration measured outside a span."""
+        with self._lock:
+            self._observe(self._stages, (name, provider), self.latency_buckets, seconds)
+
+    def observe_call(self, provider: str, model: Optional[str], seconds: float, tokens: int, error: Optional[str] = None):
+        """Record the outcome of one provider call."""
+        outcome = "error" if error else "ok"
+        with self._lock:
+            self._calls[(provider, outcome)] = self._calls.get((provider, outcome), 0) + 1
+            if not error:
+                key = (provider, model or "")
+                self._observe(self._latency, key, self.latency_buckets, seconds)
+                self._observe(self._tokens, key, self.token_buckets, tokens)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Counts, mean and p95 (bucket bound) of every series."""
+        def summary(table):
+            return {
+                "/".join(p for p in key if p): {
+                    "count": h.count,
+                    "mean": round(h.sum / h.count, 4) if h.count else 0,
+                    "p95": h.quantile(0.95)
+                }
+                for key, h in table.items()
+            }
+
+        with self._lock:
+            return {
+                "calls": {f"{p}/{o}": n for (p, o), n in self._calls.items()},
+                "stages": summary(self._stages),
+                "latency": summary(self._latency),
+                "tokens": summary(self._tokens)
+            }
+
+    def prometheus(self) -> str:
+        """Render all metrics in the Prometheus text exposition format."""
+        lines: List[str] = []
+
+        def histogram(name: str, help_text: str, labels: Tuple[str, str], table: Dict):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} histogram")
+            for key, h in sorted(table.items()):
+                label = ",".join(f'{k}="{_escape(v)}"' for k, v in zip(labels, key))
+                cumulative = 0
+                for bound, count in zip(h.buckets + (float("inf"),), h.counts):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f'{name}_bucket{{{label},le="{le}"}} {cumulative}')
+                lines.append(f"{name}_sum{{{label}}} {h.sum}")
+                lines.append(f"{name}_count{{{label}}} {h.count}")
+
+        with self._lock:
+            lines.append("# HELP llm_router_calls_total Provider calls by outcome.")
+            lines.append("# TYPE llm_router_calls_total counter")
+            for (provider, outcome), count in sorted(self._calls.items()):
+                lines.append(f'llm_router_calls_total{{provider="{_escape(provider)}",outcome="{outcome}"}} {count}')
+            histogram("llm_router_stage_seconds", "Time spent per routing stage.",
+                      ("stage", "provider"), self._stages)
+            histogram("llm_router_call_seconds", "Latency of successful calls.",
+                      ("provider", "model"), self._latency)
+            histogram("llm_router_call_tokens", "Tokens per successful call.",
+                      ("provider", "model"), self._tokens)
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
@@ -1,94 +1,525 @@
 """LLM Provider implementations."""
 
+import json
+import random
+import sys
+import threading
 import time
-import requests
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Iterator, AsyncIterator, List, Set, Tuple, TYPE_CHECKING
+from .cost import DEFAULT_COSTS, CostModel
+from .metrics import NULL_METRICS, NullMetrics
+from .sessions import SessionPool, AsyncSessionPool, default_pool
+from .tokens import CONTEXT_MARGIN, context_window, estimate_tokens
+
+# asyncio and the HTTP libraries load on first use (see sessions)
+if TYPE_CHECKING:
+    import asyncio
+    import requests
+
+
+class ProviderError(Exception):
+    """Raised by streaming calls, which cannot return an error dict."""
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def _retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds from a Retry-After header (delta-seconds or HTTP date)."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    from email.utils import parsedate_to_datetime
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
 
 
 class BaseProvider:
-    """Base class for LLM providers."""
-    
-    def generate(self, prompt: str, **kwargs) -> Dict[str, Any]:
+    """Base class for LLM providers.
+
+    Subclasses describe a call with ``_build_request`` and turn the decoded
+    body into a result with ``_parse_response``; the sync and async paths
+    share both halves.
+    """
+
+    name = "base"
+    default_model: Optional[str] = None
+    timeout = 60
+    max_output_tokens = 1400
+    pool: Optional[SessionPool] = None
+    async_pool: Optional[AsyncSessionPool] = None
+    metrics: NullMetrics = NULL_METRICS
+    costs: CostModel = DEFAULT_COSTS
+
+    @property
+    def session_pool(self) -> SessionPool:
+        """Session pool used for HTTP calls (shared default if unset)."""
+        return self.pool or default_pool()
+
+    def _get(self, url: str, **kwargs) -> "requests.Response":
+        return self.session_pool.get(url, **kwargs)
+
+    def _post(self, url: str, **kwargs) -> "requests.Response":
+        return self.session_pool.post(url, **kwargs)
+
+    async def _arequest(self, method: str, url: str, **kwargs):
+        if self.async_pool is not None:
+            return await self.async_pool.request(method, url, **kwargs)
+        pool = AsyncSessionPool()
+        try:
+            return await pool.request(method, url, **kwargs)
+        finally:
+            await pool.aclose()
+
+    def _unavailable(self) -> Optional[str]:
+        """Reason the provider cannot be called, if any."""
+        return None
+
+    def _build_request(self, prompt: str, model: str, stream: bool = False, **kwargs) -> Dict[str, Any]:
+        """Build ``url``, ``json`` and ``headers`` for a generate call."""
         raise NotImplementedError
 
+    def _parse_response(self, data: Dict[str, Any], model: str, elapsed: float) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    def _parse_chunk(self, line: bytes) -> Tuple[str, Optional[int]]:
+        """Decode one streamed line into (text, total tokens if reported)."""
+        raise NotImplementedError
+
+    def _cost(self, model: Optional[str], prompt_tokens: int, completion_tokens: int) -> float:
+        return self.costs.cost(self.name, model, prompt_tokens, completion_tokens)
+
+    @staticmethod
+    def _http_error(response) -> Dict[str, Any]:
+        error: Dict[str, Any] = {"error": f"HTTP {response.status_code}"}
+        retry_after = _retry_after(response.headers.get("Retry-After"))
+        if retry_after is not None:
+            error["retry_after"] = retry_after
+        return error
+
+    @staticmethod
+    def _error(exc: Exception) -> Dict[str, Any]:
+        # Only an HTTP library that has been imported can have raised this
+        requests = sys.modules.get("requests")
+        httpx = sys.modules.get("httpx")
+        if requests is not None:
+            if isinstance(exc, requests.exceptions.Timeout):
+                return {"error": "Timeout"}
+            if isinstance(exc, requests.exceptions.ConnectionError):
+                return {"error": "Connection refused"}
+        if httpx is not None:
+            if isinstance(exc, httpx.TimeoutException):
+                return {"error": "Timeout"}
+            if isinstance(exc, httpx.ConnectError):
+                return {"error": "Connection refused"}
+        return {"error": str(exc)}
+
+    def generate(self, prompt: str, model: Optional[str] = None, **kwargs) -> Dict[str, Any]:
+        reason = self._unavailable()
+        if reason:
+            return {"error": reason}
+
+        model = model or self.default_model
+        try:
+            request = self._build_request(prompt, model, **kwargs)
+            start = time.time()
+            response = self._post(request.pop("url"), timeout=self.timeout, **request)
+            elapsed = time.time() - start
+            if self.metrics.enabled:
+                # requests times up to the parsed headers; the rest is the body
+                headers = response.elapsed.total_seconds()
+                self.metrics.observe_stage("http.headers", headers, self.name)
+                self.metrics.observe_stage("http.body", max(0.0, elapsed - headers), self.name)
+
+            if response.status_code != 200:
+                return self._http_error(response)
+
+            with self.metrics.span("decode", provider=self.name):
+                return self._parse_response(response.json(), model, elapsed)
+        except Exception as e:
+            return self._error(e)
+
+    async def agenerate(self, prompt: str, model: Optional[str] = None, **kwargs) -> Dict[str, Any]:
+        """Async twin of ``generate``."""
+        reason = self._unavailable()
+        if reason:
+            return {"error": reason}
+
+        model = model or self.default_model
+        try:
+            request = self._build_request(prompt, model, **kwargs)
+            start = time.time()
+            response = await self._arequest("POST", request.pop("url"), timeout=self.timeout, **request)
+            elapsed = time.time() - start
+            self.metrics.observe_stage("http", elapsed, self.name)
+
+            if response.status_code != 200:
+                return self._http_error(response)
+
+            with self.metrics.span("decode", provider=self.name):
+                return self._parse_response(response.json(), model, elapsed)
+        except Exception as e:
+            return self._error(e)
+
+    def _stream_info(self, model: str, tokens: int, start: float, prompt: str) -> Dict[str, Any]:
+        # Streams only report a total; the prompt's share is estimated
+        prompt_tokens = min(tokens, estimate_tokens(prompt))
+        return {
+            "provider": self.name,
+            "model": model,
+            "tokens": tokens,
+            "elapsed_ms": int((time.time() - start) * 1000),
+            "cost": self._cost(model, prompt_tokens, tokens - prompt_tokens)
+        }
+
+    def stream(
+        self,
+        prompt: str,
+        model: Optional[str] = None,
+        info: Optional[Dict[str, Any]] = None,
+        **kwargs
+    ) -> Iterator[str]:
+        """Yield completion text as it arrives.
+
+        Raises ProviderError on failure. When done, ``info`` (if given) is
+        filled with provider, model, tokens, elapsed_ms and cost.
+        """
+        reason = self._unavailable()
+        if reason:
+            raise ProviderError(reason)
+
+        model = model or self.default_model
+        tokens = 0
+        try:
+            request = self._build_request(prompt, model, stream=True, **kwargs)
+            start = time.time()
+            response = self._post(request.pop("url"), timeout=self.timeout, stream=True, **request)
+            with response:
+                if response.status_code != 200:
+                    error = self._http_error(response)
+                    raise ProviderError(error["error"], error.get("retry_after"))
+                for line in response.iter_lines():
+                    if not line:
+                        continue
+                    text, reported = self._parse_chunk(line)
+                    if reported is not None:
+                        tokens = reported
+                    if text:
+                        yield text
+        except ProviderError:
+            raise
+        except Exception as e:
+            raise ProviderError(self._error(e)["error"]) from e
+
+        if info is not None:
+            info.update(self._stream_info(model, tokens, start, prompt))
+
+    async def astream(
+        self,
+        prompt: str,
+        model: Optional[str] = None,
+        info: Optional[Dict[str, Any]] = None,
+        **kwargs
+    ) -> AsyncIterator[str]:
+        """Async twin of ``stream``."""
+        reason = self._unavailable()
+        if reason:
+            raise ProviderError(reason)
+
+        model = model or self.default_model
+        tokens = 0
+        pool = self.async_pool
+        try:
+            if pool is None:
+                pool = AsyncSessionPool()
+            request = self._build_request(prompt, model, stream=True, **kwargs)
+            start = time.time()
+            async with pool.stream("POST", request.pop("url"), timeout=self.timeout, **request) as response:
+                if response.status_code != 200:
+                    error = self._http_error(response)
+                    raise ProviderError(error["error"], error.get("retry_after"))
+                async for line in response.aiter_lines():
+                    if not line:
+                        continue
+                    text, reported = self._parse_chunk(line.encode())
+                    if reported is not None:
+                        tokens = reported
+                    if text:
+                        yield text
+        except ProviderError:
+            raise
+        except Exception as e:
+            raise ProviderError(self._error(e)["error"]) from e
+        finally:
+            if pool is not None and pool is not self.async_pool:
+                await pool.aclose()
+
+        if info is not None:
+            info.update(self._stream_info(model, tokens, start, prompt))
+
 
 class OllamaProvider(BaseProvider):
     """Ollama local provider."""
-    
-    def __init__(self, url: str = "http://localhost:11434"):
+
+    name = "ollama"
+    default_model = "qwen2.5:3b"
+    max_output_tokens = 1500
+    # num_ctx Ollama uses when the request does not set one
+    default_context = 2048
+
+    def __init__(
+        self,
+        url: str = "http://localhost:11434",
+        pool: Optional[SessionPool] = None,
+        keep_alive: Optional[Dict[str, Any]] = None
+    ):
         self.url = url
+        self.pool = pool
         self.timeout = 120
-    
-    def generate(
-        self, 
-        prompt: str, 
-        model: str = "qwen2.5:3b",
+        # keep_alive per model ("30m", seconds, -1 = forever), "default" for the rest
+        self.keep_alive: Dict[str, Any] = keep_alive or {}
+        # Models Ollama holds in memory (/api/ps); None until first checked
+        self.loaded: Optional[Set[str]] = None
+
+    def _build_request(
+        self,
+        prompt: str,
+        model: str,
+        stream: bool = False,
+        max_tokens: Optional[int] = None,
         **kwargs
     ) -> Dict[str, Any]:
+        num_predict = max_tokens or self.max_output_tokens
+        options = {"temperature": 0.7, "num_predict": num_predict}
+        # Ollama silently truncates prompts longer than num_ctx, so grow it to fit
+        needed = estimate_tokens(prompt) + num_predict + CONTEXT_MARGIN
+        if needed > self.default_context:
+            num_ctx = -(-needed // 1024) * 1024
+            window = context_window(model)
+            options["num_ctx"] = min(num_ctx, window) if window else num_ctx
+        payload = {
+            "model": model,
+            "prompt": prompt,
+            "stream": stream,
+            "options": options
+        }
+        keep_alive = self._keep_alive(model)
+        if keep_alive is not None:
+            payload["keep_alive"] = keep_alive
+        return {"url": f"{self.url}/api/generate", "json": payload}
+
+    def _keep_alive(self, model: str) -> Any:
+        return self.keep_alive.get(model, self.keep_alive.get("default"))
+
+    def _parse_chunk(self, line: bytes) -> Tuple[str, Optional[int]]:
+        # NDJSON: one object per line, the last one has "done": true
+        data = json.loads(line)
+        if data.get("error"):
+            raise ProviderError(data["error"])
+        tokens = None
+        if data.get("done"):
+            tokens = data.get("prompt_eval_count", 0) + data.get("eval_count", 0)
+        return data.get("response", ""), tokens
+
+    def _parse_response(self, data: Dict[str, Any], model: str, elapsed: float) -> Dict[str, Any]:
+        prompt_tokens, completion_tokens = data.get("prompt_eval_count", 0), data.get("eval_count", 0)
+        return {
+            "provider": "ollama",
+            "model": model,
+            "content": data.get("response", ""),
+            "tokens": prompt_tokens + completion_tokens,
+            "elapsed_ms": int(elapsed * 1000),
+            "cost": self._cost(model, prompt_tokens, completion_tokens)
+        }
+
+    @staticmethod
+    def _parse_tags(data: Dict[str, Any]) -> Dict[str, Any]:
+        return {"healthy": True, "models": [m["name"] for m in data.get("models", [])]}
+
+    def health_check(self) -> Dict[str, Any]:
         try:
-            start = time.time()
-            response = requests.post(
-                f"{self.url}/api/generate",
-                json={
-                    "model": model,
-                    "prompt": prompt,
-                    "stream": False,
-                    "options": {"temperature": 0.7, "num_predict": 1500}
-                },
-                timeout=self.timeout
-            )
-            elapsed = time.time() - start
-            
-            if response.status_code != 200:
-                return {"error": f"HTTP {response.status_code}"}
-            
-            data = response.json()
-            return {
-                "provider": "ollama",
-                "model": model,
-                "content": data.get("response", ""),
-                "elapsed_ms": int(elapsed * 1000),
-                "cost": 0
-            }
-        except requests.exceptions.Timeout:
-            return {"error": "Timeout"}
-        except requests.exceptions.ConnectionError:
-            return {"error": "Connection refused"}
+            response = self._get(f"{self.url}/api/tags", timeout=5)
+            if response.status_code == 200:
+                return self._parse_tags(response.json())
+            return {"healthy": False, "error": f"HTTP {response.status_code}"}
         except Exception as e:
-            return {"error": str(e)}
-    
-    def health_check(self) -> Dict[str, Any]:
+            return {"healthy": False, "error": str(e)}
+
+    async def ahealth_check(self) -> Dict[str, Any]:
+        """Async twin of ``health_check``."""
         try:
-            response = requests.get(f"{self.url}/api/tags", timeout=5)
+            response = await self._arequest("GET", f"{self.url}/api/tags", timeout=5)
             if response.status_code == 200:
-                models = [m["name"] for m in response.json().get("models", [])]
-                return {"healthy": True, "models": models}
+                return self._parse_tags(response.json())
             return {"healthy": False, "error": f"HTTP {response.status_code}"}
         except Exception as e:
             return {"healthy": False, "error": str(e)}
 
+    def mark_loaded(self, model: str):
+        """Note that ``model`` is resident (it just answered or was preloaded)."""
+        self.loaded = (self.loaded or set()) | {model}
 
-class NvidiaProvider(BaseProvider):
-    """NVIDIA NIM API provider (Kimi, Llama, etc)."""
-    
-    def __init__(self, api_key: str):
+    def _parse_ps(self, data: Dict[str, Any]) -> Set[str]:
+        self.loaded = {m["name"] for m in data.get("models", [])}
+        return self.loaded
+
+    def loaded_models(self) -> Optional[Set[str]]:
+        """Refresh and return the models in memory; last known set on failure."""
+        try:
+            response = self._get(f"{self.url}/api/ps", timeout=5)
+            if response.status_code == 200:
+                return self._parse_ps(response.json())
+        except Exception:
+            pass
+        return self.loaded
+
+    async def aloaded_models(self) -> Optional[Set[str]]:
+        """Async twin of ``loaded_models``."""
+        try:
+            response = await self._arequest("GET", f"{self.url}/api/ps", timeout=5)
+            if response.status_code == 200:
+                return self._parse_ps(response.json())
+        except Exception:
+            pass
+        return self.loaded
+
+    def preload(self, model: Optional[str] = None, keep_alive: Any = None) -> Dict[str, Any]:
+        """Load a model into memory ahead of traffic (a generate call without a prompt)."""
+        model = model or self.default_model
+        payload = {"model": model}
+        keep_alive = keep_alive if keep_alive is not None else self._keep_alive(model)
+        if keep_alive is not None:
+            payload["keep_alive"] = keep_alive
+        try:
+            response = self._post(f"{self.url}/api/generate", json=payload, timeout=self.timeout)
+            if response.status_code != 200:
+                return self._http_error(response)
+        except Exception as e:
+            return self._error(e)
+        self.mark_loaded(model)
+        return {"model": model, "loaded": True}
+
+
+class ChatCompletionsProvider(BaseProvider):
+    """Base for hosted providers speaking the OpenAI chat-completions API."""
+
+    base_url = ""
+    # Cheap authenticated GET used as a health probe
+    health_path = "/models"
+
+    def __init__(self, api_key: str, pool: Optional[SessionPool] = None):
         self.api_key = api_key
-        self.base_url = "https://integrate.api.nvidia.com/v1"
-        self.default_model = "moonshotai/kimi-k2.5"
-    
-    def generate(
-        self, 
-        prompt: str, 
-        model: Optional[str] = None,
+        self.pool = pool
+
+    def _unavailable(self) -> Optional[str]:
+        if not self.api_key:
+            return "API key not configured"
+        return None
+
+    def _headers(self) -> Dict[str, str]:
+        return {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json"
+        }
+
+    def _probe_result(self, status_code: int) -> Dict[str, Any]:
+        # Any answer short of a server error or a rejected key means the API is up
+        if status_code >= 500 or status_code in (401, 403):
+            return {"healthy": False, "error": f"HTTP {status_code}"}
+        return {"healthy": True}
+
+    def health_check(self) -> Dict[str, Any]:
+        reason = self._unavailable()
+        if reason:
+            return {"healthy": False, "configured": False, "error": reason}
+        try:
+            response = self._get(f"{self.base_url}{self.health_path}", headers=self._headers(), timeout=5)
+            return self._probe_result(response.status_code)
+        except Exception as e:
+            return {"healthy": False, "error": str(e)}
+
+    async def ahealth_check(self) -> Dict[str, Any]:
+        """Async twin of ``health_check``."""
+        reason = self._unavailable()
+        if reason:
+            return {"healthy": False, "configured": False, "error": reason}
+        try:
+            response = await self._arequest("GET", f"{self.base_url}{self.health_path}", headers=self._headers(), timeout=5)
+            return self._probe_result(response.status_code)
+        except Exception as e:
+            return {"healthy": False, "error": str(e)}
+
+    def _payload(self, prompt: str, model: str, max_tokens: Optional[int] = None, **kwargs) -> Dict[str, Any]:
+        return {
+            "model": model,
+            "messages": [{"role": "user", "content": prompt}],
+            "max_tokens": max_tokens or self.max_output_tokens
+        }
+
+    def _build_request(self, prompt: str, model: str, stream: bool = False, **kwargs) -> Dict[str, Any]:
+        payload = self._payload(prompt, model, **kwargs)
+        if stream:
+            payload["stream"] = True
+            payload["stream_options"] = {"include_usage": True}
+        return {
+            "url": f"{self.base_url}/chat/completions",
+            "headers": self._headers(),
+            "json": payload
+        }
+
+    def _parse_chunk(self, line: bytes) -> Tuple[str, Optional[int]]:
+        # Server-sent events: "data: {...}" lines, ending with "data: [DONE]"
+        if not line.startswith(b"data:"):
+            return "", None
+        body = line[5:].strip()
+        if body == b"[DONE]":
+            return "", None
+        data = json.loads(body)
+        if data.get("error"):
+            raise ProviderError(str(data["error"]))
+        usage = data.get("usage") or {}
+        choices = data.get("choices") or [{}]
+        text = (choices[0].get("delta") or {}).get("content") or ""
+        return text, usage.get("total_tokens")
+
+    def _parse_response(self, data: Dict[str, Any], model: str, elapsed: float) -> Dict[str, Any]:
+        usage = data.get("usage", {})
+        tokens = usage.get("total_tokens", 0)
+        prompt_tokens = usage.get("prompt_tokens", 0)
+        completion_tokens = usage.get("completion_tokens", tokens - prompt_tokens)
+        return {
+            "provider": self.name,
+            "model": model,
+            "content": data["choices"][0]["message"]["content"],
+            "tokens": tokens,
+            "elapsed_ms": int(elapsed * 1000),
+            "cost": self._cost(model, prompt_tokens, completion_tokens)
+        }
+
+
+class NvidiaProvider(ChatCompletionsProvider):
+    """NVIDIA NIM API provider (Kimi, Llama, etc)."""
+
+    name = "nvidia"
+    base_url = "https://integrate.api.nvidia.com/v1"
+    default_model = "moonshotai/kimi-k2.5"
+    timeout = 180
+
+    def _payload(
+        self,
+        prompt: str,
+        model: str,
         image_url: Optional[str] = None,
         thinking: bool = False,
+        max_tokens: Optional[int] = None,
         **kwargs
     ) -> Dict[str, Any]:
-        if not self.api_key:
-            return {"error": "API key not configured"}
-        
-        model = model or self.default_model
-        
         if image_url:
             content = [
                 {"type": "text", "text": prompt},
@@ -97,136 +528,305 @@ class NvidiaProvider(BaseProvider):
             messages = [{"role": "user", "content": content}]
         else:
             messages = [{"role": "user", "content": prompt}]
-        
-        try:
-            start = time.time()
-            response = requests.post(
-                f"{self.base_url}/chat/completions",
-                headers={
-                    "Authorization": f"Bearer {self.api_key}",
-                    "Content-Type": "application/json"
-                },
-                json={
-                    "model": model,
-                    "messages": messages,
-                    "max_tokens": 1400,
-                    "chat_template_kwargs": {"thinking": thinking}
-                },
-                timeout=180
-            )
-            elapsed = time.time() - start
-            
-            if response.status_code != 200:
-                return {"error": f"HTTP {response.status_code}"}
-            
-            data = response.json()
-            return {
-                "provider": "nvidia",
-                "model": model,
-                "content": data["choices"][0]["message"]["content"],
-                "tokens": data.get("usage", {}).get("total_tokens", 0),
-                "elapsed_ms": int(elapsed * 1000),
-                "cost": 0
-            }
-        except Exception as e:
-            return {"error": str(e)}
+
+        return {
+            "model": model,
+            "messages": messages,
+            "max_tokens": max_tokens or self.max_output_tokens,
+            "chat_template_kwargs": {"thinking": thinking}
+        }
 
 
-class OpenRouterProvider(BaseProvider):
+class OpenRouterProvider(ChatCompletionsProvider):
     """OpenRouter API provider."""
-    
-    def __init__(self, api_key: str):
-        self.api_key = api_key
-        self.base_url = "https://openrouter.ai/api/v1"
-    
-    def generate(
-        self, 
-        prompt: str, 
-        model: str = "openrouter/auto",
-        **kwargs
-    ) -> Dict[str, Any]:
-        if not self.api_key:
-            return {"error": "API key not configured"}
-        
-        try:
-            start = time.time()
-            response = requests.post(
-                f"{self.base_url}/chat/completions",
-                headers={
-                    "Authorization": f"Bearer {self.api_key}",
-                    "Content-Type": "application/json"
-                },
-                json={
-                    "model": model,
-                    "messages": [{"role": "user", "content": prompt}],
-                    "max_tokens": 1400
-                },
-                timeout=60
-            )
-            elapsed = time.time() - start
-            
-            if response.status_code != 200:
-                return {"error": f"HTTP {response.status_code}"}
-            
-            data = response.json()
-            tokens = data.get("usage", {}).get("total_tokens", 0)
-            return {
-                "provider": "openrouter",
-                "model": model,
-                "content": data["choices"][0]["message"]["content"],
-                "tokens": tokens,
-                "elapsed_ms": int(elapsed * 1000),
-                "cost": tokens * 0.000002
-            }
-        except Exception as e:
-            return {"error": str(e)}
+
+    name = "openrouter"
+    base_url = "https://openrouter.ai/api/v1"
+    default_model = "openrouter/auto"
+    # Key info is a few hundred bytes; the model list is hundreds of KB
+    health_path = "/key"
 
 
-class PerplexityProvider(BaseProvider):
+class PerplexityProvider(ChatCompletionsProvider):
     """Perplexity AI provider for web-search powered answers."""
-    
-    def __init__(self, api_key: str):
-        self.api_key = api_key
-        self.base_url = "https://api.perplexity.ai"
-    
-    def generate(
-        self, 
-        prompt: str, 
-        model: str = "sonar",
-        **kwargs
-    ) -> Dict[str, Any]:
-        if not self.api_key:
-            return {"error": "API key not configured"}
-        
+
+    name = "perplexity"
+    base_url = "https://api.perplexity.ai"
+    default_model = "sonar"
+
+    def _parse_response(self, data: Dict[str, Any], model: str, elapsed: float) -> Dict[str, Any]:
+        result = super()._parse_response(data, model, elapsed)
+        result["citations"] = data.get("citations", [])[:5]
+        return result
+
+
+class OllamaPool(BaseProvider):
+    """Ollama provider that load-balances across several nodes.
+
+    Requests go to nodes that report the model in their ``/api/tags``
+    list (nodes not yet checked are assumed to have it), preferring nodes
+    that already hold it in memory and have a free slot, then choosing by
+    least outstanding requests or power-of-two-choices. Each node runs at
+    most ``max_in_flight`` requests at once; extra callers wait for a
+    slot. A failed node is skipped and the next one tried.
+    """
+
+    name = "ollama"
+    default_model = OllamaProvider.default_model
+    max_output_tokens = OllamaProvider.max_output_tokens
+
+    def __init__(
+        self,
+        urls: List[str],
+        pool: Optional[SessionPool] = None,
+        max_in_flight: int = 4,
+        strategy: str = "least",
+        slot_timeout: float = 120
+    ):
+        if strategy not in ("least", "p2c"):
+            raise ValueError(f"Unknown strategy: {strategy}")
+        self.nodes = [OllamaProvider(url, pool=pool) for url in urls]
+        self.max_in_flight = max_in_flight
+        self.strategy = strategy
+        self.slot_timeout = slot_timeout
+        self.in_flight = [0] * len(self.nodes)
+        self.models: List[Optional[Set[str]]] = [None] * len(self.nodes)
+        self._slots = [threading.BoundedSemaphore(max_in_flight) for _ in self.nodes]
+        self._async_slots: Optional[List["asyncio.Semaphore"]] = None
+        self._lock = threading.Lock()
+        self._pool = pool
+        self._async_pool: Optional[AsyncSessionPool] = None
+        self._metrics: NullMetrics = NULL_METRICS
+        self._costs: CostModel = DEFAULT_COSTS
+
+    @property
+    def pool(self) -> Optional[SessionPool]:
+        return self._pool
+
+    @pool.setter
+    def pool(self, value: Optional[SessionPool]):
+        self._pool = value
+        for node in self.nodes:
+            node.pool = value
+
+    @property
+    def async_pool(self) -> Optional[AsyncSessionPool]:
+        return self._async_pool
+
+    @async_pool.setter
+    def async_pool(self, value: Optional[AsyncSessionPool]):
+        self._async_pool = value
+        for node in self.nodes:
+            node.async_pool = value
+
+    @property
+    def keep_alive(self) -> Dict[str, Any]:
+        return self.nodes[0].keep_alive if self.nodes else {}
+
+    @keep_alive.setter
+    def keep_alive(self, value: Dict[str, Any]):
+        for node in self.nodes:
+            node.keep_alive = value
+
+    @property
+    def metrics(self) -> NullMetrics:
+        return self._metrics
+
+    @metrics.setter
+    def metrics(self, value: NullMetrics):
+        self._metrics = value
+        for node in self.nodes:
+            node.metrics = value
+
+    @property
+    def costs(self) -> CostModel:
+        return self._costs
+
+    @costs.setter
+    def costs(self, value: CostModel):
+        self._costs = value
+        for node in self.nodes:
+            node.costs = value
+
+    def _pick(self, model: str, tried: Set[int]) -> Optional[int]:
+        """Choose the next node for a model, skipping ones already tried."""
+        remaining = [i for i in range(len(self.nodes)) if i not in tried]
+        if not remaining:
+            return None
+        eligible = [i for i in remaining if self.models[i] is None or model in self.models[i]]
+        eligible = eligible or remaining
+        # A node with the model in memory skips a load that can take seconds
+        warm = [
+            i for i in eligible
+            if self.nodes[i].loaded and model in self.nodes[i].loaded and self.in_flight[i] < self.max_in_flight
+        ]
+        eligible = warm or eligible
+        if self.strategy == "p2c" and len(eligible) > 2:
+            eligible = random.sample(eligible, 2)
+        low = min(self.in_flight[i] for i in eligible)
+        return random.choice([i for i in eligible if self.in_flight[i] == low])
+
+    def _acquire(self, index: int) -> bool:
+        if not self._slots[index].acquire(timeout=self.slot_timeout):
+            return False
+        with self._lock:
+            self.in_flight[index] += 1
+        return True
+
+    def _release(self, index: int):
+        with self._lock:
+            self.in_flight[index] -= 1
+        self._slots[index].release()
+
+    async def _aacquire(self, index: int) -> bool:
+        import asyncio
+
+        if self._async_slots is None:
+            self._async_slots = [asyncio.Semaphore(self.max_in_flight) for _ in self.nodes]
         try:
-            start = time.time()
-            response = requests.post(
-                f"{self.base_url}/chat/completions",
-                headers={
-                    "Authorization": f"Bearer {self.api_key}",
-                    "Content-Type": "application/json"
-                },
-                json={
-                    "model": model,
-                    "messages": [{"role": "user", "content": prompt}],
-                    "max_tokens": 1400
-                },
-                timeout=60
-            )
-            elapsed = time.time() - start
-            
-            if response.status_code != 200:
-                return {"error": f"HTTP {response.status_code}"}
-            
-            data = response.json()
-            return {
-                "provider": "perplexity",
-                "model": model,
-                "content": data["choices"][0]["message"]["content"],
-                "citations": data.get("citations", [])[:5],
-                "tokens": data.get("usage", {}).get("total_tokens", 0),
-                "elapsed_ms": int(elapsed * 1000),
-                "cost": 0.005
-            }
-        except Exception as e:
-            return {"error": str(e)}
+            await asyncio.wait_for(self._async_slots[index].acquire(), self.slot_timeout)
+        except asyncio.TimeoutError:
+            return False
+        self.in_flight[index] += 1
+        return True
+
+    def _arelease(self, index: int):
+        self.in_flight[index] -= 1
+        self._async_slots[index].release()
+
+    def generate(self, prompt: str, model: Optional[str] = None, **kwargs) -> Dict[str, Any]:
+        model = model or self.default_model
+        result: Dict[str, Any] = {"error": "No Ollama nodes available"}
+        tried: Set[int] = set()
+        index = self._pick(model, tried)
+        while index is not None:
+            tried.add(index)
+            if self._acquire(index):
+                try:
+                    result = self.nodes[index].generate(prompt, model=model, **kwargs)
+                finally:
+                    self._release(index)
+                if not result.get("error"):
+                    self.nodes[index].mark_loaded(model)
+                    result["node"] = self.nodes[index].url
+                    return result
+            index = self._pick(model, tried)
+        return result
+
+    async def agenerate(self, prompt: str, model: Optional[str] = None, **kwargs) -> Dict[str, Any]:
+        model = model or self.default_model
+        result: Dict[str, Any] = {"error": "No Ollama nodes available"}
+        tried: Set[int] = set()
+        index = self._pick(model, tried)
+        while index is not None:
+            tried.add(index)
+            if await self._aacquire(index):
+                try:
+                    result = await self.nodes[index].agenerate(prompt, model=model, **kwargs)
+                finally:
+                    self._arelease(index)
+                if not result.get("error"):
+                    self.nodes[index].mark_loaded(model)
+                    result["node"] = self.nodes[index].url
+                    return result
+            index = self._pick(model, tried)
+        return result
+
+    def stream(self, prompt: str, model: Optional[str] = None, info: Optional[Dict[str, Any]] = None, **kwargs) -> Iterator[str]:
+        model = model or self.default_model
+        error = "No Ollama nodes available"
+        tried: Set[int] = set()
+        index = self._pick(model, tried)
+        while index is not None:
+            tried.add(index)
+            if self._acquire(index):
+                try:
+                    chunks = self.nodes[index].stream(prompt, model=model, info=info, **kwargs)
+                    try:
+                        first = next(chunks, None)
+                    except ProviderError as e:
+                        error = str(e)
+                    else:
+                        self.nodes[index].mark_loaded(model)
+                        if first is not None:
+                            yield first
+                            yield from chunks
+                        return
+                finally:
+                    self._release(index)
+            index = self._pick(model, tried)
+        raise ProviderError(error)
+
+    async def astream(self, prompt: str, model: Optional[str] = None, info: Optional[Dict[str, Any]] = None, **kwargs) -> AsyncIterator[str]:
+        model = model or self.default_model
+        error = "No Ollama nodes available"
+        tried: Set[int] = set()
+        index = self._pick(model, tried)
+        while index is not None:
+            tried.add(index)
+            if await self._aacquire(index):
+                try:
+                    chunks = self.nodes[index].astream(prompt, model=model, info=info, **kwargs)
+                    try:
+                        first = await chunks.__anext__()
+                    except StopAsyncIteration:
+                        return
+                    except ProviderError as e:
+                        error = str(e)
+                    else:
+                        self.nodes[index].mark_loaded(model)
+                        yield first
+                        async for chunk in chunks:
+                            yield chunk
+                        return
+                finally:
+                    self._arelease(index)
+            index = self._pick(model, tried)
+        raise ProviderError(error)
+
+    def _merge_health(self, results: List[Dict[str, Any]]) -> Dict[str, Any]:
+        models: Set[str] = set()
+        for i, result in enumerate(results):
+            if result.get("healthy"):
+                self.models[i] = set(result.get("models", []))
+                models |= self.models[i]
+        return {
+            "healthy": any(r.get("healthy") for r in results),
+            "models": sorted(models),
+            "nodes": {node.url: r for node, r in zip(self.nodes, results)},
+            "loaded": {node.url: sorted(node.loaded) for node in self.nodes if node.loaded is not None},
+            "in_flight": list(self.in_flight)
+        }
+
+    def health_check(self) -> Dict[str, Any]:
+        """Check every node and refresh which models each one has and holds in memory."""
+        from concurrent.futures import ThreadPoolExecutor
+
+        def check(node: OllamaProvider) -> Dict[str, Any]:
+            result = node.health_check()
+            if result.get("healthy"):
+                node.loaded_models()
+            return result
+
+        # Nodes are probed side by side, so one dead node costs one timeout, not one each
+        with ThreadPoolExecutor(max_workers=len(self.nodes) or 1, thread_name_prefix="llm-router-probe") as executor:
+            results = list(executor.map(check, self.nodes))
+        return self._merge_health(results)
+
+    async def ahealth_check(self) -> Dict[str, Any]:
+        """Async twin of ``health_check``."""
+        import asyncio
+
+        results = list(await asyncio.gather(*(n.ahealth_check() for n in self.nodes)))
+        await asyncio.gather(*(n.aloaded_models() for n, r in zip(self.nodes, results) if r.get("healthy")))
+        return self._merge_health(results)
+
+    def preload(self, model: Optional[str] = None, keep_alive: Any = None) -> Dict[str, Any]:
+        """Load a model on every node that has it."""
+        model = model or self.default_model
+        results = {
+            node.url: node.preload(model, keep_alive)
+            for node, models in zip(self.nodes, self.models)
+            if models is None or model in models
+        }
+        return {"model": model, "loaded": any(r.get("loaded") for r in results.values()), "nodes": results}
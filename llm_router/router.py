@@ -1,11 +1,29 @@
 """Core routing logic for LLM requests."""
 
 import os
-from typing import Optional, Dict, Any, Tuple
-from .providers import OllamaProvider, NvidiaProvider, OpenRouterProvider, PerplexityProvider
-from .health import HealthChecker
+import threading
+import time
+from collections.abc import MutableMapping
+from functools import partial
+from typing import Optional, Dict, Any, Callable, Iterable, Iterator, List, Tuple, Union, TYPE_CHECKING
+from .providers import OllamaProvider, OllamaPool, NvidiaProvider, OpenRouterProvider, PerplexityProvider, ProviderError
+from .sessions import SessionPool
+from .cache import ResponseCache
+from .classify import LinearModel, TaskClassifier
+from .coalesce import SingleFlight
+from .cost import EXPECTED_OUTPUT_TOKENS, CostModel
+from .health import HealthChecker, HealthProber
+from .latency import LatencyTracker
+from .limits import RateLimiter
+from .metrics import Metrics, NULL_METRICS
+from .scheduler import ProviderQueue
+from .state import StateStore
+from .tokens import CONTEXT_MARGIN, LOCAL_LONG_CONTEXT, context_window, estimate_tokens, fits
 from .usage import UsageTracker
 
+if TYPE_CHECKING:
+    from concurrent.futures import ThreadPoolExecutor
+
 # Task to provider/model mapping
 TASK_ROUTING = {
     "code": ("ollama", "deepseek-coder:6.7b"),
@@ -22,35 +40,174 @@ TASK_ROUTING = {
     "search": ("perplexity", "sonar"),
 }
 
+# Tried in order after the task's primary provider
+FALLBACK_CHAIN = ["ollama_fallback", "openrouter"]
+
+
+class _LazyProviders(MutableMapping):
+    """Provider registry that builds each provider on first access.
+    
+    Membership and iteration only look at ids, so routing checks and
+    listings never build a provider that is not called.
+    """
+    
+    def __init__(self, factories: Dict[str, Callable[[], Any]], setup: Callable[[str, Any], None]):
+        self._factories = dict(factories)
+        self._built: Dict[str, Any] = {}
+        self._setup = setup
+        self._lock = threading.Lock()
+    
+    def __getitem__(self, provider_id: str) -> Any:
+        provider = self._built.get(provider_id)
+        if provider is None:
+            with self._lock:
+                provider = self._built.get(provider_id)
+                if provider is None:
+                    provider = self._factories[provider_id]()
+                    self._setup(provider_id, provider)
+                    self._built[provider_id] = provider
+        return provider
+    
+    def __setitem__(self, provider_id: str, provider: Any):
+        # Injected providers get the same router-wide settings as built ones
+        with self._lock:
+            self._setup(provider_id, provider)
+            self._factories[provider_id] = lambda: provider
+            self._built[provider_id] = provider
+    
+    def __delitem__(self, provider_id: str):
+        with self._lock:
+            del self._factories[provider_id]
+            self._built.pop(provider_id, None)
+    
+    def __contains__(self, provider_id: object) -> bool:
+        return provider_id in self._factories
+    
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self._factories))
+    
+    def __len__(self) -> int:
+        return len(self._factories)
+    
+    def built(self) -> List[str]:
+        """Ids of the providers constructed so far."""
+        return list(self._built)
+
 
 class Router:
     """Intelligent LLM router with automatic failover."""
     
     def __init__(self, config: Optional[Dict] = None):
         self.config = config or {}
-        self.health = HealthChecker()
-        self.usage = UsageTracker()
-        
-        # Initialize providers
-        self.providers = {
-            "ollama": OllamaProvider(
-                url=os.getenv("OLLAMA_PRIMARY_URL", "http://localhost:11434")
-            ),
-            "nvidia": NvidiaProvider(
-                api_key=os.getenv("NVIDIA_API_KEY", "")
-            ),
-            "openrouter": OpenRouterProvider(
-                api_key=os.getenv("OPENROUTER_API_KEY", "")
-            ),
-            "perplexity": PerplexityProvider(
-                api_key=os.getenv("PERPLEXITY_API_KEY", "")
-            ),
+        # {"breaker": {CircuitBreaker options}, "probe_interval": seconds, "ttl": seconds to reuse a probe}
+        health_config = self.config.get("health", {})
+        self.health = HealthChecker(breaker=health_config.get("breaker"), ttl=health_config.get("ttl", 10.0))
+        self.prober: Optional[HealthProber] = None
+        self.usage = UsageTracker(**self.config.get("usage", {}))
+        self.latency = LatencyTracker()
+        
+        # Opt-in hedging: {"percentile": 0.95, "min_samples": 20, "max_workers": 32}
+        self.hedge = self.config.get("hedge")
+        self._hedge_executor: Optional["ThreadPoolExecutor"] = None
+        
+        # task="auto": {"model_path": linear model JSON, "min_margin": 1.0, "default": "routine"}
+        classifier_config = dict(self.config.get("classifier") or {})
+        model_path = classifier_config.pop("model_path", None)
+        self.classifier = TaskClassifier(
+            linear=LinearModel.load(model_path) if model_path else None, **classifier_config
+        )
+        
+        # Extra or corrected context windows: {"llama3.1:8b": 131072}
+        self.context_windows = self.config.get("context_windows", {})
+        
+        # Opt-in latency-aware ordering of the fallback chain: {"ms_per_dollar": 100000}
+        self.adaptive = self.config.get("adaptive")
+        
+        # Prices in USD per million tokens: {"openrouter/openai/gpt-4o-mini": {"input": 0.15, "output": 0.6}}
+        self.costs = CostModel(self.config.get("prices"))
+        # Opt-in cheapest-first ordering: {"latency_slo_ms": 8000, "percentile": 0.95, "output_tokens": 300}
+        self.cost_routing = self.config.get("cost_routing")
+        
+        # Opt-in response cache: {"max_bytes": ..., "ttl": ..., "disk_path": ..., "bypass_tasks": [...]}
+        cache_config = dict(self.config.get("cache") or {})
+        self.cache_bypass = set(cache_config.pop("bypass_tasks", ["research", "web", "search"]))
+        self.cache: Optional[ResponseCache] = ResponseCache(**cache_config) if "cache" in self.config else None
+        
+        # Opt-in semantic cache: {"capacity": ..., "threshold": ..., "thresholds": {task: ...}, "embedder": ...}
+        self.semantic_cache = None
+        semantic_config = self.config.get("semantic_cache")
+        if semantic_config is not None:
+            from .semantic_cache import SemanticCache
+            semantic_config = dict(semantic_config)
+            self.semantic_bypass = set(semantic_config.pop("bypass_tasks", ["research", "web", "search"]))
+            self.semantic_cache = SemanticCache(**semantic_config)
+        
+        # Opt-in single-flight: identical concurrent calls share one request
+        self.coalescer: Optional[SingleFlight] = SingleFlight() if self.config.get("coalesce") else None
+        
+        # Keep-alive connections shared by all providers (and threads)
+        self.pool = SessionPool(**self.config.get("pool", {}))
+        
+        # Providers are built on first use; a CLI call only pays for the ones it touches
+        factories: Dict[str, Callable[[], Any]] = {
+            "ollama": partial(OllamaProvider, url=os.getenv("OLLAMA_PRIMARY_URL", "http://localhost:11434"), pool=self.pool),
+            "nvidia": partial(NvidiaProvider, api_key=os.getenv("NVIDIA_API_KEY", ""), pool=self.pool),
+            "openrouter": partial(OpenRouterProvider, api_key=os.getenv("OPENROUTER_API_KEY", ""), pool=self.pool),
+            "perplexity": partial(PerplexityProvider, api_key=os.getenv("PERPLEXITY_API_KEY", ""), pool=self.pool),
         }
         
-        # Fallback Ollama nodes
-        fallback_url = os.getenv("OLLAMA_FALLBACK_URL")
-        if fallback_url:
-            self.providers["ollama_fallback"] = OllamaProvider(url=fallback_url)
+        # Several Ollama nodes -> one load-balanced pool replaces primary/fallback
+        nodes = self.config.get("ollama_nodes") or [u for u in os.getenv("OLLAMA_NODES", "").split(",") if u.strip()]
+        if nodes:
+            factories["ollama"] = partial(
+                OllamaPool, [u.strip() for u in nodes], pool=self.pool, **self.config.get("ollama_pool", {})
+            )
+        else:
+            # Fallback Ollama nodes
+            fallback_url = os.getenv("OLLAMA_FALLBACK_URL")
+            if fallback_url:
+                factories["ollama_fallback"] = partial(OllamaProvider, url=fallback_url, pool=self.pool)
+        self.providers = _LazyProviders(factories, self._setup_provider)
+        
+        # Ollama model residency: {"keep_alive": {"fast": "1h", "default": "10m"}, "preload": ["fast", "code"]}
+        # Keys and preload entries are task or model names; preload=True loads every routed Ollama model
+        residency = self.config.get("ollama_models", {})
+        self._keep_alive = {self._ollama_model(name): value for name, value in residency.get("keep_alive", {}).items()}
+        
+        # Opt-in instrumentation: True or {"hooks": [...], "latency_buckets": ..., "token_buckets": ...}
+        metrics_config = self.config.get("metrics")
+        self.metrics = Metrics(**(metrics_config if isinstance(metrics_config, dict) else {})) if metrics_config else NULL_METRICS
+        
+        # Rate limits and daily budgets: {"nvidia": {"rpm": 40, "tpm": 100000, "daily_calls": 50}}
+        # plus an overall spend cap: "budget": {"daily_cost": 5.0}
+        self.limiter = RateLimiter(self.config.get("limits"), self.usage, budget=self.config.get("budget"))
+        for provider_id in self.providers:
+            self.limiter.configure(provider_id)
+        
+        # Per-provider caps on concurrent calls: {"openrouter": 16}
+        self.concurrency = self.config.get("concurrency", {})
+        # Opt-in bound on callers waiting for a capped provider: {"ollama": 32}. Beyond it the
+        # lowest-priority waiter is shed and fails over, possibly to a paid provider
+        self.queue_limits = self.config.get("queue_limits", {})
+        self._queues: Dict[str, Optional[ProviderQueue]] = {}
+        self._queues_lock = threading.Lock()
+        
+        # Opt-in: breakers, health, latency and hot cache entries from the last run (True or
+        # {"path": "~/.llm-router/state.json", "interval": 60, "max_age": 3600, "cache_entries": 256})
+        state_config = self.config.get("state")
+        self.state: Optional[StateStore] = None
+        if state_config:
+            self.state = StateStore(**(state_config if isinstance(state_config, dict) else {}))
+            self._restore_state()
+        
+        if "probe_interval" in health_config:
+            self.start_health_prober(health_config["probe_interval"])
+        
+        # Cold loads happen here, in the background, instead of on the first request
+        self._warmup: Optional[threading.Thread] = None
+        if residency.get("preload"):
+            self._warmup = threading.Thread(target=self.warm_up, name="llm-router-warmup", daemon=True)
+            self._warmup.start()
     
     def query(
         self,
@@ -58,67 +215,718 @@ class Router:
         task: str = "routine",
         image_url: Optional[str] = None,
         force_provider: Optional[str] = None,
-        cost_sensitive: bool = True
+        cost_sensitive: bool = True,
+        priority: str = "interactive",
+        deadline: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """Route and execute a query; ``task="auto"`` classifies the prompt.
+        
+        With ``cost_routing`` configured, ``cost_sensitive=False`` keeps the
+        static (or adaptive) order for this query. ``priority`` ("interactive",
+        "default" or "batch") orders waiting calls at capped providers, and a
+        ``deadline`` in seconds moves on to the next provider rather than
+        queue for one that cannot answer in time.
+        """
+        if task == "auto":
+            task = self.classifier.classify(prompt)
+        expires = time.monotonic() + deadline if deadline is not None else None
+        with self.metrics.span("query", task=task) as span:
+            # Force specific provider
+            if force_provider and force_provider in self.providers:
+                return self._call_provider(
+                    force_provider, prompt, image_url=image_url, task=task, priority=priority, expires=expires
+                )
+            
+            cached = self._semantic_lookup(task, prompt, image_url)
+            if cached:
+                return cached
+            
+            route = self._route(task, image_url, estimate_tokens(prompt), cost_sensitive)
+            for provider_id, model, image in route:
+                if self.hedge is not None:
+                    result = self._call_hedged(prompt, (provider_id, model, image), route, task, priority, expires)
+                else:
+                    result = self._call_provider(
+                        provider_id, prompt, model=model, image_url=image, task=task, priority=priority, expires=expires
+                    )
+                if not result.get("error"):
+                    self._semantic_store(task, prompt, image_url, result)
+                    return result
+                if expires is not None and time.monotonic() >= expires:
+                    span.set(error="Deadline exceeded")
+                    return {"error": "Deadline exceeded", "content": ""}
+            
+            span.set(error="All providers failed")
+            return {"error": "All providers failed", "content": ""}
+    
+    def query_many(
+        self,
+        prompts: Iterable[str],
+        task: str = "routine",
+        max_concurrency: int = 8,
+        ordered: bool = True,
+        **kwargs
+    ) -> Union[List[Dict[str, Any]], Iterator[Tuple[int, Dict[str, Any]]]]:
+        """Run ``query`` over many prompts concurrently.
+        
+        Each prompt gets the full routing and failover of ``query``; calls
+        per provider are further capped by the ``concurrency`` option, and
+        queue behind interactive traffic unless ``priority`` says otherwise.
+        Returns the results in prompt order, or with ``ordered=False`` an
+        iterator of ``(index, result)`` pairs as they complete.
+        """
+        kwargs.setdefault("priority", "batch")
+        results = self._query_iter(prompts, task, max_concurrency, kwargs)
+        if not ordered:
+            return results
+        collected = dict(results)
+        return [collected[i] for i in range(len(collected))]
+    
+    def _query_iter(
+        self, prompts: Iterable[str], task: str, max_concurrency: int, kwargs: Dict[str, Any]
+    ) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        def run(index: int, prompt: str) -> Tuple[int, Dict[str, Any]]:
+            try:
+                return index, self.query(prompt, task=task, **kwargs)
+            except Exception as e:
+                # One bad item must not sink the whole batch
+                return index, {"error": str(e), "content": ""}
+        
+        from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+        
+        # Submit lazily so huge (or generated) batches don't all sit in memory
+        with ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="llm-router-batch") as executor:
+            pending = set()
+            for index, prompt in enumerate(prompts):
+                pending.add(executor.submit(run, index, prompt))
+                if len(pending) >= 2 * max_concurrency:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield future.result()
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+    
+    def _queue(self, provider_id: str) -> Optional[ProviderQueue]:
+        """Priority queue capping concurrent calls to a provider, None if uncapped."""
+        if provider_id in self._queues:
+            return self._queues[provider_id]
+        with self._queues_lock:
+            if provider_id not in self._queues:
+                limit = self.concurrency.get(provider_id)
+                provider = self.providers.get(provider_id)
+                if limit is None and isinstance(provider, OllamaProvider):
+                    # Match the server's parallel request slots; more would just queue there
+                    limit = int(os.getenv("OLLAMA_NUM_PARALLEL", "4"))
+                elif limit is None and isinstance(provider, OllamaPool):
+                    # Every node's slots; past that, calls would wait on a node semaphore
+                    limit = len(provider.nodes) * provider.max_in_flight
+                self._queues[provider_id] = ProviderQueue(limit, self.queue_limits.get(provider_id)) if limit else None
+            return self._queues[provider_id]
+    
+    def _hedge_delay(self, provider_id: str) -> Optional[float]:
+        """Seconds to wait on a provider before hedging, None to never hedge."""
+        if self.latency.count(provider_id) < self.hedge.get("min_samples", 20):
+            return None
+        delay_ms = self.latency.percentile(provider_id, self.hedge.get("percentile", 0.95))
+        return max(delay_ms, self.hedge.get("min_delay_ms", 0)) / 1000
+    
+    def _call_hedged(
+        self,
+        prompt: str,
+        candidate: Tuple,
+        route: Iterator[Tuple],
+        task: Optional[str] = None,
+        priority: str = "interactive",
+        expires: Optional[float] = None
     ) -> Dict[str, Any]:
-        """Route and execute a query."""
+        """Call a candidate, racing the next one in ``route`` if it is slow.
+        
+        The first successful answer wins. A blocking call cannot be
+        interrupted, so the loser runs to completion in the background;
+        its usage is still recorded and its result is discarded.
+        """
+        provider_id, model, image = candidate
+        delay = self._hedge_delay(provider_id)
+        call = partial(self._call_provider, prompt=prompt, task=task, priority=priority, expires=expires)
+        if delay is None:
+            return call(provider_id, model=model, image_url=image)
         
-        # Force specific provider
+        from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, TimeoutError as FutureTimeout, wait
+        
+        if self._hedge_executor is None:
+            self._hedge_executor = ThreadPoolExecutor(
+                max_workers=self.hedge.get("max_workers", 32), thread_name_prefix="llm-router-hedge"
+            )
+        primary = self._hedge_executor.submit(call, provider_id, model=model, image_url=image)
+        try:
+            return primary.result(timeout=delay)
+        except FutureTimeout:
+            pass
+        
+        backup_candidate = next(route, None)
+        if backup_candidate is None:
+            return primary.result()
+        
+        backup_id, backup_model, backup_image = backup_candidate
+        backup = self._hedge_executor.submit(call, backup_id, model=backup_model, image_url=backup_image)
+        
+        pending = {primary, backup}
+        result: Dict[str, Any] = {}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            winner = next((f for f in done if not f.result().get("error")), None)
+            if winner is None:
+                result = next(iter(done)).result()
+                continue
+            
+            won_at = time.time()
+            for loser in (done - {winner}) | pending:
+                if loser is primary and loser in pending:
+                    # Time saved is how much longer the primary took than the hedge
+                    loser.add_done_callback(lambda f: self.usage.record_hedge(
+                        provider_id, wasted=1, saved_ms=int((time.time() - won_at) * 1000)
+                    ))
+                else:
+                    self.usage.record_hedge(provider_id, wasted=1)
+            if not (done - {winner}) and not pending:
+                self.usage.record_hedge(provider_id)
+            return winner.result()
+        
+        self.usage.record_hedge(provider_id)
+        return result
+    
+    def stream(
+        self,
+        prompt: str,
+        task: str = "routine",
+        image_url: Optional[str] = None,
+        force_provider: Optional[str] = None,
+        info: Optional[Dict[str, Any]] = None,
+        priority: str = "interactive",
+        deadline: Optional[float] = None
+    ) -> Iterator[str]:
+        """Route a query and yield the completion as it is generated.
+        
+        Fails over like ``query`` as long as the provider has not produced
+        its first chunk; later errors raise ProviderError. When done,
+        ``info`` (if given) holds provider, model, tokens and elapsed_ms.
+        Streams are scheduled like ``query`` calls (``priority``,
+        ``deadline``) and hold their provider slot until the generator is
+        exhausted or closed.
+        """
+        if task == "auto":
+            task = self.classifier.classify(prompt)
+        expires = time.monotonic() + deadline if deadline is not None else None
+        error = "All providers failed"
+        for provider_id, model, image in self._stream_candidates(prompt, task, image_url, force_provider):
+            queue, reason = self._admit(provider_id, model, priority, expires)
+            try:
+                if not reason:
+                    reason = self.limiter.acquire(provider_id)
+                if reason:
+                    self.health.release_trial(provider_id)
+                    if force_provider:
+                        error = reason
+                    continue
+                meta: Dict[str, Any] = {}
+                chunks = self.providers[provider_id].stream(
+                    prompt, model=model, image_url=image, info=meta, **self._output_budget(provider_id, model, prompt)
+                )
+                try:
+                    first = next(chunks)
+                except StopIteration:
+                    first = None
+                except ProviderError as e:
+                    self._handle_result(provider_id, {"error": str(e), "retry_after": e.retry_after})
+                    if force_provider:
+                        error = str(e)
+                    continue
+                
+                if first is not None:
+                    yield first
+                    yield from chunks
+                self._handle_result(provider_id, meta)
+                if info is not None:
+                    info.update(meta)
+                return
+            finally:
+                if queue is not None:
+                    queue.release()
+        
+        raise ProviderError(error)
+    
+    def _stream_candidates(self, prompt: str, task: str, image_url: Optional[str], force_provider: Optional[str]):
         if force_provider and force_provider in self.providers:
-            return self._call_provider(force_provider, prompt, image_url=image_url)
+            return [(force_provider, None, image_url)]
+        return (c for c in self._route(task, image_url, estimate_tokens(prompt)) if c[0] in self.providers)
+    
+    def _route(
+        self,
+        task: str,
+        image_url: Optional[str] = None,
+        prompt_tokens: int = 0,
+        cost_sensitive: bool = True
+    ) -> Iterator[Tuple[str, Optional[str], Optional[str]]]:
+        """Yield (provider_id, model, image_url) candidates in failover order.
         
+        Health is checked as each candidate is reached, so the sync and
+        async paths see the same chain.
+        """
         # Multimodal -> NVIDIA/Kimi
-        if image_url:
-            result = self._call_provider("nvidia", prompt, image_url=image_url)
-            if not result.get("error"):
-                return result
+        if image_url and self._admissible("nvidia", None, prompt_tokens):
+            yield "nvidia", None, image_url
         
         # Research tasks -> Perplexity
-        if task in ["research", "web", "search"]:
-            result = self._call_provider("perplexity", prompt)
-            if not result.get("error"):
-                return result
+        if (
+            task in ["research", "web", "search"]
+            and self._fits("perplexity", None, prompt_tokens)
+            and self._admissible("perplexity", None, prompt_tokens)
+        ):
+            yield "perplexity", None, None
         
         # Get task routing
+        with self.metrics.span("route", task=task):
+            candidates = self._candidates(task, prompt_tokens, cost_sensitive)
+        
+        # Check health as each candidate is reached
+        for candidate_id, candidate_model in candidates:
+            if candidate_id in self.providers and self._admissible(candidate_id, candidate_model, prompt_tokens):
+                yield candidate_id, candidate_model, None
+    
+    def _admissible(self, provider_id: str, model: Optional[str], prompt_tokens: int) -> bool:
+        """Whether a candidate is within its limits and budget (for this call's estimate) and healthy."""
+        cost = 0.0
+        if self.limiter.limits_cost(provider_id):
+            cost = self._estimate(provider_id, model, prompt_tokens)
+        # Over-budget providers are skipped before claiming a breaker trial
+        return self.limiter.check(provider_id, cost) is None and self.health.is_healthy(provider_id)
+    
+    def _candidates(self, task: str, prompt_tokens: int, cost_sensitive: bool = True) -> List[Tuple[str, Optional[str]]]:
+        """The task's (provider_id, model) chain, fitted to the prompt and ordered."""
         provider_id, model = TASK_ROUTING.get(task, ("ollama", "qwen2.5:3b"))
+        candidates = [(provider_id, model)] + [(fallback, None) for fallback in FALLBACK_CHAIN]
+        candidates = self._resident(self._fit(candidates, prompt_tokens))
+        if self.adaptive is not None:
+            candidates = self._rank(candidates)
+        if self.cost_routing is not None and cost_sensitive:
+            candidates = self._cheapest(candidates, prompt_tokens)
+        return candidates
+    
+    def _fits(self, provider_id: str, model: Optional[str], prompt_tokens: int) -> bool:
+        provider = self.providers.get(provider_id)
+        return provider is None or fits(model or provider.default_model, prompt_tokens, self.context_windows)
+    
+    def _fit(self, candidates: List[Tuple[str, Optional[str]]], prompt_tokens: int) -> List[Tuple[str, Optional[str]]]:
+        """Keep candidates whose model holds the prompt, moving Ollama up to a larger model.
         
-        # Check health and try primary
-        if self.health.is_healthy(provider_id):
-            result = self._call_provider(provider_id, prompt, model=model)
-            if not result.get("error"):
-                return result
+        If any candidate had to be dropped, NVIDIA's long-context model is
+        added as a last resort.
+        """
+        fitted = []
+        for pid, model in candidates:
+            if self._fits(pid, model, prompt_tokens):
+                fitted.append((pid, model))
+            elif isinstance(self.providers.get(pid), (OllamaProvider, OllamaPool)):
+                larger = next((m for m in LOCAL_LONG_CONTEXT if fits(m, prompt_tokens, self.context_windows)), None)
+                if larger:
+                    fitted.append((pid, larger))
+        dropped = len(fitted) < len(candidates)
+        if dropped and all(pid != "nvidia" for pid, _ in fitted) and self._fits("nvidia", None, prompt_tokens):
+            fitted.append(("nvidia", None))
+        return fitted
+    
+    def _resident(self, candidates: List[Tuple[str, Optional[str]]]) -> List[Tuple[str, Optional[str]]]:
+        """Move an Ollama fallback that holds the task's model ahead of a primary that doesn't.
         
-        # Fallback chain
-        for fallback in ["ollama_fallback", "openrouter"]:
-            if fallback in self.providers and self.health.is_healthy(fallback):
-                result = self._call_provider(fallback, prompt)
-                if not result.get("error"):
-                    return result
+        Only known residency counts: ``loaded`` is filled by preloads, answered
+        calls and ``loaded_models()`` (/api/ps), so a server not yet seen keeps
+        its place. OllamaPool tracks this per node itself.
+        """
+        primary_id, model = candidates[0] if candidates else (None, None)
+        primary = self.providers.get(primary_id)
+        if not isinstance(primary, OllamaProvider) or model is None or primary.loaded is None or model in primary.loaded:
+            return candidates
+        for i, (pid, m) in enumerate(candidates[1:], 1):
+            provider = self.providers.get(pid)
+            if m is None and isinstance(provider, OllamaProvider) and provider.loaded and model in provider.loaded:
+                return [(pid, model)] + candidates[:i] + candidates[i + 1:]
+        return candidates
+    
+    def _output_budget(self, provider_id: str, model: Optional[str], prompt: str) -> Dict[str, Any]:
+        """``max_tokens`` that keeps prompt plus answer inside the model's window."""
+        provider = self.providers[provider_id]
+        window = context_window(model or provider.default_model, self.context_windows)
+        if window is None:
+            return {}
+        remaining = window - estimate_tokens(prompt) - CONTEXT_MARGIN
+        return {"max_tokens": max(1, min(provider.max_output_tokens, remaining))}
+    
+    def _rank(self, candidates: List[Tuple[str, Optional[str]]]) -> List[Tuple[str, Optional[str]]]:
+        """Order candidates by expected latency plus a cost penalty.
+        
+        Ollama fallbacks get the task's model, so a less loaded node can
+        take the task outright. Candidates without latency data are scored
+        as the median of the others, and ties keep the static order.
+        """
+        primary_id, model = candidates[0]
+        if isinstance(self.providers.get(primary_id), OllamaProvider):
+            candidates = [
+                (pid, model if m is None and isinstance(self.providers.get(pid), OllamaProvider) else m)
+                for pid, m in candidates
+            ]
+        
+        ms_per_dollar = self.adaptive.get("ms_per_dollar", 100000)
+        expected = {}
+        for pid, m in candidates:
+            provider = self.providers.get(pid)
+            if provider is None:
+                continue
+            latency = self.latency.expected(pid, m or provider.default_model)
+            if latency is not None:
+                today = self.usage.get_today(pid)
+                cost_per_call = today["cost"] / today["calls"] if today["calls"] else 0
+                expected[pid] = latency + ms_per_dollar * cost_per_call
         
-        return {"error": "All providers failed", "content": ""}
+        if not expected:
+            return candidates
+        known = sorted(expected.values())
+        prior = known[len(known) // 2]
+        order = {c: rank for rank, c in enumerate(candidates)}
+        return sorted(candidates, key=lambda c: (expected.get(c[0], prior), order[c]))
+    
+    def _estimate(self, provider_id: str, model: Optional[str], prompt_tokens: int) -> float:
+        """Expected USD for a call, before making it."""
+        provider = self.providers[provider_id]
+        output_tokens = (self.cost_routing or {}).get("output_tokens", EXPECTED_OUTPUT_TOKENS)
+        return self.costs.estimate(provider.name, model or provider.default_model, prompt_tokens, output_tokens)
+    
+    def _cheapest(self, candidates: List[Tuple[str, Optional[str]]], prompt_tokens: int) -> List[Tuple[str, Optional[str]]]:
+        """Order candidates cheapest first among those meeting the latency SLO.
+        
+        A candidate meets the SLO when its observed latency at
+        ``percentile`` is within ``latency_slo_ms``; one without samples is
+        given the benefit of the doubt. The rest follow, cheapest first,
+        and ties keep the existing order.
+        """
+        slo = self.cost_routing.get("latency_slo_ms")
+        percentile = self.cost_routing.get("percentile", 0.95)
+        order = {c: rank for rank, c in enumerate(candidates)}
+        
+        def key(candidate: Tuple[str, Optional[str]]) -> Tuple[bool, float, int]:
+            pid, model = candidate
+            provider = self.providers.get(pid)
+            if provider is None:
+                return True, float("inf"), order[candidate]
+            model = model or provider.default_model
+            latency = None
+            if slo is not None:
+                latency = self.latency.percentile(pid, percentile, model)
+                if latency is None:
+                    latency = self.latency.percentile(pid, percentile)
+            misses = latency is not None and latency > slo
+            return misses, self._estimate(pid, model, prompt_tokens), order[candidate]
+        
+        return sorted(candidates, key=key)
+    
+    def estimate_cost(self, prompt: str, task: str = "routine") -> Dict[str, float]:
+        """Expected USD per candidate provider for a prompt, in routing order."""
+        if task == "auto":
+            task = self.classifier.classify(prompt)
+        prompt_tokens = estimate_tokens(prompt)
+        return {
+            pid: round(self._estimate(pid, model, prompt_tokens), 6)
+            for pid, model in self._candidates(task, prompt_tokens) if pid in self.providers
+        }
     
     def _call_provider(
         self, 
         provider_id: str, 
         prompt: str, 
         model: Optional[str] = None,
-        image_url: Optional[str] = None
+        image_url: Optional[str] = None,
+        task: Optional[str] = None,
+        priority: str = "interactive",
+        expires: Optional[float] = None
     ) -> Dict[str, Any]:
         """Call a specific provider."""
         provider = self.providers.get(provider_id)
         if not provider:
             return {"error": f"Unknown provider: {provider_id}"}
         
-        result = provider.generate(prompt, model=model, image_url=image_url)
+        cache_key = self._cache_key(provider_id, task, model, prompt, image_url)
+        if cache_key:
+            cached = self._cache_lookup(provider_id, cache_key)
+            if cached:
+                return cached
+        
+        invoke = partial(self._invoke, provider_id, prompt, model, image_url, cache_key, priority, expires)
+        if self.coalescer is None:
+            return invoke()
+        return self.coalescer.do(self._flight_key(provider_id, model, prompt, image_url), invoke)
+    
+    def _invoke(
+        self,
+        provider_id: str,
+        prompt: str,
+        model: Optional[str],
+        image_url: Optional[str],
+        cache_key: Optional[str],
+        priority: str = "interactive",
+        expires: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """Make the actual provider call, within its queue, rate limit and concurrency cap.
+        
+        Refusals come back as errors without counting against the breaker,
+        so the caller simply fails over to the next provider.
+        """
+        queue, reason = self._admit(provider_id, model, priority, expires)
+        if reason:
+            return self._refused(provider_id, reason)
+        try:
+            reason = self.limiter.acquire(provider_id)
+            if reason:
+                return self._refused(provider_id, reason)
+            
+            provider = self.providers[provider_id]
+            budget = self._output_budget(provider_id, model, prompt)
+            with self.metrics.span("attempt", provider=provider_id, model=model) as span:
+                result = provider.generate(prompt, model=model, image_url=image_url, **budget)
+                span.set(error=result.get("error"))
+        finally:
+            if queue is not None:
+                queue.release()
+        return self._handle_result(provider_id, result, cache_key)
+    
+    def _admit(
+        self, provider_id: str, model: Optional[str], priority: str, expires: Optional[float]
+    ) -> Tuple[Optional[ProviderQueue], Optional[str]]:
+        """Wait for a slot at a capped provider; returns (queue to release, refusal reason)."""
+        if expires is not None and time.monotonic() >= expires:
+            return None, "Deadline exceeded"
+        queue = self._queue(provider_id)
+        if queue is None:
+            return None, None
+        service_ms = self.latency.expected(provider_id, model) if expires is not None else None
+        waited = time.perf_counter()
+        reason = queue.acquire(priority, expires, service_ms)
+        if self.metrics.enabled:
+            self.metrics.observe_stage("queue", time.perf_counter() - waited, provider_id)
+        return (None, reason) if reason else (queue, None)
+    
+    def _refused(self, provider_id: str, reason: str) -> Dict[str, Any]:
+        """Error for a call turned away before it was made.
+        
+        ``_route`` may have claimed the provider's half-open breaker trial;
+        hand it back so the next call can take it instead of waiting out
+        ``trial_timeout``.
+        """
+        self.health.release_trial(provider_id)
+        return {"error": reason}
+    
+    def _flight_key(self, provider_id: str, model: Optional[str], prompt: str, image_url: Optional[str]) -> Tuple:
+        return provider_id, model or self.providers[provider_id].default_model, prompt, image_url
+    
+    def _cache_key(
+        self,
+        provider_id: str,
+        task: Optional[str],
+        model: Optional[str],
+        prompt: str,
+        image_url: Optional[str]
+    ) -> Optional[str]:
+        """Response cache key for a call, or None if it must not be cached."""
+        if self.cache is None or image_url or task in self.cache_bypass:
+            return None
+        model = model or self.providers[provider_id].default_model
+        return ResponseCache.make_key(task or "", provider_id, model, prompt)
+    
+    def _cache_lookup(self, provider_id: str, cache_key: str) -> Optional[Dict[str, Any]]:
+        result = self.cache.get(cache_key)
+        if result is not None:
+            result["cached"] = True
+            # Routing claimed the breaker's half-open trial for a call that won't be made
+            self.health.release_trial(provider_id)
+            self.usage.record_cache_hit(provider_id, result.get("tokens", 0), result.get("cost", 0))
+        return result
+    
+    def _semantic_lookup(self, task: str, prompt: str, image_url: Optional[str]) -> Optional[Dict[str, Any]]:
+        if self.semantic_cache is None or image_url or task in self.semantic_bypass:
+            return None
+        result = self.semantic_cache.lookup(task, prompt)
+        if result is not None:
+            result["cached"] = True
+            self.usage.record_cache_hit(result.get("provider", task), result.get("tokens", 0), result.get("cost", 0))
+        return result
+    
+    def _semantic_store(self, task: str, prompt: str, image_url: Optional[str], result: Dict[str, Any]):
+        if self.semantic_cache is None or image_url or task in self.semantic_bypass or result.get("cached"):
+            return
+        self.semantic_cache.store(task, prompt, result)
+    
+    def _handle_result(self, provider_id: str, result: Dict[str, Any], cache_key: Optional[str] = None) -> Dict[str, Any]:
+        """Bookkeeping shared by every provider call, sync or async."""
+        self._track_state()
+        self.limiter.record(provider_id, result)
+        error = result.get("error")
+        if error in ("Timeout", "Connection refused") or str(error).startswith("HTTP 5"):
+            self.health.record_failure(provider_id, error)
+        else:
+            # Any other answer, even an error, means the provider is reachable
+            self.health.record_success(provider_id)
         
-        if not result.get("error"):
-            self.usage.record(provider_id, result.get("tokens", 0), result.get("cost", 0))
+        self.metrics.observe_call(
+            provider_id, result.get("model"), result.get("elapsed_ms", 0) / 1000, result.get("tokens", 0), error
+        )
+        if not error:
+            with self.metrics.span("usage.record", provider=provider_id):
+                self.usage.record(provider_id, result.get("tokens", 0), result.get("cost", 0))
+            self.latency.record(provider_id, result.get("elapsed_ms", 0), model=result.get("model"))
+            provider = self.providers.get(provider_id)
+            if isinstance(provider, OllamaProvider) and result.get("model") and result["model"] not in (provider.loaded or ()):
+                provider.mark_loaded(result["model"])
+            if cache_key:
+                self.cache.put(cache_key, result)
         
         return result
     
-    def check_health(self) -> Dict[str, Any]:
-        """Check health of all providers."""
-        return {pid: self.health.check(pid, p) for pid, p in self.providers.items()}
+    def check_health(self, timeout: float = 10.0, max_age: Optional[float] = None) -> Dict[str, Any]:
+        """Check health of all providers concurrently.
+        
+        Results up to ``max_age`` seconds old (default: the checker's TTL)
+        are reused. Probes still running after ``timeout`` seconds are
+        reported as timed out and left to finish in the background.
+        """
+        self._track_state()
+        results: Dict[str, Dict[str, Any]] = {}
+        
+        def probe(provider_id: str, provider):
+            results[provider_id] = self.health.check(provider_id, provider, max_age)
+        
+        # Daemon threads, so a hung probe holds neither the caller nor interpreter exit
+        threads = [
+            threading.Thread(target=probe, args=(pid, p), name=f"llm-router-check-{pid}", daemon=True)
+            for pid, p in self.providers.items()
+        ]
+        for thread in threads:
+            thread.start()
+        deadline = time.monotonic() + timeout
+        for thread in threads:
+            thread.join(max(0.0, deadline - time.monotonic()))
+        timed_out = {"healthy": False, "error": f"Health check timed out after {timeout:g}s"}
+        return {pid: results.get(pid, timed_out) for pid in self.providers}
+    
+    def _track_state(self):
+        """Start saving state once there is something to save."""
+        if self.state is not None and not self.state.running:
+            self.state.start(self.export_state)
+    
+    def export_state(self) -> Dict[str, Any]:
+        """Runtime state worth keeping across restarts (see ``StateStore``)."""
+        state: Dict[str, Any] = {"health": self.health.export(), "latency": self.latency.export()}
+        if self.cache is not None and self.state is not None:
+            state["cache"] = self.cache.export(self.state.cache_entries, self.state.cache_bytes)
+        return state
+    
+    def _restore_state(self):
+        saved = self.state.load()
+        if saved is None:
+            return
+        self.health.restore(saved.get("health", {}), self.state.max_age)
+        self.latency.restore(saved.get("latency", []), self.state.latency_max_age)
+        if self.cache is not None:
+            self.cache.restore(saved.get("cache", []))
+    
+    def start_health_prober(self, interval: float = 30.0) -> HealthProber:
+        """Start checking provider health in the background."""
+        if self.prober is None:
+            self.prober = HealthProber(self.health, self.providers, interval=interval)
+            self.prober.start()
+        return self.prober
+    
+    def _setup_provider(self, provider_id: str, provider):
+        """Apply router-wide settings to a provider as it is built."""
+        provider.metrics = self.metrics
+        provider.costs = self.costs
+        if provider_id in ("ollama", "ollama_fallback"):
+            provider.keep_alive = self._keep_alive
+    
+    @staticmethod
+    def _ollama_model(name: str) -> str:
+        """The Ollama model for a task name, else ``name`` itself."""
+        provider_id, model = TASK_ROUTING.get(name, (None, None))
+        return model if provider_id == "ollama" else name
+    
+    def warm_up(self, models: Optional[List[str]] = None) -> Dict[str, Dict[str, Any]]:
+        """Load Ollama models into memory so first requests skip the load.
+        
+        ``models`` are task or model names; defaults to the configured
+        ``ollama_models["preload"]`` (True means every routed Ollama model).
+        """
+        if models is None:
+            preload = self.config.get("ollama_models", {}).get("preload")
+            if preload is True:
+                preload = [model for provider_id, model in TASK_ROUTING.values() if provider_id == "ollama"]
+            models = preload or []
+        results: Dict[str, Dict[str, Any]] = {}
+        for provider_id in ("ollama", "ollama_fallback"):
+            provider = self.providers.get(provider_id)
+            if provider is not None:
+                results[provider_id] = {
+                    model: provider.preload(model) for model in dict.fromkeys(map(self._ollama_model, models))
+                }
+        return results
     
     def get_usage(self) -> Dict[str, Any]:
         """Get usage statistics."""
         return self.usage.get_stats()
+    
+    def cache_stats(self) -> Dict[str, Any]:
+        """Get response cache counters (empty if caching is off)."""
+        return self.cache.stats() if self.cache else {}
+    
+    def semantic_cache_stats(self) -> Dict[str, Any]:
+        """Get semantic cache counters (empty if it is off)."""
+        return self.semantic_cache.stats() if self.semantic_cache else {}
+    
+    def latency_stats(self) -> Dict[str, Any]:
+        """Get EWMA/p50/p95 latency per provider and per provider/model."""
+        return self.latency.stats()
+    
+    def queue_stats(self) -> Dict[str, Any]:
+        """Get slots in use, queue depth, admissions and wait times per capped provider."""
+        return {pid: queue.stats() for pid, queue in list(self._queues.items()) if queue is not None}
+    
+    def coalesce_stats(self) -> Dict[str, Any]:
+        """Get single-flight counters (empty when coalescing is off)."""
+        return self.coalescer.stats() if self.coalescer else {}
+    
+    def metrics_stats(self) -> Dict[str, Any]:
+        """Get stage timings and per-provider/model histogram summaries."""
+        return self.metrics.snapshot()
+    
+    def metrics_text(self) -> str:
+        """Get all metrics in the Prometheus text format."""
+        return self.metrics.prometheus()
+    
+    def limit_stats(self) -> Dict[str, Any]:
+        """Get remaining rate-limit capacity and daily budgets per provider."""
+        return self.limiter.stats()
+    
+    def pool_stats(self) -> Dict[str, Any]:
+        """Get HTTP connection pool statistics per host."""
+        return self.pool.stats()
+    
+    def close(self):
+        """Flush usage and release pooled connections and background workers."""
+        if self.prober is not None:
+            self.prober.stop()
+        if self._hedge_executor is not None:
+            self._hedge_executor.shutdown(wait=False)
+        if self.state is not None:
+            self.state.close()
+        self.usage.close()
+        if self.cache:
+            self.cache.close()
+        self.pool.close()
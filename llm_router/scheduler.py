@@ -0,0 +1,212 @@
+"""Priority queues and admission control in front of provider calls."""
+
+import heapq
+import itertools
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from .latency import LatencySketch
+
+# Lower runs first; unknown names count as "default"
+PRIORITIES = {"interactive": 0, "default": 1, "batch": 2}
+_NAMES = {rank: name for name, rank in PRIORITIES.items()}
+
+
+class _AsyncSignal:
+    """``threading.Event``-like wake-up for a waiter on an event loop."""
+
+    __slots__ = ("loop", "future")
+
+    def __init__(self):
+        import asyncio
+
+        self.loop = asyncio.get_running_loop()
+        self.future = self.loop.create_future()
+
+    def set(self):
+        try:
+            self.loop.call_soon_threadsafe(self._set)
+        except RuntimeError:
+            pass  # loop already closed; nobody is waiting any more
+
+    def _set(self):
+        if not self.future.done():
+            self.future.set_result(None)
+
+
+class _Waiter:
+    __slots__ = ("priority", "seq", "event", "granted", "reason")
+
+    def __init__(self, priority: int, seq: int, event: Any):
+        self.priority = priority
+        self.seq = seq
+        self.event = event
+        self.granted = False
+        self.reason: Optional[str] = None
+
+    def __lt__(self, other: "_Waiter") -> bool:
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+
+class ProviderQueue:
+    """``capacity`` concurrent calls to one provider, with an optionally bounded priority queue.
+
+    A freed slot goes to the highest-priority waiter, first come first
+    served within a class. ``acquire`` turns a caller away (returning the
+    reason, like ``RateLimiter``) when its deadline cannot be met given
+    the queue ahead of it and the provider's typical call time. With a
+    ``max_queue``, a full queue sheds its lowest-priority, newest waiter
+    to make room for a more urgent caller; without one, callers wait
+    their turn as they would on a semaphore. Every successful
+    ``acquire`` must be paired with ``release``.
+    """
+
+    def __init__(self, capacity: int, max_queue: Optional[int] = None):
+        self.capacity = capacity
+        self.max_queue = max_queue
+        self.in_flight = 0
+        self._heap: List[_Waiter] = []
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self.queued = {rank: 0 for rank in _NAMES}
+        self.admitted = {rank: 0 for rank in _NAMES}
+        self.rejected = {rank: 0 for rank in _NAMES}
+        self.shed = {rank: 0 for rank in _NAMES}
+        self.max_depth = 0
+        self._waits = {rank: LatencySketch() for rank in _NAMES}
+
+    def acquire(self, priority: str = "default", expires: Optional[float] = None, service_ms: Optional[float] = None) -> Optional[str]:
+        """Take a slot, waiting in line if needed; returns the refusal reason, if any.
+
+        ``expires`` is the ``time.monotonic()`` by which the call must be
+        done, ``service_ms`` the expected duration of one call.
+        """
+        start = time.monotonic()
+        reason, waiter = self._enter(priority, expires, service_ms, threading.Event)
+        if waiter is None:
+            return reason
+        waiter.event.wait(self._timeout(expires, service_ms))
+        return self._settle(waiter, start)
+
+    async def aacquire(self, priority: str = "default", expires: Optional[float] = None, service_ms: Optional[float] = None) -> Optional[str]:
+        """``acquire`` for coroutines: waits without blocking the event loop.
+
+        ``expires`` is on the ``time.monotonic()`` clock, as for ``acquire``.
+        """
+        import asyncio
+
+        start = time.monotonic()
+        reason, waiter = self._enter(priority, expires, service_ms, _AsyncSignal)
+        if waiter is None:
+            return reason
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter.event.future), self._timeout(expires, service_ms))
+        except asyncio.TimeoutError:
+            pass
+        except asyncio.CancelledError:
+            # Leave the line, or pass on a slot granted in the meantime
+            with self._lock:
+                granted = waiter.granted
+                if not granted and waiter in self._heap:
+                    self._drop(waiter)
+            if granted:
+                self.release()
+            raise
+        return self._settle(waiter, start)
+
+    def _enter(self, priority: str, expires: Optional[float], service_ms: Optional[float], signal: Any):
+        """Take a free slot or join the line; returns (refusal reason, waiter to wait on)."""
+        rank = PRIORITIES.get(priority, PRIORITIES["default"])
+        start = time.monotonic()
+        with self._lock:
+            if self.in_flight < self.capacity and not self._heap:
+                self.in_flight += 1
+                self._admit(rank, 0.0)
+                return None, None
+
+            if expires is not None and service_ms is not None:
+                ahead = sum(1 for w in self._heap if w.priority <= rank)
+                # Slots free up about every service_ms / capacity; then the call itself runs
+                expected = (ahead + 1) * service_ms / self.capacity + service_ms
+                if start + expected / 1000 > expires:
+                    self.rejected[rank] += 1
+                    return "Queue wait would miss the deadline", None
+
+            if self.max_queue is not None and len(self._heap) >= self.max_queue:
+                worst = max(self._heap)
+                if worst.priority <= rank:
+                    self.rejected[rank] += 1
+                    return "Queue full", None
+                self._drop(worst)
+                worst.reason = "Shed from a full queue"
+                self.shed[worst.priority] += 1
+                worst.event.set()
+
+            waiter = _Waiter(rank, next(self._seq), signal())
+            heapq.heappush(self._heap, waiter)
+            self.queued[rank] += 1
+            self.max_depth = max(self.max_depth, len(self._heap))
+        return None, waiter
+
+    @staticmethod
+    def _timeout(expires: Optional[float], service_ms: Optional[float]) -> Optional[float]:
+        if expires is None:
+            return None
+        # Leave room for the call itself when its duration is known
+        return max(0.0, expires - time.monotonic() - (service_ms or 0) / 1000)
+
+    def _settle(self, waiter: _Waiter, start: float) -> Optional[str]:
+        """Outcome for a waiter that was woken or timed out."""
+        with self._lock:
+            if waiter.granted:
+                self._admit(waiter.priority, (time.monotonic() - start) * 1000)
+                return None
+            if waiter.reason is not None:
+                return waiter.reason
+            self._drop(waiter)
+            self.rejected[waiter.priority] += 1
+            return "Deadline exceeded in queue"
+
+    def release(self):
+        """Give a slot back, handing it to the next waiter if there is one."""
+        with self._lock:
+            if self._heap:
+                waiter = heapq.heappop(self._heap)
+                self.queued[waiter.priority] -= 1
+                waiter.granted = True
+                waiter.event.set()
+            else:
+                self.in_flight -= 1
+
+    def _admit(self, rank: int, wait_ms: float):
+        self.admitted[rank] += 1
+        self._waits[rank].add(wait_ms)
+
+    def _drop(self, waiter: _Waiter):
+        self._heap.remove(waiter)
+        heapq.heapify(self._heap)
+        self.queued[waiter.priority] -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Slots in use, queue depth and admission counters, with wait times per class."""
+        with self._lock:
+            classes = {}
+            for rank, name in _NAMES.items():
+                waits = self._waits[rank]
+                classes[name] = {
+                    "queued": self.queued[rank],
+                    "admitted": self.admitted[rank],
+                    "rejected": self.rejected[rank],
+                    "shed": self.shed[rank],
+                    "wait_p50_ms": round(waits.quantile(0.5) or 0, 1),
+                    "wait_p95_ms": round(waits.quantile(0.95) or 0, 1)
+                }
+            return {
+                "capacity": self.capacity,
+                "in_flight": self.in_flight,
+                "depth": len(self._heap),
+                "max_depth": self.max_depth,
+                "max_queue": self.max_queue,
+                "classes": classes
+            }
@@ -0,0 +1,146 @@
+"""Semantic cache: answer paraphrased prompts from earlier results.
+
+Requires NumPy (``pip install llm-router[semantic]``).
+"""
+
+import re
+import threading
+import time
+import zlib
+from typing import Dict, Any, List, Optional
+
+try:
+    import numpy as np
+except ImportError:  # semantic caching is optional
+    np = None
+
+_TOKEN = re.compile(r"\w+")
+
+# Code answers are sensitive to small wording changes, so match them tighter
+DEFAULT_THRESHOLDS = {
+    "code": 0.97,
+    "debug": 0.97,
+    "script": 0.97,
+}
+
+
+class HashingEmbedder:
+    """Deterministic feature-hashing embedder over word unigrams and bigrams.
+
+    Needs no model or network; any object with ``dim`` and ``embed(text)``
+    returning an L2-normalized float32 vector can replace it.
+    """
+
+    def __init__(self, dim: int = 256):
+        if np is None:
+            raise ImportError("Semantic caching requires numpy: pip install llm-router[semantic]")
+        self.dim = dim
+
+    def embed(self, text: str) -> "np.ndarray":
+        words = _TOKEN.findall(text.lower())
+        features = words + [a + " " + b for a, b in zip(words, words[1:])]
+        vec = np.zeros(self.dim, dtype=np.float32)
+        for feature in features:
+            h = zlib.crc32(feature.encode())
+            # Low bits pick the bucket, one high bit picks the sign
+            vec[h % self.dim] += 1.0 if h & 0x80000000 else -1.0
+        norm = float(np.linalg.norm(vec))
+        if norm:
+            vec /= norm
+        return vec
+
+
+class SemanticCache:
+    """Capacity-bounded cache matched by cosine similarity of prompt embeddings.
+
+    Embeddings live in one preallocated matrix so a lookup is a single
+    vectorized scan; when full, expired or least recently used slots are
+    reused.
+    """
+
+    def __init__(
+        self,
+        embedder=None,
+        capacity: int = 10000,
+        ttl: float = 3600,
+        threshold: float = 0.92,
+        thresholds: Optional[Dict[str, float]] = None
+    ):
+        if np is None:
+            raise ImportError("Semantic caching requires numpy: pip install llm-router[semantic]")
+        self.embedder = embedder or HashingEmbedder()
+        self.capacity = capacity
+        self.ttl = ttl
+        self.threshold = threshold
+        self.thresholds = {**DEFAULT_THRESHOLDS, **(thresholds or {})}
+        self._matrix = np.zeros((capacity, self.embedder.dim), dtype=np.float32)
+        self._tasks = np.full(capacity, -1, dtype=np.int32)
+        self._expires = np.zeros(capacity, dtype=np.float64)
+        self._last_used = np.zeros(capacity, dtype=np.float64)
+        self._results: List[Optional[Dict[str, Any]]] = [None] * capacity
+        self._task_ids: Dict[str, int] = {}
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _task_id(self, task: str) -> int:
+        task_id = self._task_ids.get(task)
+        if task_id is None:
+            task_id = self._task_ids[task] = len(self._task_ids)
+        return task_id
+
+    def lookup(self, task: str, prompt: str) -> Optional[Dict[str, Any]]:
+        """Return a copy of the closest cached result above the task's threshold."""
+        vec = self.embedder.embed(prompt)
+        now = time.time()
+        with self._lock:
+            n = self._size
+            task_id = self._task_ids.get(task)
+            if n == 0 or task_id is None:
+                self.misses += 1
+                return None
+            scores = self._matrix[:n] @ vec
+            valid = (self._tasks[:n] == task_id) & (self._expires[:n] > now)
+            scores[~valid] = -1.0
+            best = int(scores.argmax())
+            similarity = float(scores[best])
+            if similarity < self.thresholds.get(task, self.threshold):
+                self.misses += 1
+                return None
+            self._last_used[best] = now
+            self.hits += 1
+            result = dict(self._results[best])
+        result["similarity"] = round(similarity, 4)
+        return result
+
+    def store(self, task: str, prompt: str, result: Dict[str, Any]):
+        """Cache a successful result for a prompt."""
+        vec = self.embedder.embed(prompt)
+        now = time.time()
+        with self._lock:
+            if self._size < self.capacity:
+                slot = self._size
+                self._size += 1
+            else:
+                # Reuse an expired slot first, else the least recently used one
+                age = np.where(self._expires <= now, -np.inf, self._last_used)
+                slot = int(age.argmin())
+                self.evictions += 1
+            self._matrix[slot] = vec
+            self._tasks[slot] = self._task_id(task)
+            self._expires[slot] = now + self.ttl
+            self._last_used[slot] = now
+            self._results[slot] = dict(result)
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss/eviction counters and current size."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": self._size,
+                "capacity": self.capacity
+            }
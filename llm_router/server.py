@@ -0,0 +1,460 @@
+"""Long-running HTTP gateway in front of one shared Router.
+
+Speaks the OpenAI chat completions API (``/v1/chat/completions``,
+``/v1/models``) and the Ollama API (``/api/generate``, ``/api/chat``,
+``/api/tags``), plus ``/health`` and ``/metrics``. The model name picks
+the route: a task name (``code``, ``fast``, ..., or ``auto`` to classify
+the prompt) or a provider id forces that task or provider; anything else
+routes as ``routine``.
+"""
+
+import hmac
+import json
+import signal
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+from urllib.parse import urlsplit, parse_qs
+
+from .providers import ProviderError
+from .router import Router, TASK_ROUTING
+from .scheduler import PRIORITIES
+from .tokens import estimate_tokens
+
+
+def _text(content: Any) -> Tuple[str, Optional[str]]:
+    """Text and first image URL of an OpenAI message content (string or parts)."""
+    if isinstance(content, str):
+        return content, None
+    texts, image = [], None
+    for part in content or []:
+        if part.get("type") == "text":
+            texts.append(part.get("text", ""))
+        elif part.get("type") == "image_url" and image is None:
+            url = part.get("image_url")
+            image = url.get("url") if isinstance(url, dict) else url
+    return "\n".join(texts), image
+
+
+def _prompt(messages: List[Dict[str, Any]]) -> Tuple[str, Optional[str]]:
+    """Flatten chat messages into one prompt; a lone user message is passed as is."""
+    parts, image = [], None
+    for message in messages:
+        text, message_image = _text(message.get("content"))
+        image = image or message_image or (message.get("images") or [None])[0]
+        parts.append((message.get("role", "user"), text))
+    if len(parts) == 1 and parts[0][0] == "user":
+        return parts[0][1], image
+    return "\n\n".join(f"{role}: {text}" for role, text in parts), image
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    server_version = "llm-router"
+
+    def log_message(self, *args):
+        pass
+
+    @property
+    def gateway(self) -> "Gateway":
+        return self.server.gateway
+
+    # -- plumbing ---------------------------------------------------------
+
+    def _send_json(self, status: int, payload: Any):
+        self._send(status, json.dumps(payload).encode(), "application/json")
+
+    def _send(self, status: int, body: bytes, content_type: str):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _start_chunked(self, content_type: str):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Transfer-Encoding", "chunked")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+
+    def _chunk(self, data: bytes):
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+        self.wfile.flush()
+
+    def _end_chunked(self):
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+    def _body(self) -> Optional[Dict[str, Any]]:
+        length = self.headers.get("Content-Length")
+        if length is None:
+            self._send_json(411, {"error": {"message": "Content-Length required"}})
+            return None
+        try:
+            return json.loads(self.rfile.read(int(length)) or b"{}")
+        except ValueError:
+            self._send_json(400, {"error": {"message": "Invalid JSON body"}})
+            return None
+
+    def _authorized(self) -> bool:
+        if not self.gateway.api_key:
+            return True
+        # Constant-time comparison, so response timing doesn't leak the key
+        supplied = self.headers.get("Authorization", "").encode()
+        if hmac.compare_digest(supplied, f"Bearer {self.gateway.api_key}".encode()):
+            return True
+        self._send_json(401, {"error": {"message": "Invalid API key"}})
+        return False
+
+    def _route_args(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        model = body.get("model") or ""
+        providers = self.gateway.router.providers
+        return {
+            "task": body.get("task") or (model if model in TASK_ROUTING or model == "auto" else "routine"),
+            "force_provider": model if model in providers else None
+        }
+
+    def _queue_args(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        """Scheduling class and deadline (seconds) from the body or ``X-Priority``/``X-Deadline``."""
+        args: Dict[str, Any] = {}
+        priority = body.get("priority") or self.headers.get("X-Priority")
+        if priority in PRIORITIES:
+            args["priority"] = priority
+        deadline = body.get("deadline") or self.headers.get("X-Deadline")
+        if deadline is not None:
+            try:
+                args["deadline"] = float(deadline)
+            except (TypeError, ValueError):
+                pass
+        return args
+
+    def _models(self) -> List[str]:
+        return ["auto"] + sorted(TASK_ROUTING) + sorted(self.gateway.router.providers)
+
+    # -- dispatch ---------------------------------------------------------
+
+    def do_GET(self):
+        if not self._authorized():
+            return
+        url = urlsplit(self.path)
+        with self.gateway.tracking():
+            if url.path == "/health":
+                deep = parse_qs(url.query).get("deep", ["0"])[0] not in ("0", "")
+                self._send_json(200, self.gateway.health(deep))
+            elif url.path == "/metrics":
+                self._send(200, self.gateway.prometheus().encode(), "text/plain; version=0.0.4")
+            elif url.path == "/v1/models":
+                self._send_json(200, {
+                    "object": "list",
+                    "data": [{"id": m, "object": "model", "owned_by": "llm-router"} for m in self._models()]
+                })
+            elif url.path == "/api/tags":
+                self._send_json(200, {"models": [{"name": m, "model": m} for m in self._models()]})
+            else:
+                self._send_json(404, {"error": {"message": f"Unknown path: {url.path}"}})
+
+    def do_POST(self):
+        if not self._authorized():
+            return
+        path = urlsplit(self.path).path
+        handler = {
+            "/v1/chat/completions": self._chat_completions,
+            "/api/generate": self._ollama_generate,
+            "/api/chat": self._ollama_chat,
+        }.get(path)
+        if handler is None:
+            self._send_json(404, {"error": {"message": f"Unknown path: {path}"}})
+            return
+        body = self._body()
+        if body is None:
+            return
+        with self.gateway.tracking():
+            handler(body)
+
+    # -- OpenAI -----------------------------------------------------------
+
+    def _chat_completions(self, body: Dict[str, Any]):
+        prompt, image = _prompt(body.get("messages") or [])
+        args = self._route_args(body)
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        created = int(time.time())
+
+        if body.get("stream"):
+            info: Dict[str, Any] = {}
+            chunks = self.gateway.router.stream(prompt, image_url=image, info=info, **args, **self._queue_args(body))
+            first = self._first(chunks)
+            if first is None:
+                return
+
+            def event(delta: Dict[str, Any], finish: Optional[str] = None) -> bytes:
+                payload = {
+                    "id": completion_id,
+                    "object": "chat.completion.chunk",
+                    "created": created,
+                    "model": body.get("model", ""),
+                    "choices": [{"index": 0, "delta": delta, "finish_reason": finish}]
+                }
+                return b"data: " + json.dumps(payload).encode() + b"\n\n"
+
+            self._start_chunked("text/event-stream")
+            self._chunk(event({"role": "assistant", "content": first}))
+            try:
+                for text in chunks:
+                    self._chunk(event({"content": text}))
+                self._chunk(event({}, "stop"))
+            except ProviderError as e:
+                self._chunk(b"data: " + json.dumps({"error": {"message": str(e)}}).encode() + b"\n\n")
+            self._chunk(b"data: [DONE]\n\n")
+            self._end_chunked()
+            return
+
+        result = self.gateway.router.query(prompt, image_url=image, **args, **self._queue_args(body))
+        if result.get("error"):
+            self._send_json(502, {"error": {"message": result["error"], "type": "upstream_error"}})
+            return
+        tokens = result.get("tokens", 0)
+        # Results carry the total; the prompt's share is estimated, as for streams
+        prompt_tokens = min(tokens, estimate_tokens(prompt))
+        self._send_json(200, {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": created,
+            "model": result.get("model"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": result.get("content", "")},
+                "finish_reason": "stop"
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": tokens - prompt_tokens,
+                "total_tokens": tokens
+            },
+            "provider": result.get("provider")
+        })
+
+    def _first(self, chunks: Iterator[str]) -> Optional[str]:
+        """First chunk of a stream, or None after answering with an error."""
+        try:
+            return next(chunks, "")
+        except ProviderError as e:
+            self._send_json(502, {"error": {"message": str(e), "type": "upstream_error"}})
+            return None
+
+    # -- Ollama -----------------------------------------------------------
+
+    def _ollama(self, body: Dict[str, Any], prompt: str, image: Optional[str], chat: bool):
+        args = self._route_args(body)
+        model = body.get("model", "")
+
+        def message(text: str) -> Dict[str, Any]:
+            if chat:
+                return {"message": {"role": "assistant", "content": text}}
+            return {"response": text}
+
+        def final(info: Dict[str, Any]) -> Dict[str, Any]:
+            return {
+                "model": model,
+                "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                **message(""),
+                "done": True,
+                "eval_count": info.get("tokens", 0),
+                "total_duration": info.get("elapsed_ms", 0) * 1000000
+            }
+
+        # Ollama streams unless told otherwise
+        if body.get("stream", True):
+            info: Dict[str, Any] = {}
+            chunks = self.gateway.router.stream(prompt, image_url=image, info=info, **args, **self._queue_args(body))
+            first = self._first(chunks)
+            if first is None:
+                return
+            self._start_chunked("application/x-ndjson")
+            try:
+                if first:
+                    self._chunk(json.dumps({"model": model, **message(first), "done": False}).encode() + b"\n")
+                for text in chunks:
+                    self._chunk(json.dumps({"model": model, **message(text), "done": False}).encode() + b"\n")
+                self._chunk(json.dumps(final(info)).encode() + b"\n")
+            except ProviderError as e:
+                self._chunk(json.dumps({"error": str(e)}).encode() + b"\n")
+            self._end_chunked()
+            return
+
+        result = self.gateway.router.query(prompt, image_url=image, **args, **self._queue_args(body))
+        if result.get("error"):
+            self._send_json(502, {"error": result["error"]})
+            return
+        reply = final(result)
+        reply.update(message(result.get("content", "")))
+        self._send_json(200, reply)
+
+    def _ollama_generate(self, body: Dict[str, Any]):
+        images = body.get("images") or [None]
+        prompt = body.get("prompt", "")
+        if body.get("system"):
+            prompt = f"system: {body['system']}\n\nuser: {prompt}"
+        self._ollama(body, prompt, images[0], chat=False)
+
+    def _ollama_chat(self, body: Dict[str, Any]):
+        prompt, image = _prompt(body.get("messages") or [])
+        self._ollama(body, prompt, image, chat=True)
+
+
+class Gateway:
+    """Threaded HTTP server sharing one long-lived Router across connections.
+
+    ``close`` stops accepting connections, waits up to ``drain_timeout``
+    seconds for in-flight requests and then closes the router, flushing
+    usage.
+    """
+
+    def __init__(
+        self,
+        router: Optional[Router] = None,
+        host: str = "127.0.0.1",
+        port: int = 8080,
+        api_key: Optional[str] = None,
+        keepalive_timeout: float = 15.0
+    ):
+        self.router = router or Router()
+        self.api_key = api_key
+        # Idle keep-alive connections are dropped after keepalive_timeout
+        handler = type("_GatewayHandler", (_Handler,), {"timeout": keepalive_timeout})
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.httpd.daemon_threads = True
+        self.httpd.gateway = self
+        self.in_flight = 0
+        self._idle = threading.Condition()
+        self._closed = False
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def tracking(self) -> "_InFlight":
+        return _InFlight(self)
+
+    def health(self, deep: bool = False) -> Dict[str, Any]:
+        """Breaker states and last health results; ``deep`` probes providers now."""
+        router = self.router
+        status = router.check_health() if deep else router.health.get_all_status()
+        breakers = router.health.get_breakers()
+        available = [pid for pid in router.providers if breakers.get(pid, {}).get("state", "closed") != "open"]
+        return {
+            "status": "ok" if available else "degraded",
+            "providers": status,
+            "breakers": breakers,
+            "in_flight": self.in_flight
+        }
+
+    def prometheus(self) -> str:
+        """Router metrics plus breaker and usage gauges in Prometheus text format."""
+        states = {"closed": 0, "half_open": 1, "open": 2}
+        lines = [
+            "# HELP llm_router_breaker_state Circuit breaker state (0 closed, 1 half-open, 2 open).",
+            "# TYPE llm_router_breaker_state gauge",
+        ]
+        for pid, breaker in sorted(self.router.health.get_breakers().items()):
+            lines.append(f'llm_router_breaker_state{{provider="{pid}"}} {states[breaker["state"]]}')
+        for counter in ("calls", "tokens", "cost"):
+            lines.append(f"# HELP llm_router_usage_{counter}_today Usage so far today.")
+            lines.append(f"# TYPE llm_router_usage_{counter}_today gauge")
+            for pid in sorted(self.router.usage.get_stats()):
+                value = self.router.usage.get_today(pid).get(counter, 0)
+                lines.append(f'llm_router_usage_{counter}_today{{provider="{pid}"}} {value}')
+        queues = sorted(self.router.queue_stats().items())
+        lines.append("# HELP llm_router_queue_depth Calls waiting for a provider slot.")
+        lines.append("# TYPE llm_router_queue_depth gauge")
+        for pid, queue in queues:
+            for name, counts in queue["classes"].items():
+                lines.append(f'llm_router_queue_depth{{provider="{pid}",priority="{name}"}} {counts["queued"]}')
+        counters = (
+            ("admitted", "Calls given a provider slot"),
+            ("rejected", "Calls turned away by a full queue or a deadline"),
+            ("shed", "Queued calls dropped for more urgent ones"),
+        )
+        for counter, help_text in counters:
+            lines.append(f"# HELP llm_router_queue_{counter}_total {help_text}.")
+            lines.append(f"# TYPE llm_router_queue_{counter}_total counter")
+            for pid, queue in queues:
+                for name, counts in queue["classes"].items():
+                    lines.append(f'llm_router_queue_{counter}_total{{provider="{pid}",priority="{name}"}} {counts[counter]}')
+        lines.append("# HELP llm_router_gateway_in_flight Requests being served.")
+        lines.append("# TYPE llm_router_gateway_in_flight gauge")
+        lines.append(f"llm_router_gateway_in_flight {self.in_flight}")
+        return "\n".join(lines) + "\n" + self.router.metrics_text()
+
+    def serve_forever(self):
+        self.httpd.serve_forever()
+
+    def start(self) -> "Gateway":
+        """Serve in a background thread."""
+        threading.Thread(target=self.serve_forever, name="llm-router-gateway", daemon=True).start()
+        return self
+
+    def shutdown(self):
+        """Stop the serve loop (call from another thread than serve_forever)."""
+        self.httpd.shutdown()
+
+    def close(self, drain_timeout: float = 30.0):
+        """Stop accepting, drain in-flight requests, then flush and close the router."""
+        if self._closed:
+            return
+        self._closed = True
+        self.httpd.server_close()
+        deadline = time.monotonic() + drain_timeout
+        with self._idle:
+            while self.in_flight and time.monotonic() < deadline:
+                self._idle.wait(deadline - time.monotonic())
+        self.router.close()
+
+
+class _InFlight:
+    __slots__ = ("gateway",)
+
+    def __init__(self, gateway: Gateway):
+        self.gateway = gateway
+
+    def __enter__(self):
+        with self.gateway._idle:
+            self.gateway.in_flight += 1
+
+    def __exit__(self, *exc):
+        with self.gateway._idle:
+            self.gateway.in_flight -= 1
+            self.gateway._idle.notify_all()
+        return False
+
+
+def serve(
+    host: str = "127.0.0.1",
+    port: int = 8080,
+    config: Optional[Dict[str, Any]] = None,
+    api_key: Optional[str] = None
+):
+    """Run the gateway until SIGINT/SIGTERM, then shut down gracefully.
+
+    State persistence is on unless the config sets ``"state": False``.
+    """
+    config = dict(config or {})
+    config.setdefault("state", True)
+    gateway = Gateway(Router(config), host, port, api_key=api_key)
+
+    def stop(signum, frame):
+        # shutdown() blocks until serve_forever returns, so not from its own thread
+        threading.Thread(target=gateway.shutdown, daemon=True).start()
+
+    signal.signal(signal.SIGTERM, stop)
+    print(f"llm-router gateway listening on {gateway.url}")
+    try:
+        gateway.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        gateway.close()
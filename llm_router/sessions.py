@@ -0,0 +1,255 @@
+"""Pooled keep-alive HTTP sessions shared by providers."""
+
+import threading
+from functools import lru_cache
+from typing import Dict, Any, Optional, TYPE_CHECKING
+from urllib.parse import urlsplit
+
+# requests, urllib3 and httpx take ~150ms to import; they load on the first HTTP call
+if TYPE_CHECKING:
+    import httpx
+    import requests
+
+
+def _httpx():
+    """The httpx module; async support is optional."""
+    try:
+        import httpx
+    except ImportError:
+        raise ImportError("Async support requires httpx: pip install llm-router[async]") from None
+    return httpx
+
+
+@lru_cache(maxsize=None)
+def _reset_retry() -> type:
+    from urllib3.exceptions import ReadTimeoutError
+    from urllib3.util.retry import Retry
+
+    class _ResetRetry(Retry):
+        """Retry connection failures and resets, but never a read timeout.
+
+        A read timeout means the server is still working on the request, so
+        retrying it would only double the wait.
+        """
+
+        def increment(self, method=None, url=None, response=None, error=None, _pool=None, _stacktrace=None):
+            if isinstance(error, ReadTimeoutError):
+                raise error
+            return super().increment(method, url, response, error, _pool, _stacktrace)
+
+    return _ResetRetry
+
+
+class SessionPool:
+    """Thread-safe pool of keep-alive sessions, one per host."""
+
+    def __init__(
+        self,
+        pool_connections: int = 10,
+        pool_maxsize: int = 10,
+        host_pool_sizes: Optional[Dict[str, int]] = None,
+        max_retries: int = 2,
+        backoff_factor: float = 0.1
+    ):
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.host_pool_sizes = dict(host_pool_sizes or {})
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self._sessions: Dict[str, "requests.Session"] = {}
+        self._counters: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _host(url: str) -> str:
+        parts = urlsplit(url)
+        return f"{parts.scheme}://{parts.netloc}"
+
+    def _new_session(self, host: str) -> "requests.Session":
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        retry = _reset_retry()(
+            total=self.max_retries,
+            connect=self.max_retries,
+            read=self.max_retries,
+            status=0,
+            allowed_methods=None,
+            backoff_factor=self.backoff_factor,
+            raise_on_status=False
+        )
+        netloc = urlsplit(host).netloc
+        maxsize = self.host_pool_sizes.get(netloc, self.host_pool_sizes.get(host, self.pool_maxsize))
+        adapter = HTTPAdapter(
+            pool_connections=self.pool_connections,
+            pool_maxsize=maxsize,
+            max_retries=retry
+        )
+        session = requests.Session()
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
+    def session(self, url: str) -> "requests.Session":
+        """Get the shared session for the host of a URL."""
+        host = self._host(url)
+        session = self._sessions.get(host)
+        if session is None:
+            with self._lock:
+                session = self._sessions.get(host)
+                if session is None:
+                    session = self._new_session(host)
+                    self._sessions[host] = session
+                    self._counters[host] = {"requests": 0, "errors": 0}
+        return session
+
+    def request(self, method: str, url: str, **kwargs) -> "requests.Response":
+        """Send a request over the pooled session for its host."""
+        from requests.exceptions import RequestException
+
+        session = self.session(url)
+        try:
+            response = session.request(method, url, **kwargs)
+        except RequestException:
+            self._count(url, error=True)
+            raise
+        self._count(url)
+        return response
+
+    def _count(self, url: str, error: bool = False):
+        with self._lock:
+            counters = self._counters.setdefault(self._host(url), {"requests": 0, "errors": 0})
+            counters["requests"] += 1
+            if error:
+                counters["errors"] += 1
+
+    def get(self, url: str, **kwargs) -> "requests.Response":
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> "requests.Response":
+        return self.request("POST", url, **kwargs)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get per-host request counters and connection pool usage."""
+        with self._lock:
+            sessions = dict(self._sessions)
+            counters = {host: dict(c) for host, c in self._counters.items()}
+
+        result = {}
+        for host, session in sessions.items():
+            adapter = session.get_adapter(host)
+            connections = 0
+            idle = 0
+            for key in list(adapter.poolmanager.pools.keys()):
+                pool = adapter.poolmanager.pools.get(key)
+                if pool is None:
+                    continue
+                connections += pool.num_connections
+                if pool.pool is not None:
+                    idle += sum(1 for conn in list(pool.pool.queue) if conn is not None)
+            result[host] = {
+                **counters.get(host, {}),
+                "pool_maxsize": adapter._pool_maxsize,
+                "connections_opened": connections,
+                "idle_connections": idle
+            }
+        return result
+
+    def close(self):
+        """Close all sessions and their connections."""
+        with self._lock:
+            sessions = list(self._sessions.values())
+            self._sessions.clear()
+            self._counters.clear()
+        for session in sessions:
+            session.close()
+
+
+_default_pool: Optional[SessionPool] = None
+_default_lock = threading.Lock()
+
+
+def default_pool() -> SessionPool:
+    """Get the process-wide session pool used when none is configured."""
+    global _default_pool
+    if _default_pool is None:
+        with _default_lock:
+            if _default_pool is None:
+                _default_pool = SessionPool()
+    return _default_pool
+
+
+class AsyncSessionPool:
+    """Pool of keep-alive asyncio HTTP clients, one per host (needs httpx).
+
+    Takes the same options as SessionPool so both can share one config.
+    """
+
+    def __init__(
+        self,
+        pool_connections: int = 10,
+        pool_maxsize: int = 10,
+        host_pool_sizes: Optional[Dict[str, int]] = None,
+        max_retries: int = 2,
+        backoff_factor: float = 0.1
+    ):
+        self._httpx = _httpx()
+        self.pool_maxsize = pool_maxsize
+        self.host_pool_sizes = dict(host_pool_sizes or {})
+        self.max_retries = max_retries
+        self._clients: Dict[str, "httpx.AsyncClient"] = {}
+        self._counters: Dict[str, Dict[str, int]] = {}
+
+    def client(self, url: str) -> "httpx.AsyncClient":
+        """Get the shared client for the host of a URL."""
+        # Only touched from the event loop thread, so no lock is needed
+        host = SessionPool._host(url)
+        client = self._clients.get(host)
+        if client is None:
+            netloc = urlsplit(host).netloc
+            maxsize = self.host_pool_sizes.get(netloc, self.host_pool_sizes.get(host, self.pool_maxsize))
+            httpx = self._httpx
+            client = httpx.AsyncClient(
+                transport=httpx.AsyncHTTPTransport(
+                    retries=self.max_retries,
+                    limits=httpx.Limits(max_connections=maxsize, max_keepalive_connections=maxsize)
+                )
+            )
+            self._clients[host] = client
+            self._counters[host] = {"requests": 0, "errors": 0}
+        return client
+
+    async def request(self, method: str, url: str, timeout: Optional[float] = None, **kwargs) -> "httpx.Response":
+        """Send a request over the pooled client for its host."""
+        client = self.client(url)
+        counters = self._counters.setdefault(SessionPool._host(url), {"requests": 0, "errors": 0})
+        counters["requests"] += 1
+        try:
+            return await client.request(method, url, timeout=timeout, **kwargs)
+        except self._httpx.HTTPError:
+            counters["errors"] += 1
+            raise
+
+    def stream(self, method: str, url: str, timeout: Optional[float] = None, **kwargs):
+        """Open a streaming request; use as ``async with pool.stream(...)``."""
+        client = self.client(url)
+        counters = self._counters.setdefault(SessionPool._host(url), {"requests": 0, "errors": 0})
+        counters["requests"] += 1
+        return client.stream(method, url, timeout=timeout, **kwargs)
+
+    async def get(self, url: str, **kwargs) -> "httpx.Response":
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs) -> "httpx.Response":
+        return await self.request("POST", url, **kwargs)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get per-host request counters."""
+        return {host: dict(c) for host, c in self._counters.items()}
+
+    async def aclose(self):
+        """Close all clients and their connections."""
+        clients = list(self._clients.values())
+        self._clients.clear()
+        for client in clients:
+            await client.aclose()
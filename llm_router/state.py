@@ -0,0 +1,124 @@
+"""Warm runtime state kept across restarts.
+
+Breaker state, health check results, latency sketches and the hottest
+response cache entries are written to one compact JSON file, so a new
+process (or a one-shot CLI call) starts out routing like the last one
+left off instead of treating every provider as healthy and unmeasured.
+"""
+
+import json
+import os
+import threading
+import weakref
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Union
+
+# Bumped when the layout changes; other versions are ignored
+VERSION = 1
+
+
+class StateStore:
+    """Reads and periodically writes a state snapshot file.
+
+    Health entries older than ``max_age`` seconds and latency sketches
+    idle for ``latency_max_age`` are dropped on load; cache entries keep
+    their own expiry. Writes go to a temporary file that replaces the
+    snapshot, so a crash never leaves a torn file behind.
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path, None] = None,
+        interval: Optional[float] = 60.0,
+        max_age: float = 3600.0,
+        latency_max_age: float = 86400.0,
+        cache_entries: int = 256,
+        cache_bytes: int = 1024 * 1024
+    ):
+        self.path = Path(path).expanduser() if path else Path.home() / ".llm-router" / "state.json"
+        self.interval = interval
+        self.max_age = max_age
+        self.latency_max_age = latency_max_age
+        self.cache_entries = cache_entries
+        self.cache_bytes = cache_bytes
+        self.saves = 0
+        self._last: Optional[str] = None
+        self._capture: Optional[Callable[[], Optional[Callable[[], Dict[str, Any]]]]] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._finalizer: Optional[weakref.finalize] = None
+        self._lock = threading.Lock()
+
+    def load(self) -> Optional[Dict[str, Any]]:
+        """The saved snapshot, or None if missing, unreadable or from another version."""
+        try:
+            data = json.loads(self.path.read_bytes())
+        except (OSError, ValueError):
+            return None
+        if not isinstance(data, dict) or data.get("version") != VERSION:
+            return None
+        return data
+
+    def save(self, state: Dict[str, Any]) -> bool:
+        """Write a snapshot; returns False if it was unchanged or could not be written."""
+        text = json.dumps(dict(state, version=VERSION), separators=(",", ":"))
+        with self._lock:
+            if text == self._last:
+                return False
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                tmp = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+                tmp.write_text(text)
+                os.replace(tmp, self.path)
+            except OSError:
+                return False  # a missing snapshot only costs a cold start
+            self._last = text
+            self.saves += 1
+            return True
+
+    @property
+    def running(self) -> bool:
+        return self._capture is not None
+
+    def start(self, capture: Callable[[], Dict[str, Any]]):
+        """Save ``capture()`` every ``interval`` seconds and at interpreter exit.
+
+        A bound method is held weakly, so a router that is dropped without
+        ``close()`` can still be collected; it keeps its last periodic save.
+        """
+        with self._lock:
+            if self._capture is not None:
+                return
+            owner = getattr(capture, "__self__", None)
+            if owner is not None:
+                self._capture = weakref.WeakMethod(capture)
+            else:
+                self._capture = lambda: capture
+            # Also runs at exit, while the owner is still alive
+            self._finalizer = weakref.finalize(owner if owner is not None else capture, self.close)
+        if self.interval:
+            self._thread = threading.Thread(target=self._run, name="llm-router-state", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.flush()
+
+    def flush(self):
+        """Save the current state now."""
+        capture = self._capture() if self._capture is not None else None
+        if capture is not None:
+            try:
+                self.save(capture())
+            except Exception:
+                pass  # snapshots must never break routing
+
+    def close(self):
+        """Stop the periodic writer and save one last time."""
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+        self._thread = None
+        self.flush()
+        if self._finalizer is not None:
+            self._finalizer.detach()
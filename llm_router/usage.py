@@ -1,53 +1,346 @@
 """Usage tracking for LLM providers."""
 
 import json
+import os
+import queue
+import sys
+import threading
 import time
+import weakref
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, Tuple, Union
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process locking
+    fcntl = None
+
+# (provider_id, day, counter deltas)
+UsageRecord = Tuple[str, str, Dict[str, float]]
+
+
+def _apply(stats: Dict, provider_id: str, day: str, counters: Dict[str, float]):
+    """Add counter deltas into a {provider: {day: {counter: value}}} dict."""
+    days = stats.setdefault(provider_id, {})
+    bucket = days.get(day)
+    if bucket is None:
+        bucket = days[day] = {"calls": 0, "tokens": 0, "cost": 0}
+    for key, value in counters.items():
+        bucket[key] = bucket.get(key, 0) + value
+
+
+class UsageStore:
+    """Persistence backend for UsageTracker."""
+
+    def load(self) -> Dict:
+        """Return all persisted stats."""
+        raise NotImplementedError
+
+    def append(self, records: List[UsageRecord]):
+        """Persist a batch of counter deltas."""
+        raise NotImplementedError
+
+    def compact(self):
+        """Fold appended records into a compact form, if the store has one."""
+
+    def close(self):
+        pass
+
+
+class JsonlUsageStore(UsageStore):
+    """Append-only log of compact JSON lines next to a snapshot file.
+
+    Records are appended to ``<path>.log``; compaction folds the log into
+    the ``<path>`` snapshot (same format as the old usage.json) and
+    truncates it. A ``<path>.lock`` file serializes writers across
+    processes.
+    """
+
+    def __init__(self, path: Union[str, Path], compact_every: int = 1000):
+        self.path = Path(path)
+        self.log_path = self.path.with_name(self.path.name + ".log")
+        self.lock_path = self.path.with_name(self.path.name + ".lock")
+        self.compact_every = compact_every
+        self._since_compact = 0
+
+    @contextmanager
+    def _locked(self, exclusive: bool = True):
+        with open(self.lock_path, "a") as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _read(self) -> Dict:
+        stats: Dict = {}
+        if self.path.exists():
+            try:
+                stats = json.loads(self.path.read_text())
+            except Exception:
+                stats = {}
+        if self.log_path.exists():
+            with open(self.log_path, "rb") as log:
+                for line in log:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue  # torn write from a crashed process
+                    _apply(stats, record.pop("p"), record.pop("d"), record)
+        return stats
+
+    def load(self) -> Dict:
+        with self._locked(exclusive=False):
+            return self._read()
+
+    def append(self, records: List[UsageRecord]):
+        lines = "".join(
+            json.dumps({"p": pid, "d": day, **counters}, separators=(",", ":")) + "\n"
+            for pid, day, counters in records
+        )
+        with self._locked():
+            with open(self.log_path, "a") as log:
+                log.write(lines)
+
+        self._since_compact += len(records)
+        if self._since_compact >= self.compact_every:
+            self.compact()
+
+    def compact(self):
+        with self._locked():
+            stats = self._read()
+            tmp = self.path.with_name(self.path.name + ".tmp")
+            tmp.write_text(json.dumps(stats, separators=(",", ":")))
+            os.replace(tmp, self.path)
+            if self.log_path.exists():
+                os.truncate(self.log_path, 0)
+        self._since_compact = 0
+
+
+class SqliteUsageStore(UsageStore):
+    """SQLite-backed usage store; SQLite handles cross-process locking."""
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        import sqlite3
+
+        self._conn = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS usage ("
+            "provider TEXT, day TEXT, counter TEXT, value REAL, "
+            "PRIMARY KEY (provider, day, counter))"
+        )
+        self._conn.commit()
+
+    def load(self) -> Dict:
+        stats: Dict = {}
+        with self._lock:
+            rows = self._conn.execute("SELECT provider, day, counter, value FROM usage").fetchall()
+        for provider_id, day, counter, value in rows:
+            if counter != "cost" and float(value).is_integer():
+                value = int(value)
+            _apply(stats, provider_id, day, {counter: value})
+        return stats
+
+    def append(self, records: List[UsageRecord]):
+        rows = [
+            (pid, day, counter, value)
+            for pid, day, counters in records
+            for counter, value in counters.items()
+        ]
+        with self._lock:
+            with self._conn:
+                self._conn.executemany(
+                    "INSERT INTO usage (provider, day, counter, value) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT (provider, day, counter) DO UPDATE SET value = value + excluded.value",
+                    rows
+                )
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
 
 class UsageTracker:
-    """Tracks usage statistics for providers."""
-    
-    def __init__(self, storage_path: str = None):
+    """Tracks usage statistics for providers.
+
+    Counters are aggregated in memory, so reads never touch disk; writes
+    are queued and appended to the store by a background flusher. History
+    is loaded from the store on the first read, not at construction, so a
+    process that only records usage never parses it.
+    """
+
+    def __init__(
+        self,
+        storage_path: str = None,
+        store: Union[UsageStore, str, None] = None,
+        queue_size: int = 10000
+    ):
         self.storage_path = Path(storage_path or Path.home() / ".llm-router" / "usage.json")
         self.storage_path.parent.mkdir(parents=True, exist_ok=True)
-        self.stats: Dict[str, Dict] = self._load()
-    
+        if store is None or store == "jsonl":
+            store = JsonlUsageStore(self.storage_path)
+        elif store == "sqlite":
+            store = SqliteUsageStore(self.storage_path.with_suffix(".db"))
+        self.store: UsageStore = store
+        self._stats: Optional[Dict[str, Dict]] = None
+        self._lock = threading.Lock()
+        self._queue: "queue.Queue[Optional[UsageRecord]]" = queue.Queue(maxsize=queue_size)
+        self._flusher: Optional[threading.Thread] = None
+        self._finalizer: Optional[weakref.finalize] = None
+        self._closed = False
+
+    @property
+    def stats(self) -> Dict[str, Dict]:
+        """Counters by provider and day, loaded from the store on first access."""
+        if self._stats is None:
+            with self._lock:
+                if self._stats is None:
+                    # Records still queued must reach the store before it is read
+                    self.flush()
+                    self._stats = self._load()
+        return self._stats
+
+    @property
+    def loaded(self) -> bool:
+        """Whether history has been read from the store (reads no longer block)."""
+        return self._stats is not None
+
     def _load(self) -> Dict:
-        """Load stats from disk."""
-        if self.storage_path.exists():
-            try:
-                return json.loads(self.storage_path.read_text())
-            except Exception:
-                return {}
-        return {}
-    
-    def _save(self):
-        """Save stats to disk."""
-        self.storage_path.write_text(json.dumps(self.stats, indent=2))
-    
+        """Load stats from the store."""
+        try:
+            return self.store.load()
+        except Exception:
+            return {}
+
+    def _start_flusher(self):
+        with self._lock:
+            if self._flusher is None and not self._closed:
+                # The thread gets the queue and store, not the tracker, so a dropped
+                # tracker can still be collected; the finalizer also runs at exit
+                self._flusher = threading.Thread(
+                    target=_flush_loop, args=(self._queue, self.store), name="llm-router-usage", daemon=True
+                )
+                self._flusher.start()
+                self._finalizer = weakref.finalize(self, _stop_flusher, self._queue, self._flusher)
+
     def record(self, provider_id: str, tokens: int = 0, cost: float = 0):
         """Record usage for a provider."""
+        self._add(provider_id, calls=1, tokens=tokens, cost=cost)
+
+    def record_hedge(self, provider_id: str, wasted: int = 0, saved_ms: int = 0):
+        """Record a hedged call on a provider: discarded calls and time saved."""
+        self._add(provider_id, hedged=1, hedge_wasted=wasted, hedge_saved_ms=saved_ms)
+
+    def record_cache_hit(self, provider_id: str, tokens: int = 0, cost: float = 0):
+        """Record a call answered from cache and the tokens/cost it saved."""
+        self._add(provider_id, cache_hits=1, saved_tokens=tokens, saved_cost=cost)
+
+    def _add(self, provider_id: str, **counters):
         today = time.strftime("%Y-%m-%d")
-        
-        if provider_id not in self.stats:
-            self.stats[provider_id] = {}
-        if today not in self.stats[provider_id]:
-            self.stats[provider_id][today] = {"calls": 0, "tokens": 0, "cost": 0}
-        
-        self.stats[provider_id][today]["calls"] += 1
-        self.stats[provider_id][today]["tokens"] += tokens
-        self.stats[provider_id][today]["cost"] += cost
-        
-        self._save()
-    
+        if self._flusher is None:
+            self._start_flusher()
+
+        with self._lock:
+            # Until history is loaded the store alone holds the record
+            if self._stats is not None:
+                _apply(self._stats, provider_id, today, counters)
+            if not self._closed:
+                try:
+                    self._queue.put_nowait((provider_id, today, counters))
+                    return
+                except queue.Full:
+                    pass
+        # Closed, or the flusher fell behind: write this one here, outside the lock,
+        # which bounds memory without stalling readers. On an event loop, the
+        # locked file write goes to the default executor instead
+        loop = _running_loop()
+        if loop is not None:
+            loop.run_in_executor(None, self._append, (provider_id, today, counters))
+        else:
+            self._append((provider_id, today, counters))
+
+    def _append(self, record: UsageRecord):
+        try:
+            self.store.append([record])
+        except Exception:
+            pass  # usage accounting must never break routing
+
+    def flush(self):
+        """Wait until every queued record has been written."""
+        if self._flusher is not None:
+            self._queue.join()
+
+    def compact(self):
+        """Flush and fold the store's log into its snapshot."""
+        self.flush()
+        self.store.compact()
+
+    def close(self):
+        """Flush pending records and stop the flusher; later records are written directly."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        if self._finalizer is not None:
+            self._finalizer()
+
     def get_stats(self, provider_id: str = None) -> Dict[str, Any]:
         """Get usage statistics."""
         if provider_id:
             return self.stats.get(provider_id, {})
         return self.stats
-    
+
     def get_today(self, provider_id: str) -> Dict[str, Any]:
         """Get today's usage for a provider."""
         today = time.strftime("%Y-%m-%d")
         return self.stats.get(provider_id, {}).get(today, {"calls": 0, "tokens": 0, "cost": 0})
+
+    def spent_today(self) -> float:
+        """Today's cost across all providers."""
+        today = time.strftime("%Y-%m-%d")
+        return sum(days.get(today, {}).get("cost", 0) for days in list(self.stats.values()))
+
+
+def _running_loop():
+    """The event loop running in this thread, if any (without importing asyncio)."""
+    asyncio = sys.modules.get("asyncio")
+    if asyncio is None:
+        return None
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+
+def _flush_loop(records: "queue.Queue[Optional[UsageRecord]]", store: UsageStore):
+    while True:
+        # Whatever piles up while a batch is being written goes out in the next one
+        batch = [records.get()]
+        while True:
+            try:
+                batch.append(records.get_nowait())
+            except queue.Empty:
+                break
+
+        pending = [r for r in batch if r is not None]
+        try:
+            if pending:
+                store.append(pending)
+        except Exception:
+            pass  # usage accounting must never break routing
+        finally:
+            for _ in batch:
+                records.task_done()
+        if len(pending) < len(batch):
+            return
+
+
+def _stop_flusher(records: "queue.Queue[Optional[UsageRecord]]", flusher: threading.Thread):
+    records.put(None)
+    flusher.join()
@@ -24,6 +24,8 @@ setup(
         "python-dotenv>=0.19.0",
     ],
     extras_require={
+        "async": ["httpx>=0.24.0"],
+        "semantic": ["numpy>=1.20"],
         "dev": ["pytest", "pytest-cov", "black", "mypy"],
     },
     entry_points={
@@ -0,0 +1,74 @@
+"Shared fixtures for LLM Router tests."
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def _reply(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = json.loads(self.rfile.read(length) or b"{}") if length else {}
+        self.server.requests.append((self.command, self.path, body))
+        route = self.server.routes.get(self.path)
+        if route is None:
+            status, payload = 404, {"error": "not found"}
+        else:
+            status, payload = route(body) if callable(route) else route
+        if isinstance(payload, (bytes, str)):
+            data = payload if isinstance(payload, bytes) else payload.encode()
+            content_type = "application/x-ndjson"
+        else:
+            data = json.dumps(payload).encode()
+            content_type = "application/json"
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    do_GET = _reply
+    do_POST = _reply
+
+
+@pytest.fixture
+def make_server():
+    """Factory for local HTTP servers; set ``server.routes[path] = (status, payload)``."""
+    servers = []
+
+    def start():
+        server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        server.daemon_threads = True
+        server.routes = {}
+        server.requests = []
+        server.url = f"http://127.0.0.1:{server.server_address[1]}"
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.fixture
+def http_server(make_server):
+    """A single local HTTP server."""
+    return make_server()
+
+
+@pytest.fixture(autouse=True)
+def isolated_home(tmp_path, monkeypatch):
+    """Keep usage files and provider settings out of the real environment."""
+    monkeypatch.setenv("HOME", str(tmp_path))
+    for var in ("OLLAMA_PRIMARY_URL", "OLLAMA_FALLBACK_URL", "OLLAMA_NODES", "NVIDIA_API_KEY",
+                "OPENROUTER_API_KEY", "PERPLEXITY_API_KEY"):
+        monkeypatch.delenv(var, raising=False)
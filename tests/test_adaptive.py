@@ -0,0 +1,73 @@
+"Tests for latency statistics and adaptive routing."
+
+import random
+
+from llm_router import Router
+from llm_router.latency import LatencySketch, LatencyTracker
+
+
+class TestLatencySketch:
+    def test_quantiles_within_error(self):
+        sketch = LatencySketch()
+        rng = random.Random(1)
+        samples = sorted(rng.uniform(10, 1000) for _ in range(5000))
+        for ms in samples:
+            sketch.add(ms)
+        for q in (0.5, 0.95):
+            exact = samples[int(q * (len(samples) - 1))]
+            assert abs(sketch.quantile(q) - exact) / exact < 0.06
+
+    def test_fixed_memory(self):
+        sketch = LatencySketch(max_count=100)
+        for _ in range(1000):
+            sketch.add(50)
+        assert sketch.total <= 100
+        assert len(sketch.counts) == LatencySketch.BUCKETS
+
+    def test_ewma(self):
+        tracker = LatencyTracker()
+        tracker.record("ollama", 100, model="phi3:mini")
+        tracker.record("ollama", 200, model="phi3:mini")
+        assert tracker.expected("ollama", "phi3:mini") == 120
+        assert tracker.expected("ollama", "unknown-model") == 120
+        assert tracker.count("ollama", "phi3:mini") == 2
+
+
+class TestAdaptiveRouting:
+    def _router(self, make_server, monkeypatch, config):
+        primary, fallback = make_server(), make_server()
+        primary.routes["/api/generate"] = (200, {"response": "primary"})
+        fallback.routes["/api/generate"] = (200, {"response": "fallback"})
+        monkeypatch.setenv("OLLAMA_PRIMARY_URL", primary.url)
+        monkeypatch.setenv("OLLAMA_FALLBACK_URL", fallback.url)
+        return Router(config), fallback
+
+    def test_prefers_faster_node(self, make_server, monkeypatch):
+        router, fallback = self._router(make_server, monkeypatch, {"adaptive": {}})
+        router.latency.record("ollama", 900, model="phi3:mini")
+        router.latency.record("ollama_fallback", 100, model="phi3:mini")
+        result = router.query("hi", task="fast")
+        assert result["content"] == "fallback"
+        assert fallback.requests[0][2]["model"] == "phi3:mini"
+
+    def test_static_order_without_adaptive(self, make_server, monkeypatch):
+        router, _ = self._router(make_server, monkeypatch, {})
+        router.latency.record("ollama", 900, model="phi3:mini")
+        router.latency.record("ollama_fallback", 100, model="phi3:mini")
+        assert router.query("hi", task="fast")["content"] == "primary"
+
+    def test_unknown_primary_keeps_order(self, make_server, monkeypatch):
+        router, _ = self._router(make_server, monkeypatch, {"adaptive": {}})
+        router.latency.record("ollama_fallback", 100, model="phi3:mini")
+        assert router.query("hi", task="fast")["content"] == "primary"
+
+    def test_prefers_node_holding_the_model(self, make_server, monkeypatch):
+        router, fallback = self._router(make_server, monkeypatch, {})
+        router.providers["ollama"].loaded = {"qwen2.5:3b"}
+        router.providers["ollama_fallback"].loaded = {"phi3:mini"}
+        assert router.query("hi", task="fast")["content"] == "fallback"
+        assert fallback.requests[0][2]["model"] == "phi3:mini"
+
+        router.providers["ollama"].loaded = None
+        assert router.query("hi", task="fast")["content"] == "primary"
+        assert "phi3:mini" in router.providers["ollama"].loaded
@@ -0,0 +1,128 @@
+"Tests for the asyncio routing path."
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("httpx")
+
+from llm_router import AsyncRouter
+
+
+def _slow(delay, payload):
+    def route(body):
+        time.sleep(delay)
+        return 200, payload
+    return route
+
+
+class TestAsyncRouter:
+    def test_aquery(self, http_server, monkeypatch):
+        http_server.routes["/api/generate"] = (200, {"response": "hi"})
+        monkeypatch.setenv("OLLAMA_PRIMARY_URL", http_server.url)
+
+        async def run():
+            async with AsyncRouter() as router:
+                return await router.aquery("hello", task="fast")
+
+        result = asyncio.run(run())
+        assert result["content"] == "hi"
+        assert result["model"] == "phi3:mini"
+        assert http_server.requests[0][2]["model"] == "phi3:mini"
+
+    def test_failover(self, http_server, monkeypatch):
+        http_server.routes["/api/generate"] = (200, {"response": "fallback"})
+        monkeypatch.setenv("OLLAMA_PRIMARY_URL", "http://127.0.0.1:9")
+        monkeypatch.setenv("OLLAMA_FALLBACK_URL", http_server.url)
+
+        async def run():
+            async with AsyncRouter({"pool": {"max_retries": 0}}) as router:
+                return await router.aquery("hello")
+
+        result = asyncio.run(run())
+        assert result["content"] == "fallback"
+
+    def test_deadline_spans_chain(self, http_server, monkeypatch):
+        http_server.routes["/api/generate"] = _slow(1.0, {"response": "late"})
+        monkeypatch.setenv("OLLAMA_PRIMARY_URL", http_server.url)
+        monkeypatch.setenv("OLLAMA_FALLBACK_URL", http_server.url)
+
+        async def run():
+            async with AsyncRouter() as router:
+                return await router.aquery("hello", deadline=0.2)
+
+        start = time.monotonic()
+        result = asyncio.run(run())
+        assert result["error"] == "Deadline exceeded"
+        assert time.monotonic() - start < 0.9
+
+    def test_cancellation(self, http_server, monkeypatch):
+        http_server.routes["/api/generate"] = _slow(1.0, {"response": "late"})
+        monkeypatch.setenv("OLLAMA_PRIMARY_URL", http_server.url)
+
+        async def run():
+            async with AsyncRouter() as router:
+                task = asyncio.ensure_future(router.aquery("hello"))
+                await asyncio.sleep(0.1)
+                task.cancel()
+                with pytest.raises(asyncio.CancelledError):
+                    await task
+                assert router.get_usage() == {}
+
+        asyncio.run(run())
+
+    def test_prober_starts_on_the_running_loop(self, http_server, monkeypatch):
+        http_server.routes["/api/generate"] = (200, {"response": "hi"})
+        monkeypatch.setenv("OLLAMA_PRIMARY_URL", http_server.url)
+        router = AsyncRouter({"health": {"probe_interval": 60}, "state": False})
+        assert router.prober._task is None
+
+        async def run():
+            await router.aquery("hello")
+            task = router.prober._task
+            assert task.get_loop() is asyncio.get_running_loop()
+            await router.aclose()
+            return task
+
+        assert asyncio.run(run()).cancelled()
+
+    def test_astream_waits_for_a_slot(self, http_server, monkeypatch):
+        http_server.routes["/api/generate"] = _slow(0.05, '{"response": "hi", "done": false}\n{"done": true}\n')
+        monkeypatch.setenv("OLLAMA_PRIMARY_URL", http_server.url)
+
+        async def run():
+            async with AsyncRouter({"concurrency": {"ollama": 1}}) as router:
+                async def collect():
+                    return "".join([chunk async for chunk in router.astream("hi", force_provider="ollama")])
+                chunks = await asyncio.gather(*(collect() for _ in range(4)))
+                return chunks, router.queue_stats()["ollama"]
+
+        chunks, stats = asyncio.run(run())
+        assert chunks == ["hi"] * 4
+        assert stats["in_flight"] == 0
+        assert stats["max_depth"] >= 1
+
+    def test_blocking_bookkeeping_runs_off_the_loop(self, http_server, monkeypatch, tmp_path):
+        http_server.routes["/api/generate"] = (200, {"response": "hi"})
+        monkeypatch.setenv("OLLAMA_PRIMARY_URL", http_server.url)
+        threads = []
+
+        def recorded(func):
+            def call(*args):
+                threads.append((func.__name__, threading.current_thread()))
+                return func(*args)
+            return call
+
+        async def run():
+            async with AsyncRouter({"cache": {"disk_path": str(tmp_path / "cache.db")}}) as router:
+                for name in ("get", "put"):
+                    monkeypatch.setattr(router.cache.disk, name, recorded(getattr(router.cache.disk, name)))
+                monkeypatch.setattr(router.usage.store, "load", recorded(router.usage.store.load))
+                await router.aquery("hello", task="fast")
+                return (await router.aquery("hello", task="fast"))["cached"]
+
+        assert asyncio.run(run())
+        assert sorted(name for name, _ in threads) == ["get", "load", "put"]
+        assert all(thread is not threading.main_thread() for _, thread in threads)
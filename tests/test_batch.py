@@ -0,0 +1,66 @@
+"Tests for Router.query_many."
+
+import threading
+import time
+
+from llm_router import Router
+
+
+def _echo(peak, delay=0.05):
+    active = [0]
+    lock = threading.Lock()
+
+    def route(body):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(delay)
+        with lock:
+            active[0] -= 1
+        return 200, {"response": body["prompt"]}
+    return route
+
+
+class TestQueryMany:
+    def test_results_in_order(self, http_server, monkeypatch):
+        peak = [0]
+        http_server.routes["/api/generate"] = _echo(peak)
+        monkeypatch.setenv("OLLAMA_PRIMARY_URL", http_server.url)
+        router = Router()
+        prompts = [f"p{i}" for i in range(12)]
+        results = router.query_many(prompts, max_concurrency=6)
+        assert [r["content"] for r in results] == prompts
+        assert peak[0] > 1
+
+    def test_as_completed(self, http_server, monkeypatch):
+        http_server.routes["/api/generate"] = _echo([0])
+        monkeypatch.setenv("OLLAMA_PRIMARY_URL", http_server.url)
+        router = Router()
+        pairs = list(router.query_many((f"p{i}" for i in range(10)), ordered=False))
+        assert sorted(i for i, _ in pairs) == list(range(10))
+        assert all(r["content"] == f"p{i}" for i, r in pairs)
+
+    def test_caps_ollama_at_parallel_slots(self, http_server, monkeypatch):
+        peak = [0]
+        http_server.routes["/api/generate"] = _echo(peak)
+        monkeypatch.setenv("OLLAMA_PRIMARY_URL", http_server.url)
+        monkeypatch.setenv("OLLAMA_NUM_PARALLEL", "2")
+        router = Router()
+        router.query_many(["x"] * 10, max_concurrency=8)
+        assert peak[0] == 2
+
+    def test_concurrency_option(self, http_server, monkeypatch):
+        peak = [0]
+        http_server.routes["/api/generate"] = _echo(peak)
+        monkeypatch.setenv("OLLAMA_PRIMARY_URL", http_server.url)
+        router = Router({"concurrency": {"ollama": 1}})
+        router.query_many(["x"] * 4)
+        assert peak[0] == 1
+
+    def test_fails_over_per_item(self, http_server, monkeypatch):
+        http_server.routes["/api/generate"] = _echo([0], delay=0)
+        monkeypatch.setenv("OLLAMA_PRIMARY_URL", "http://127.0.0.1:9")
+        monkeypatch.setenv("OLLAMA_FALLBACK_URL", http_server.url)
+        router = Router({"pool": {"max_retries": 0}})
+        results = router.query_many(["a", "b", "c"])
+        assert [r["content"] for r in results] == ["a", "b", "c"]
@@ -0,0 +1,77 @@
+"Tests for the response cache."
+
+import time
+
+from llm_router import Router
+from llm_router.cache import ResponseCache
+
+
+class TestResponseCache:
+    def test_ttl(self):
+        cache = ResponseCache(ttl=0.05)
+        cache.put("k", {"content": "x"})
+        assert cache.get("k")["content"] == "x"
+        time.sleep(0.1)
+        assert cache.get("k") is None
+        assert cache.stats()["misses"] == 1
+
+    def test_lru_byte_bound(self):
+        cache = ResponseCache(max_bytes=60)
+        cache.put("a", {"content": "a" * 10})
+        cache.put("b", {"content": "b" * 10})
+        cache.get("a")
+        cache.put("c", {"content": "c" * 10})
+        assert cache.get("b") is None
+        assert cache.get("a") is not None
+        assert cache.stats()["evictions"] == 1
+        assert cache.stats()["bytes"] <= 60
+
+    def test_disk_tier(self, tmp_path):
+        path = str(tmp_path / "cache.db")
+        ResponseCache(disk_path=path).put("k", {"content": "persisted"})
+        cache = ResponseCache(disk_path=path)
+        assert cache.get("k")["content"] == "persisted"
+        assert cache.stats()["disk_hits"] == 1
+
+
+class TestRouterCache:
+    def test_hit_skips_provider(self, http_server, monkeypatch):
+        http_server.routes["/api/generate"] = (200, {"response": "hi"})
+        monkeypatch.setenv("OLLAMA_PRIMARY_URL", http_server.url)
+        router = Router({"cache": {}})
+        first = router.query("hello", task="fast")
+        second = router.query("hello", task="fast")
+        assert second["content"] == first["content"]
+        assert second["cached"] is True
+        assert len(http_server.requests) == 1
+        today = router.usage.get_today("ollama")
+        assert today["calls"] == 1
+        assert today["cache_hits"] == 1
+        assert router.cache_stats()["hits"] == 1
+
+    def test_key_includes_task(self, http_server, monkeypatch):
+        http_server.routes["/api/generate"] = (200, {"response": "hi"})
+        monkeypatch.setenv("OLLAMA_PRIMARY_URL", http_server.url)
+        router = Router({"cache": {}})
+        router.query("hello", task="fast")
+        router.query("hello", task="code")
+        assert len(http_server.requests) == 2
+
+    def test_bypass_tasks(self, http_server, monkeypatch):
+        http_server.routes["/api/generate"] = (200, {"response": "hi"})
+        monkeypatch.setenv("OLLAMA_PRIMARY_URL", http_server.url)
+        router = Router({"cache": {"bypass_tasks": ["fast"]}})
+        router.query("hello", task="fast")
+        router.query("hello", task="fast")
+        assert len(http_server.requests) == 2
+
+    def test_hit_hands_back_half_open_trial(self, http_server, monkeypatch):
+        http_server.routes["/api/generate"] = (200, {"response": "hi"})
+        monkeypatch.setenv("OLLAMA_PRIMARY_URL", http_server.url)
+        router = Router({"cache": {}, "health": {"breaker": {"base_backoff": 0}}})
+        router.query("hello", task="fast")
+        breaker = router.health.breaker("ollama")
+        breaker.trip("Connection refused")
+
+        assert router.query("hello", task="fast")["cached"] is True
+        assert breaker.allow()
@@ -0,0 +1,100 @@
+"Tests for task=\"auto\" prompt classification."
+
+import time
+
+from llm_router import Router
+from llm_router.classify import LinearModel, TaskClassifier
+
+# Labelled prompts the keyword matcher must keep getting right
+LABELLED = [
+    ("Write a Python function that merges two sorted lists", "code"),
+    ("Implement a binary search tree class in Rust", "code"),
+    ("Refactor this code to use async/await:\n```js\nfetch(url).then(r => r.json())\n```", "code"),
+    ("def parse(line):\n    return line.split(',')\nAdd type hints", "code"),
+    ("Write a SQL query that returns the top 5 customers by revenue", "code"),
+    ("Write a bash shell script that backs up /etc nightly", "code"),
+    ("How do I center a div with CSS?", "code"),
+    ("Write unit tests for the tokenizer module", "code"),
+    ("Traceback (most recent call last):\n  File \"app.py\", line 3\nKeyError: 'id'", "debug"),
+    ("My build fails with error: undefined reference to `main`", "debug"),
+    ("Why does this loop never terminate? It doesn't work when n is 0", "debug"),
+    ("Getting a NullPointerException in my Java service", "debug"),
+    ("Help me debug a segfault in my C program", "debug"),
+    ("Fix this: TypeError: 'NoneType' object is not subscriptable", "debug"),
+    ("What is the latest news on the Mars sample return mission?", "research"),
+    ("Who won the 2024 European Championship?", "research"),
+    ("What is the current stock price of Nvidia?", "research"),
+    ("Find sources on microplastics in drinking water", "research"),
+    ("What happened in AI research this week?", "research"),
+    ("What's the weather in Lisbon today?", "research"),
+    ("Search the web for reviews of the Framework laptop", "research"),
+    ("Explain how public-key cryptography works", "reasoning"),
+    ("Compare the pros and cons of microservices and monoliths", "reasoning"),
+    ("Why do ships float even though steel is denser than water?", "reasoning"),
+    ("Analyze the trade-offs of remote work for junior employees", "reasoning"),
+    ("Prove that the square root of 2 is irrational", "reasoning"),
+    ("Walk me through this logic puzzle step by step", "reasoning"),
+    ("Evaluate the implications of a four-day work week", "reasoning"),
+    ("hi", "fast"),
+    ("Hello there!", "fast"),
+    ("thanks, that helped", "fast"),
+    ("Define entropy", "fast"),
+    ("What is the capital of Australia?", "fast"),
+    ("Translate 'good morning' into French", "fast"),
+    ("Convert 5 miles to kilometers", "fast"),
+    ("Synonyms for happy", "fast"),
+    ("What is 17 times 23?", "fast"),
+    ("Write a short poem about autumn leaves falling on a quiet lake at dusk", "routine"),
+    ("Draft a friendly email to my landlord asking to renew the lease for another year", "routine"),
+    ("Give me a recipe for a vegetarian lasagna that serves six people and freezes well", "routine"),
+    ("Summarize the following meeting notes into three bullet points for the team", "routine"),
+]
+
+
+class TestTaskClassifier:
+    def test_accuracy(self):
+        classifier = TaskClassifier()
+        misses = [(p, want, classifier.classify(p)) for p, want in LABELLED if classifier.classify(p) != want]
+        assert len(misses) <= len(LABELLED) // 10, misses
+
+    def test_under_100_microseconds(self):
+        classifier = TaskClassifier()
+        prompts = [p for p, _ in LABELLED] + ["lorem ipsum " * 5000]
+        classifier.classify(prompts[0])
+        start = time.perf_counter()
+        for _ in range(20):
+            for prompt in prompts:
+                classifier.classify(prompt)
+        assert (time.perf_counter() - start) / (20 * len(prompts)) < 0.0001
+
+    def test_linear_fallback(self, tmp_path):
+        examples = [
+            ("draft a cover letter for a nursing job", "routine"),
+            ("write a birthday note for my aunt", "routine"),
+            ("roses are red, give me a limerick", "creative"),
+            ("a sonnet about the sea and a limerick", "creative"),
+        ] * 3
+        model = LinearModel.train(examples, dim=256)
+        assert model.predict("one more limerick please")[0] == "creative"
+
+        path = tmp_path / "model.json"
+        model.save(path)
+        classifier = TaskClassifier(LinearModel.load(path), min_margin=0.5)
+        assert classifier.classify("a limerick about cats, rhyming and silly, with four lines at least") == "creative"
+        # Keywords still win over the model
+        assert classifier.classify("Write a Python function for limericks") == "code"
+
+
+class TestAutoRouting:
+    def test_query_auto(self, http_server, monkeypatch):
+        http_server.routes["/api/generate"] = (200, {"response": "ok"})
+        monkeypatch.setenv("OLLAMA_PRIMARY_URL", http_server.url)
+        router = Router()
+        router.query("Write a Python function that reverses a string", task="auto")
+        assert http_server.requests[-1][2]["model"] == "deepseek-coder:6.7b"
+        router.query("hi", task="auto")
+        assert http_server.requests[-1][2]["model"] == "phi3:mini"
+
+    def test_classifier_config(self, tmp_path):
+        router = Router({"classifier": {"default": "reasoning"}})
+        assert router.classifier.classify("Tell me a long story about a dragon and a knight in a castle") == "reasoning"
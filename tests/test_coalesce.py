@@ -0,0 +1,109 @@
+"Tests for single-flight request coalescing."
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from llm_router import Router
+from llm_router.coalesce import SingleFlight
+
+
+def _slow(delay, payload):
+    def route(body):
+        time.sleep(delay)
+        return 200, payload
+    return route
+
+
+class TestSingleFlight:
+    def test_followers_share_result(self):
+        flight = SingleFlight()
+        calls = []
+
+        def fn():
+            calls.append(1)
+            time.sleep(0.1)
+            return {"content": "x"}
+
+        with ThreadPoolExecutor(5) as executor:
+            results = list(executor.map(lambda _: flight.do("k", fn), range(5)))
+        assert len(calls) == 1
+        assert [r["content"] for r in results] == ["x"] * 5
+        assert sum(bool(r.get("coalesced")) for r in results) == 4
+        assert flight.stats() == {"calls": 1, "coalesced": 4, "in_flight": 0}
+
+    def test_follower_retries_after_leader_fails(self):
+        flight = SingleFlight()
+        started = threading.Event()
+
+        def boom():
+            started.set()
+            time.sleep(0.05)
+            raise RuntimeError("boom")
+
+        with ThreadPoolExecutor(1) as executor:
+            leader = executor.submit(flight.do, "k", boom)
+            started.wait()
+            assert flight.do("k", lambda: {"content": "own"}) == {"content": "own"}
+            with pytest.raises(RuntimeError):
+                leader.result()
+
+    def test_async_leader_cancelled(self):
+        async def run():
+            flight = SingleFlight()
+
+            async def slow():
+                await asyncio.sleep(1)
+                return {"content": "never"}
+
+            async def fast():
+                return {"content": "own"}
+
+            leader = asyncio.ensure_future(flight.ado("k", slow))
+            await asyncio.sleep(0)
+            follower = asyncio.ensure_future(flight.ado("k", fast))
+            await asyncio.sleep(0)
+            leader.cancel()
+            return await follower
+
+        assert asyncio.run(run()) == {"content": "own"}
+
+
+class TestRouterCoalescing:
+    def test_off_by_default(self, http_server, monkeypatch):
+        http_server.routes["/api/generate"] = _slow(0.1, {"response": "hi"})
+        monkeypatch.setenv("OLLAMA_PRIMARY_URL", http_server.url)
+        router = Router()
+        router.query_many(["same"] * 3)
+        assert len(http_server.requests) == 3
+        assert router.coalesce_stats() == {}
+
+    def test_threaded(self, http_server, monkeypatch):
+        http_server.routes["/api/generate"] = _slow(0.2, {"response": "hi"})
+        monkeypatch.setenv("OLLAMA_PRIMARY_URL", http_server.url)
+        router = Router({"coalesce": True})
+        results = router.query_many(["same"] * 6, max_concurrency=6)
+        assert all(r["content"] == "hi" for r in results)
+        assert len(http_server.requests) == 1
+        assert router.coalesce_stats()["coalesced"] == 5
+        # Only the real call counts against usage
+        assert router.usage.get_today("ollama")["calls"] == 1
+
+    def test_async(self, http_server, monkeypatch):
+        pytest.importorskip("httpx")
+        from llm_router import AsyncRouter
+        http_server.routes["/api/generate"] = _slow(0.2, {"response": "hi"})
+        monkeypatch.setenv("OLLAMA_PRIMARY_URL", http_server.url)
+
+        async def run():
+            async with AsyncRouter({"coalesce": True}) as router:
+                results = await asyncio.gather(*(router.aquery("same") for _ in range(4)))
+                return results, router.coalesce_stats()
+
+        results, stats = asyncio.run(run())
+        assert all(r["content"] == "hi" for r in results)
+        assert len(http_server.requests) == 1
+        assert stats["coalesced"] == 3
@@ -0,0 +1,86 @@
+"Tests for price tables, cost estimates, cost routing and spend budgets."
+
+import pytest
+
+from llm_router import Router
+from llm_router.cost import CostModel
+from llm_router.limits import RateLimiter
+from llm_router.providers import OpenRouterProvider, PerplexityProvider
+from llm_router.usage import UsageTracker
+
+
+class TestCostModel:
+    def test_model_entry_wins(self):
+        costs = CostModel({"openrouter/cheap": {"input": 0.1, "output": 0.4}})
+        assert costs.cost("openrouter", "cheap", 1_000_000, 1_000_000) == pytest.approx(0.5)
+        assert costs.cost("openrouter", "other", 1_000_000, 0) == pytest.approx(2.0)
+        assert costs.cost("unknown", None, 10**9, 10**9) == 0
+
+    def test_tuple_prices_and_table(self):
+        costs = CostModel({"nvidia": (1, 3)})
+        assert costs.estimate("nvidia", None, 1000, 1000) == pytest.approx(0.004)
+        assert costs.table()["nvidia"] == {"input": 1.0, "output": 3.0, "request": 0.0}
+
+    def test_providers_price_input_and_output(self):
+        data = {"choices": [{"message": {"content": "x"}}],
+                "usage": {"prompt_tokens": 100, "completion_tokens": 100, "total_tokens": 200}}
+        assert OpenRouterProvider(api_key="k")._parse_response(data, "m", 1)["cost"] == pytest.approx(0.0004)
+        assert PerplexityProvider(api_key="k")._parse_response(data, "sonar", 1)["cost"] == pytest.approx(0.0052)
+
+
+def _order(router: Router, **kwargs):
+    return [pid for pid, _ in router._candidates("routine", 100, **kwargs) if pid in router.providers]
+
+
+class TestCostRouting:
+    def test_cheapest_within_slo(self):
+        router = Router({"prices": {"ollama": {"input": 50, "output": 50}}, "cost_routing": {"latency_slo_ms": 1000}})
+        assert _order(router) == ["openrouter", "ollama"]
+        assert _order(router, cost_sensitive=False) == ["ollama", "openrouter"]
+
+        for _ in range(5):
+            router.latency.record("openrouter", 5000, model="openrouter/auto")
+        assert _order(router) == ["ollama", "openrouter"]
+
+    def test_estimate_cost(self):
+        router = Router()
+        assert list(router.estimate_cost("latest news", task="research"))[0] == "perplexity"
+        estimates = router.estimate_cost("word " * 4000)
+        assert estimates["ollama"] == 0
+        assert estimates["openrouter"] == pytest.approx((5001 + 300) * 2e-6, rel=1e-3)
+
+    def test_prices_reach_providers(self, http_server, monkeypatch):
+        http_server.routes["/api/generate"] = (200, {"response": "ok", "prompt_eval_count": 10, "eval_count": 20})
+        monkeypatch.setenv("OLLAMA_PRIMARY_URL", http_server.url)
+        router = Router({"prices": {"ollama": {"output": 1000}}})
+        result = router.query("hi")
+        assert result["cost"] == pytest.approx(0.02)
+        assert result["tokens"] == 30
+
+
+class TestBudget:
+    def test_estimate_counts_against_budget(self, tmp_path):
+        usage = UsageTracker(storage_path=str(tmp_path / "usage.json"))
+        limiter = RateLimiter(usage=usage, budget={"daily_cost": 1.0})
+        usage.record("openrouter", cost=0.7)
+        usage.record("nvidia", cost=0.2)
+        assert limiter.limits_cost("ollama")
+        assert limiter.check("ollama", cost=0.05) is None
+        assert limiter.check("ollama", cost=0.2) == "Daily budget reached"
+        assert limiter.stats()["budget"]["spent_today"] == pytest.approx(0.9)
+        usage.close()
+
+    def test_router_stops_spending(self, http_server, monkeypatch):
+        http_server.routes["/api/generate"] = (200, {"response": "ok"})
+        monkeypatch.setenv("OLLAMA_PRIMARY_URL", http_server.url)
+        router = Router({"prices": {"ollama": {"request": 0.004}}, "budget": {"daily_cost": 0.01}})
+        assert router.query("a")["content"] == "ok"
+        assert router.query("b")["content"] == "ok"
+        assert router.query("c").get("error")
+        assert len(http_server.requests) == 2
+
+    def test_research_route_respects_budget(self):
+        router = Router({"budget": {"daily_cost": 0.006}, "state": False})
+        router.usage.record("openrouter", cost=0.004)
+        assert router._estimate("perplexity", None, 100) > 0.002
+        assert "perplexity" not in [pid for pid, _, _ in router._route("research", prompt_tokens=100)]
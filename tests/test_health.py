@@ -0,0 +1,155 @@
+"Tests for circuit breakers and the health prober."
+
+import time
+
+from llm_router import Router
+from llm_router.health import CircuitBreaker, HealthChecker, HealthProber
+from llm_router.providers import OpenRouterProvider
+
+
+class TestCircuitBreaker:
+    def test_trips_on_consecutive_failures(self):
+        breaker = CircuitBreaker(consecutive_failures=2, base_backoff=60)
+        breaker.record_failure("Timeout")
+        assert breaker.allow()
+        breaker.record_failure("Timeout")
+        assert breaker.state == CircuitBreaker.OPEN
+        assert not breaker.allow()
+
+    def test_trips_on_error_rate(self):
+        breaker = CircuitBreaker(failure_rate=0.5, consecutive_failures=100, min_calls=4)
+        for ok in (True, False, True, False):
+            breaker.record_success() if ok else breaker.record_failure()
+        assert breaker.state == CircuitBreaker.OPEN
+
+    def test_half_open_single_trial(self):
+        breaker = CircuitBreaker(consecutive_failures=1, base_backoff=0.01)
+        breaker.record_failure()
+        time.sleep(0.02)
+        assert breaker.allow()
+        assert breaker.state == CircuitBreaker.HALF_OPEN
+        assert not breaker.allow()
+        breaker.record_success()
+        assert breaker.state == CircuitBreaker.CLOSED
+
+    def test_backoff_grows(self):
+        breaker = CircuitBreaker(consecutive_failures=1, base_backoff=0.05)
+        breaker.record_failure()
+        time.sleep(0.06)
+        assert breaker.allow()
+        breaker.record_failure()
+        assert breaker.trips == 2
+        assert breaker.open_until - time.time() > 0.06
+
+
+class _Node:
+    def __init__(self):
+        self.healthy = False
+        self.checks = 0
+
+    def health_check(self):
+        self.checks += 1
+        return {"healthy": self.healthy}
+
+
+class _SlowNode(_Node):
+    def __init__(self, delay):
+        super().__init__()
+        self.healthy = True
+        self.delay = delay
+
+    def health_check(self):
+        time.sleep(self.delay)
+        return super().health_check()
+
+
+class TestHealthCache:
+    def test_results_reused_within_ttl(self):
+        checker = HealthChecker(ttl=60)
+        node = _Node()
+        result = checker.check("node", node)
+        assert not result["healthy"] and result["latency_ms"] >= 0
+        assert checker.check("node", node)["cached"]
+        assert node.checks == 1
+        checker.check("node", node, max_age=0)
+        assert node.checks == 2
+
+    def test_failed_probe_blocks_routing_until_stale(self):
+        checker = HealthChecker(ttl=0.05, breaker={"base_backoff": 0})
+        checker.check("node", _Node())
+        assert not checker.is_healthy("node")
+        time.sleep(0.06)
+        assert checker.is_healthy("node")
+
+    def test_cloud_probe(self, http_server):
+        provider = OpenRouterProvider(api_key="k")
+        provider.base_url = http_server.url
+        http_server.routes["/key"] = (200, {"data": {}})
+        assert provider.health_check() == {"healthy": True}
+        assert http_server.requests[-1][:2] == ("GET", "/key")
+        http_server.routes["/key"] = (401, {"error": "bad key"})
+        assert provider.health_check() == {"healthy": False, "error": "HTTP 401"}
+
+    def test_unconfigured_provider_keeps_breaker_closed(self):
+        checker = HealthChecker()
+        result = checker.check("openrouter", OpenRouterProvider(api_key=""))
+        assert result["configured"] is False
+        assert checker.breaker("openrouter").state == CircuitBreaker.CLOSED
+
+
+class TestRouterCheckHealth:
+    def test_concurrent_with_deadline(self):
+        router = Router({"state": False})
+        for pid in list(router.providers):
+            del router.providers[pid]
+        router.providers["a"] = _SlowNode(0.4)
+        router.providers["b"] = _SlowNode(0.4)
+        router.providers["hung"] = _SlowNode(5)
+        start = time.monotonic()
+        results = router.check_health(timeout=0.7)
+        assert time.monotonic() - start < 1
+        assert results["a"]["healthy"] and results["b"]["healthy"]
+        assert "timed out" in results["hung"]["error"]
+
+
+class TestHealthProber:
+    def test_reprobes_open_breaker(self):
+        checker = HealthChecker(breaker={"base_backoff": 0.01})
+        node = _Node()
+        prober = HealthProber(checker, {"node": node}, interval=60)
+        prober.probe_once()
+        assert not checker.is_healthy("node")
+        node.healthy = True
+        time.sleep(0.02)
+        prober.probe_once()
+        assert checker.breaker("node").state == CircuitBreaker.CLOSED
+        assert node.checks == 2
+
+    def test_background_thread(self):
+        checker = HealthChecker()
+        node = _Node()
+        prober = HealthProber(checker, {"node": node}, interval=60, tick=0.01)
+        prober.start()
+        time.sleep(0.05)
+        prober.stop()
+        assert node.checks == 1
+        assert checker.breaker("node").state == CircuitBreaker.OPEN
+
+
+class TestRouterBreakers:
+    def test_dead_primary_is_skipped(self, http_server, monkeypatch):
+        http_server.routes["/api/generate"] = (200, {"response": "fallback"})
+        monkeypatch.setenv("OLLAMA_PRIMARY_URL", "http://127.0.0.1:9")
+        monkeypatch.setenv("OLLAMA_FALLBACK_URL", http_server.url)
+        router = Router({"pool": {"max_retries": 0}, "health": {"breaker": {"consecutive_failures": 2}}})
+        for _ in range(3):
+            assert router.query("hi")["content"] == "fallback"
+        assert router.health.get_breakers()["ollama"]["state"] == "open"
+        assert router.pool_stats()["http://127.0.0.1:9"]["requests"] == 2
+
+    def test_open_breaker_skips_research_and_image_routes(self):
+        router = Router({"state": False})
+        for pid in ("perplexity", "nvidia"):
+            router.health.breaker(pid).trip("HTTP 503")
+        assert "perplexity" not in [pid for pid, _, _ in router._route("research")]
+        assert "nvidia" not in [pid for pid, _, _ in router._route("routine", image_url="http://x/cat.png")]
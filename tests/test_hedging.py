@@ -0,0 +1,70 @@
+"Tests for hedged requests."
+
+import asyncio
+import time
+
+import pytest
+
+from llm_router import Router
+
+
+def _slow(delay, payload):
+    def route(body):
+        time.sleep(delay)
+        return 200, payload
+    return route
+
+
+@pytest.fixture
+def nodes(make_server, monkeypatch):
+    primary, fallback = make_server(), make_server()
+    primary.routes["/api/generate"] = _slow(0.6, {"response": "primary"})
+    fallback.routes["/api/generate"] = (200, {"response": "fallback"})
+    monkeypatch.setenv("OLLAMA_PRIMARY_URL", primary.url)
+    monkeypatch.setenv("OLLAMA_FALLBACK_URL", fallback.url)
+    return primary, fallback
+
+
+def _warm(router, ms=50):
+    for _ in range(20):
+        router.latency.record("ollama", ms)
+
+
+class TestHedging:
+    def test_disabled_by_default(self, nodes):
+        router = Router()
+        _warm(router)
+        assert router.query("hi")["content"] == "primary"
+
+    def test_hedge_wins(self, nodes):
+        router = Router({"hedge": {"percentile": 0.95}})
+        _warm(router)
+        start = time.monotonic()
+        result = router.query("hi")
+        assert result["content"] == "fallback"
+        assert time.monotonic() - start < 0.5
+        router.close()
+        time.sleep(0.8)
+        today = router.usage.get_today("ollama")
+        assert today["hedged"] == 1
+        assert today["hedge_wasted"] == 1
+        assert today["hedge_saved_ms"] > 0
+
+    def test_no_hedge_without_samples(self, nodes):
+        router = Router({"hedge": {}})
+        assert router.query("hi")["content"] == "primary"
+
+    def test_async_hedge_cancels_loser(self, nodes):
+        pytest.importorskip("httpx")
+        from llm_router import AsyncRouter
+
+        async def run():
+            async with AsyncRouter({"hedge": {}}) as router:
+                _warm(router)
+                result = await router.aquery("hi")
+                return result, router.usage.get_today("ollama")
+
+        result, today = asyncio.run(run())
+        assert result["content"] == "fallback"
+        assert today["hedged"] == 1
+        assert today["hedge_wasted"] == 1
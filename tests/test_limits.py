@@ -0,0 +1,88 @@
+"Tests for rate limits and daily budgets."
+
+import time
+
+from llm_router import Router
+from llm_router.limits import RateLimiter, TokenBucket
+from llm_router.providers import _retry_after
+
+
+class TestTokenBucket:
+    def test_refuses_when_empty_and_refills(self):
+        bucket = TokenBucket(rate=600, burst=2)
+        assert bucket.try_acquire() and bucket.try_acquire()
+        assert not bucket.try_acquire()
+        assert 0 < bucket.wait_time() <= 0.1
+        time.sleep(0.12)
+        assert bucket.try_acquire()
+
+    def test_consume_goes_into_debt(self):
+        bucket = TokenBucket(rate=60)
+        bucket.consume(100)
+        assert bucket.available() < 0
+
+
+class TestRateLimiter:
+    def test_rpm(self):
+        limiter = RateLimiter({"openrouter": {"rpm": 60, "burst": 1}})
+        limiter.configure("openrouter")
+        assert limiter.acquire("openrouter") is None
+        assert "requests per minute" in limiter.acquire("openrouter")
+
+    def test_tpm_charged_after_call(self):
+        limiter = RateLimiter({"nvidia": {"tpm": 1000}})
+        limiter.configure("nvidia")
+        assert limiter.acquire("nvidia") is None
+        limiter.record("nvidia", {"tokens": 1500})
+        assert "tokens per minute" in limiter.acquire("nvidia")
+
+    def test_daily_budget_from_env(self, monkeypatch, tmp_path):
+        from llm_router.usage import UsageTracker
+        monkeypatch.setenv("NVIDIA_DAILY_LIMIT", "2")
+        usage = UsageTracker(storage_path=str(tmp_path / "usage.json"))
+        limiter = RateLimiter(usage=usage)
+        limiter.configure("nvidia")
+        usage.record("nvidia")
+        assert limiter.check("nvidia") is None
+        usage.record("nvidia")
+        assert limiter.check("nvidia") == "Daily calls limit reached"
+        usage.close()
+
+    def test_retry_after(self):
+        limiter = RateLimiter()
+        limiter.configure("openrouter")
+        limiter.record("openrouter", {"error": "HTTP 429", "retry_after": 0.1})
+        assert limiter.check("openrouter").startswith("Rate limited")
+        time.sleep(0.12)
+        assert limiter.check("openrouter") is None
+
+    def test_parse_retry_after(self):
+        assert _retry_after("7") == 7.0
+        assert _retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+        assert _retry_after("soon") is None
+
+
+class TestRouterLimits:
+    def test_skips_over_budget_provider(self, make_server, monkeypatch):
+        primary, fallback = make_server(), make_server()
+        primary.routes["/api/generate"] = (200, {"response": "primary"})
+        fallback.routes["/api/generate"] = (200, {"response": "fallback"})
+        monkeypatch.setenv("OLLAMA_PRIMARY_URL", primary.url)
+        monkeypatch.setenv("OLLAMA_FALLBACK_URL", fallback.url)
+        router = Router({"limits": {"ollama": {"daily_calls": 1}}})
+        assert router.query("a")["content"] == "primary"
+        assert router.query("b")["content"] == "fallback"
+        assert len(primary.requests) == 1
+
+    def test_honors_retry_after_header(self, make_server, monkeypatch):
+        primary, fallback = make_server(), make_server()
+        primary.routes["/api/generate"] = (429, {"error": "slow down"})
+        fallback.routes["/api/generate"] = (200, {"response": "fallback"})
+        monkeypatch.setenv("OLLAMA_PRIMARY_URL", primary.url)
+        monkeypatch.setenv("OLLAMA_FALLBACK_URL", fallback.url)
+        router = Router()
+        for _ in range(3):
+            assert router.query("hi")["content"] == "fallback"
+        # Default back-off without a header; the primary is not called again
+        assert len(primary.requests) == 1
+        assert router.limit_stats()["ollama"]["blocked_for"] > 0
@@ -0,0 +1,64 @@
+"Tests for metrics and tracing instrumentation."
+
+from llm_router import Router
+from llm_router.metrics import Histogram, Hook, Metrics, NULL_METRICS
+
+
+class _Recorder(Hook):
+    def __init__(self):
+        self.spans = []
+
+    def span_start(self, name, attributes):
+        return name
+
+    def span_end(self, handle, name, duration, attributes, error):
+        assert handle == name
+        self.spans.append((name, attributes.get("provider"), error))
+
+
+class TestMetrics:
+    def test_histogram_buckets_are_inclusive(self):
+        h = Histogram((1, 10))
+        for value in (0.5, 1, 5, 50):
+            h.observe(value)
+        assert h.counts == [2, 1, 1]
+        assert h.quantile(0.5) == 1
+
+    def test_prometheus_text(self):
+        metrics = Metrics()
+        metrics.observe_call("ollama", "phi3:mini", 0.2, 100)
+        metrics.observe_call("ollama", None, 1.0, 0, error="Timeout")
+        text = metrics.prometheus()
+        assert 'llm_router_calls_total{provider="ollama",outcome="ok"} 1' in text
+        assert 'llm_router_calls_total{provider="ollama",outcome="error"} 1' in text
+        assert 'llm_router_call_seconds_bucket{provider="ollama",model="phi3:mini",le="0.25"} 1' in text
+        assert 'llm_router_call_tokens_bucket{provider="ollama",model="phi3:mini",le="+Inf"} 1' in text
+        assert 'llm_router_call_tokens_count{provider="ollama",model="phi3:mini"} 1' in text
+
+
+class TestRouterMetrics:
+    def test_disabled_by_default(self, http_server, monkeypatch):
+        http_server.routes["/api/generate"] = (200, {"response": "hi"})
+        monkeypatch.setenv("OLLAMA_PRIMARY_URL", http_server.url)
+        router = Router()
+        assert router.metrics is NULL_METRICS
+        assert router.providers["ollama"].metrics is NULL_METRICS
+        router.query("hi")
+        assert router.metrics_text() == ""
+
+    def test_stages_and_hooks(self, http_server, monkeypatch):
+        http_server.routes["/api/generate"] = (200, {"response": "hi", "eval_count": 12})
+        monkeypatch.setenv("OLLAMA_PRIMARY_URL", "http://127.0.0.1:9")
+        monkeypatch.setenv("OLLAMA_FALLBACK_URL", http_server.url)
+        hook = _Recorder()
+        router = Router({"metrics": {"hooks": [hook]}, "pool": {"max_retries": 0}})
+        assert router.query("hi")["content"] == "hi"
+
+        stages = router.metrics_stats()["stages"]
+        assert "attempt.error/ollama" in stages
+        for stage in ("query", "route", "attempt/ollama_fallback", "usage.record/ollama_fallback",
+                      "http.headers/ollama", "http.body/ollama", "decode/ollama"):
+            assert stages[stage]["count"] == 1, stage
+        assert ("attempt", "ollama", "Connection refused") in hook.spans
+        assert hook.spans[-1] == ("query", None, None)
+        assert router.metrics_stats()["tokens"]["ollama_fallback/qwen2.5:3b"]["count"] == 1
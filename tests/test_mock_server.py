@@ -0,0 +1,30 @@
+"Tests for the benchmark mock provider."
+
+from benchmarks.mock_server import MockServer, parse_latency
+from llm_router import Router
+
+
+def test_parse_latency():
+    assert parse_latency("lognormal:200:0.5") == ("lognormal", 200.0, 0.5)
+
+
+def test_ollama_and_chat_endpoints(monkeypatch):
+    with MockServer(tokens=7) as mock:
+        monkeypatch.setenv("OLLAMA_PRIMARY_URL", mock.url)
+        router = Router()
+        assert router.query("hi")["content"].startswith("tok0 ")
+        assert "".join(router.stream("hi")) == "".join(f"tok{i} " for i in range(8))
+
+        openrouter = router.providers["openrouter"]
+        openrouter.api_key, openrouter.base_url = "key", mock.url + "/v1"
+        assert router.query("hi", force_provider="openrouter")["tokens"] == 7
+        info = {}
+        assert "".join(router.stream("hi", force_provider="openrouter", info=info)).startswith("tok0 ")
+        assert info["tokens"] == 7
+        assert mock.requests == 4
+
+
+def test_errors(monkeypatch):
+    with MockServer(error_rate=1.0, error_status=503) as mock:
+        monkeypatch.setenv("OLLAMA_PRIMARY_URL", mock.url)
+        assert Router().query("hi", force_provider="ollama")["error"] == "HTTP 503"
@@ -0,0 +1,111 @@
+"Tests for the multi-node Ollama pool."
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from llm_router import OllamaPool, Router
+
+
+def _tags(*models):
+    return 200, {"models": [{"name": m} for m in models]}
+
+
+class TestOllamaPool:
+    def test_routes_to_node_with_model(self, make_server):
+        a, b = make_server(), make_server()
+        a.routes["/api/tags"] = _tags("phi3:mini")
+        b.routes["/api/tags"] = _tags("deepseek-coder:6.7b")
+        a.routes["/api/generate"] = b.routes["/api/generate"] = (200, {"response": "ok"})
+        pool = OllamaPool([a.url, b.url])
+        assert pool.health_check()["models"] == ["deepseek-coder:6.7b", "phi3:mini"]
+        for _ in range(4):
+            assert pool.generate("hi", model="deepseek-coder:6.7b")["node"] == b.url
+        assert not [r for r in a.requests if r[1] == "/api/generate"]
+
+    def test_fails_over_between_nodes(self, http_server):
+        http_server.routes["/api/generate"] = (200, {"response": "ok"})
+        pool = OllamaPool(["http://127.0.0.1:9", http_server.url])
+        for _ in range(3):
+            assert pool.generate("hi")["content"] == "ok"
+
+    def test_caps_in_flight_per_node(self, http_server):
+        active, peak = [0], [0]
+        lock = threading.Lock()
+
+        def slow(body):
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            time.sleep(0.05)
+            with lock:
+                active[0] -= 1
+            return 200, {"response": "ok"}
+
+        http_server.routes["/api/generate"] = slow
+        pool = OllamaPool([http_server.url], max_in_flight=2)
+        with ThreadPoolExecutor(8) as executor:
+            results = list(executor.map(lambda _: pool.generate("hi"), range(8)))
+        assert all(r["content"] == "ok" for r in results)
+        assert peak[0] <= 2
+        assert pool.in_flight == [0]
+
+    def test_balances_load(self, make_server):
+        a, b = make_server(), make_server()
+
+        def slow(body):
+            time.sleep(0.05)
+            return 200, {"response": "ok"}
+
+        a.routes["/api/generate"] = b.routes["/api/generate"] = slow
+        pool = OllamaPool([a.url, b.url], strategy="p2c")
+        with ThreadPoolExecutor(4) as executor:
+            list(executor.map(lambda _: pool.generate("hi"), range(8)))
+        assert len(a.requests) >= 2 and len(b.requests) >= 2
+
+
+class TestRouterPool:
+    def test_nodes_replace_primary_and_fallback(self, http_server, monkeypatch):
+        http_server.routes["/api/generate"] = (200, {"response": "pooled"})
+        monkeypatch.setenv("OLLAMA_NODES", f"http://127.0.0.1:9,{http_server.url}")
+        monkeypatch.setenv("OLLAMA_FALLBACK_URL", "http://127.0.0.1:9")
+        router = Router({"pool": {"max_retries": 0}})
+        assert isinstance(router.providers["ollama"], OllamaPool)
+        assert "ollama_fallback" not in router.providers
+        assert router.query("hi")["content"] == "pooled"
+
+
+class TestResidency:
+    def test_prefers_node_with_model_loaded(self, make_server):
+        a, b = make_server(), make_server()
+        a.routes["/api/tags"] = b.routes["/api/tags"] = _tags("qwen2.5:7b")
+        a.routes["/api/ps"] = (200, {"models": []})
+        b.routes["/api/ps"] = (200, {"models": [{"name": "qwen2.5:7b"}]})
+        a.routes["/api/generate"] = b.routes["/api/generate"] = (200, {"response": "ok"})
+        pool = OllamaPool([a.url, b.url])
+        assert pool.health_check()["loaded"] == {a.url: [], b.url: ["qwen2.5:7b"]}
+        for _ in range(4):
+            assert pool.generate("hi", model="qwen2.5:7b")["node"] == b.url
+
+    def test_keep_alive_per_task(self, http_server, monkeypatch):
+        http_server.routes["/api/generate"] = (200, {"response": "ok"})
+        monkeypatch.setenv("OLLAMA_PRIMARY_URL", http_server.url)
+        router = Router({"ollama_models": {"keep_alive": {"fast": "1h", "default": "10m"}}})
+        router.query("hi", task="fast")
+        assert http_server.requests[-1][2]["keep_alive"] == "1h"
+        router.query("hi", task="code")
+        assert http_server.requests[-1][2]["keep_alive"] == "10m"
+
+        Router().query("hi", task="fast")
+        assert "keep_alive" not in http_server.requests[-1][2]
+
+    def test_preload_at_startup(self, http_server, monkeypatch):
+        http_server.routes["/api/generate"] = (200, {"done": True, "done_reason": "load"})
+        monkeypatch.setenv("OLLAMA_PRIMARY_URL", http_server.url)
+        router = Router({"ollama_models": {"preload": ["fast", "qwen2.5:7b"], "keep_alive": {"fast": -1}}})
+        router._warmup.join(5)
+        assert [body for _, _, body in http_server.requests] == [
+            {"model": "phi3:mini", "keep_alive": -1}, {"model": "qwen2.5:7b"}
+        ]
+        assert router.providers["ollama"].loaded == {"phi3:mini", "qwen2.5:7b"}
+        assert router.warm_up(["code"])["ollama"]["deepseek-coder:6.7b"]["loaded"]
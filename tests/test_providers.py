@@ -0,0 +1,16 @@
+"Tests for decoding provider responses."
+
+from llm_router.providers import OllamaProvider, PerplexityProvider
+
+
+class TestParseResponse:
+    def test_ollama(self):
+        data = {"response": "ok", "prompt_eval_count": 3, "eval_count": 4}
+        result = OllamaProvider()._parse_response(data, "phi3:mini", 0.25)
+        assert result == {"provider": "ollama", "model": "phi3:mini", "content": "ok", "tokens": 7, "elapsed_ms": 250, "cost": 0}
+
+    def test_perplexity_citations(self):
+        data = {"choices": [{"message": {"content": "x"}}], "usage": {"total_tokens": 4}, "citations": list("abcdefg")}
+        result = PerplexityProvider(api_key="k")._parse_response(data, "sonar", 1)
+        assert result["citations"] == list("abcde")
+        assert result["tokens"] == 4
@@ -0,0 +1,165 @@
+"Tests for priority queues and admission control."
+
+import threading
+import time
+
+from llm_router import Router
+from llm_router.scheduler import ProviderQueue
+
+
+def _wait_for_depth(queue: ProviderQueue, depth: int):
+    for _ in range(200):
+        if queue.stats()["depth"] == depth:
+            return
+        time.sleep(0.005)
+    raise AssertionError(f"queue never reached depth {depth}")
+
+
+def _enqueue(queue: ProviderQueue, priority: str, results: list, **kwargs) -> threading.Thread:
+    def run():
+        reason = queue.acquire(priority, **kwargs)
+        results.append((priority, reason))
+        if reason is None:
+            queue.release()
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread
+
+
+class TestProviderQueue:
+    def test_interactive_goes_first(self):
+        queue = ProviderQueue(1)
+        assert queue.acquire("batch") is None
+        order: list = []
+        threads = [_enqueue(queue, "batch", order)]
+        _wait_for_depth(queue, 1)
+        threads.append(_enqueue(queue, "interactive", order))
+        _wait_for_depth(queue, 2)
+
+        queue.release()
+        for thread in threads:
+            thread.join()
+        assert order == [("interactive", None), ("batch", None)]
+        stats = queue.stats()
+        assert stats["in_flight"] == 0
+        assert stats["classes"]["batch"]["admitted"] == 2
+
+    def test_rejects_unreachable_deadline(self):
+        queue = ProviderQueue(1)
+        queue.acquire()
+        expires = time.monotonic() + 0.5
+        assert queue.acquire("interactive", expires, service_ms=1000) == "Queue wait would miss the deadline"
+        assert queue.acquire("interactive", expires, service_ms=10) == "Deadline exceeded in queue"
+        assert queue.stats()["classes"]["interactive"]["rejected"] == 2
+
+    def test_full_queue_sheds_batch_for_interactive(self):
+        queue = ProviderQueue(1, max_queue=1)
+        queue.acquire()
+        results: list = []
+        batch = _enqueue(queue, "batch", results)
+        _wait_for_depth(queue, 1)
+        assert queue.acquire("batch") == "Queue full"
+
+        interactive = _enqueue(queue, "interactive", results)
+        batch.join()
+        assert results == [("batch", "Shed from a full queue")]
+        queue.release()
+        interactive.join()
+        assert results[-1] == ("interactive", None)
+        assert queue.stats()["classes"]["batch"]["shed"] == 1
+
+
+class TestRouterScheduling:
+    def test_deadline_fails_over_instead_of_queueing(self, make_server, monkeypatch):
+        primary, fallback = make_server(), make_server()
+        release = threading.Event()
+
+        def slow(body):
+            release.wait(5)
+            return 200, {"response": "primary"}
+
+        primary.routes["/api/generate"] = slow
+        fallback.routes["/api/generate"] = (200, {"response": "fallback"})
+        monkeypatch.setenv("OLLAMA_PRIMARY_URL", primary.url)
+        monkeypatch.setenv("OLLAMA_FALLBACK_URL", fallback.url)
+        router = Router({"concurrency": {"ollama": 1}, "state": False})
+        router.latency.record("ollama", 2000)
+
+        busy = threading.Thread(target=router.query, args=("first",))
+        busy.start()
+        for _ in range(200):
+            if primary.requests:
+                break
+            time.sleep(0.005)
+
+        result = router.query("second", deadline=1)
+        assert result["content"] == "fallback"
+        assert router.queue_stats()["ollama"]["classes"]["interactive"]["rejected"] == 1
+        assert router.health.breaker("ollama").state == "closed"
+        release.set()
+        busy.join()
+        router.close()
+
+    def test_refusal_hands_back_half_open_trial(self, monkeypatch):
+        monkeypatch.setenv("OLLAMA_PRIMARY_URL", "http://127.0.0.1:9")
+        router = Router({"concurrency": {"ollama": 1}, "health": {"breaker": {"base_backoff": 0}}})
+        breaker = router.health.breaker("ollama")
+        breaker.trip("Connection refused")
+        queue = router._queue("ollama")
+        queue.acquire()
+        router.latency.record("ollama", 5000)
+
+        assert "ollama" in [pid for pid, _, _ in router._route("routine")]
+        assert router._invoke("ollama", "hi", None, None, None, expires=time.monotonic() + 1)["error"]
+        assert breaker.allow()
+        queue.release()
+        router.close()
+
+    def test_queue_unbounded_unless_configured(self):
+        assert Router()._queue("ollama").max_queue is None
+        assert Router({"queue_limits": {"ollama": 8}})._queue("ollama").max_queue == 8
+
+    def test_streams_hold_a_slot_until_closed(self, http_server, monkeypatch):
+        active, peak = [0], [0]
+        lock = threading.Lock()
+
+        def generate(body):
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            time.sleep(0.05)
+            with lock:
+                active[0] -= 1
+            return 200, '{"response": "hi", "done": false}\n{"response": "", "done": true, "eval_count": 1}\n'
+
+        http_server.routes["/api/generate"] = generate
+        monkeypatch.setenv("OLLAMA_PRIMARY_URL", http_server.url)
+        router = Router({"concurrency": {"ollama": 2}})
+
+        chunks: list = []
+        threads = [
+            threading.Thread(target=lambda: chunks.append("".join(router.stream("hi", force_provider="ollama"))))
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert chunks == ["hi"] * 8
+        assert peak[0] == 2
+        stats = router.queue_stats()["ollama"]
+        assert stats["in_flight"] == 0
+        assert stats["classes"]["interactive"]["admitted"] == 8
+
+        stream = router.stream("hi", force_provider="ollama")
+        assert next(stream) == "hi"
+        assert router.queue_stats()["ollama"]["in_flight"] == 1
+        stream.close()
+        assert router.queue_stats()["ollama"]["in_flight"] == 0
+        router.close()
+
+    def test_pool_capped_at_node_slots(self):
+        router = Router({"ollama_nodes": ["http://127.0.0.1:9", "http://127.0.0.1:10"], "ollama_pool": {"max_in_flight": 3}})
+        assert router._queue("ollama").capacity == 6
+        router.close()
@@ -0,0 +1,54 @@
+"Tests for the semantic cache."
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from llm_router import Router
+from llm_router.semantic_cache import HashingEmbedder, SemanticCache
+
+
+class TestHashingEmbedder:
+    def test_deterministic_and_normalized(self):
+        embedder = HashingEmbedder(dim=64)
+        a = embedder.embed("What is the capital of France?")
+        b = HashingEmbedder(dim=64).embed("What is the capital of France?")
+        assert np.array_equal(a, b)
+        assert abs(float(np.linalg.norm(a)) - 1) < 1e-5
+
+
+class TestSemanticCache:
+    def test_paraphrase_hit(self):
+        cache = SemanticCache(capacity=8, threshold=0.7)
+        cache.store("routine", "What is the capital of France?", {"content": "Paris"})
+        hit = cache.lookup("routine", "what is the capital of france")
+        assert hit["content"] == "Paris"
+        assert cache.lookup("routine", "Write a haiku about autumn leaves") is None
+
+    def test_per_task(self):
+        cache = SemanticCache(capacity=8, threshold=0.5, thresholds={"code": 1.01})
+        cache.store("code", "sort a list", {"content": "sorted()"})
+        assert cache.lookup("code", "sort a list") is None
+        assert cache.lookup("routine", "sort a list") is None
+
+    def test_capacity_eviction(self):
+        cache = SemanticCache(capacity=2, threshold=0.99)
+        cache.store("routine", "first prompt here", {"content": "1"})
+        cache.store("routine", "second prompt here", {"content": "2"})
+        cache.lookup("routine", "first prompt here")
+        cache.store("routine", "third prompt here", {"content": "3"})
+        assert cache.lookup("routine", "second prompt here") is None
+        assert cache.lookup("routine", "first prompt here")["content"] == "1"
+        assert cache.stats()["evictions"] == 1
+
+
+class TestRouterSemanticCache:
+    def test_query_hit(self, http_server, monkeypatch):
+        http_server.routes["/api/generate"] = (200, {"response": "Paris"})
+        monkeypatch.setenv("OLLAMA_PRIMARY_URL", http_server.url)
+        router = Router({"semantic_cache": {"threshold": 0.7}})
+        router.query("What is the capital of France?")
+        result = router.query("what's the capital of France")
+        assert result["cached"] is True
+        assert len(http_server.requests) == 1
+        assert router.semantic_cache_stats()["hits"] == 1
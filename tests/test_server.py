@@ -0,0 +1,106 @@
+"Tests for the HTTP gateway."
+
+import json
+
+import pytest
+import requests
+
+from llm_router import Router
+from llm_router.server import Gateway
+
+
+def _ollama(body):
+    if body.get("stream"):
+        lines = [{"response": "Hel", "done": False}, {"response": "lo", "done": False},
+                 {"response": "", "done": True, "eval_count": 5}]
+        return 200, "".join(json.dumps(line) + "\n" for line in lines)
+    return 200, {"response": "Hello"}
+
+
+@pytest.fixture
+def gateway(http_server, monkeypatch):
+    http_server.routes["/api/generate"] = _ollama
+    monkeypatch.setenv("OLLAMA_PRIMARY_URL", http_server.url)
+    gateway = Gateway(Router(), port=0).start()
+    yield gateway
+    gateway.shutdown()
+    gateway.close()
+
+
+class TestGateway:
+    def test_chat_completions(self, gateway, http_server):
+        reply = requests.post(f"{gateway.url}/v1/chat/completions", json={
+            "model": "code", "messages": [{"role": "user", "content": "hi"}]
+        }).json()
+        assert reply["object"] == "chat.completion"
+        assert reply["choices"][0]["message"]["content"] == "Hello"
+        assert reply["model"] == "deepseek-coder:6.7b"
+        assert http_server.requests[-1][2]["prompt"] == "hi"
+
+    def test_chat_completions_usage_splits_prompt_and_completion(self, gateway, monkeypatch):
+        monkeypatch.setattr(gateway.router, "query", lambda prompt, **kwargs: {"provider": "ollama", "model": "m", "content": "Hello", "tokens": 40})
+        reply = requests.post(f"{gateway.url}/v1/chat/completions", json={
+            "messages": [{"role": "user", "content": "word " * 20}]
+        }).json()
+        assert reply["usage"] == {"prompt_tokens": 26, "completion_tokens": 14, "total_tokens": 40}
+
+    def test_chat_completions_stream(self, gateway):
+        response = requests.post(f"{gateway.url}/v1/chat/completions", stream=True, json={
+            "messages": [{"role": "system", "content": "be brief"}, {"role": "user", "content": "hi"}],
+            "stream": True
+        })
+        events = [line[6:] for line in response.iter_lines() if line.startswith(b"data: ")]
+        assert events[-1] == b"[DONE]"
+        chunks = [json.loads(e)["choices"][0] for e in events[:-1]]
+        assert "".join(c["delta"].get("content", "") for c in chunks) == "Hello"
+        assert chunks[-1]["finish_reason"] == "stop"
+
+    def test_ollama_generate_streams_by_default(self, gateway):
+        response = requests.post(f"{gateway.url}/api/generate", json={"model": "fast", "prompt": "hi"})
+        lines = [json.loads(line) for line in response.iter_lines() if line]
+        assert "".join(line.get("response", "") for line in lines) == "Hello"
+        assert lines[-1]["done"] and lines[-1]["eval_count"] == 5
+
+    def test_ollama_chat(self, gateway):
+        reply = requests.post(f"{gateway.url}/api/chat", json={
+            "messages": [{"role": "user", "content": "hi"}], "stream": False
+        }).json()
+        assert reply["message"]["content"] == "Hello"
+
+    def test_upstream_failure(self, gateway, monkeypatch):
+        gateway.router.providers["ollama"].url = "http://127.0.0.1:9"
+        response = requests.post(f"{gateway.url}/v1/chat/completions", json={
+            "model": "ollama", "messages": [{"role": "user", "content": "hi"}]
+        })
+        assert response.status_code == 502
+        assert response.json()["error"]["message"] == "Connection refused"
+
+    def test_health_and_metrics(self, gateway):
+        requests.post(f"{gateway.url}/api/generate", json={"prompt": "hi", "stream": False})
+        health = requests.get(f"{gateway.url}/health").json()
+        assert health["status"] == "ok"
+        assert health["breakers"]["ollama"]["state"] == "closed"
+        metrics = requests.get(f"{gateway.url}/metrics").text
+        assert 'llm_router_breaker_state{provider="ollama"} 0' in metrics
+        assert 'llm_router_usage_calls_today{provider="ollama"} 1' in metrics
+
+    def test_api_key(self, http_server, monkeypatch):
+        monkeypatch.setenv("OLLAMA_PRIMARY_URL", http_server.url)
+        gateway = Gateway(Router(), port=0, api_key="secret").start()
+        try:
+            assert requests.get(f"{gateway.url}/v1/models").status_code == 401
+            assert requests.get(f"{gateway.url}/v1/models", headers={"Authorization": "Bearer secrex"}).status_code == 401
+            # Non-ASCII header bytes are rejected, not a server error
+            assert requests.get(f"{gateway.url}/v1/models", headers={"Authorization": "Bearer s\xe9cret"}).status_code == 401
+            models = requests.get(f"{gateway.url}/v1/models", headers={"Authorization": "Bearer secret"}).json()
+            assert "code" in [m["id"] for m in models["data"]]
+        finally:
+            gateway.shutdown()
+            gateway.close()
+
+    def test_close_flushes_usage(self, gateway, tmp_path):
+        requests.post(f"{gateway.url}/api/generate", json={"prompt": "hi", "stream": False})
+        gateway.shutdown()
+        gateway.close()
+        log = tmp_path / ".llm-router" / "usage.json.log"
+        assert '"p":"ollama"' in log.read_text()
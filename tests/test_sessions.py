@@ -0,0 +1,44 @@
+"Tests for pooled provider sessions."
+
+from concurrent.futures import ThreadPoolExecutor
+
+from llm_router.providers import OllamaProvider
+from llm_router.sessions import SessionPool
+
+
+class TestSessionPool:
+    def test_reuses_connection(self, http_server):
+        http_server.routes["/api/generate"] = (200, {"response": "hi"})
+        pool = SessionPool()
+        provider = OllamaProvider(url=http_server.url, pool=pool)
+        for _ in range(3):
+            assert provider.generate("hello")["content"] == "hi"
+        stats = pool.stats()[http_server.url]
+        assert stats["requests"] == 3
+        assert stats["connections_opened"] == 1
+        pool.close()
+
+    def test_host_pool_size(self, http_server):
+        host = http_server.url.split("//")[1]
+        pool = SessionPool(host_pool_sizes={host: 3})
+        pool.get(http_server.url + "/api/tags")
+        assert pool.stats()[http_server.url]["pool_maxsize"] == 3
+        pool.close()
+
+    def test_thread_safe(self, http_server):
+        http_server.routes["/api/generate"] = (200, {"response": "ok"})
+        pool = SessionPool(pool_maxsize=8)
+        provider = OllamaProvider(url=http_server.url, pool=pool)
+        with ThreadPoolExecutor(8) as executor:
+            results = list(executor.map(lambda _: provider.generate("x"), range(32)))
+        assert all(r["content"] == "ok" for r in results)
+        stats = pool.stats()[http_server.url]
+        assert stats["requests"] == 32
+        assert stats["connections_opened"] <= 8
+        pool.close()
+
+    def test_connection_error_counted(self):
+        pool = SessionPool(max_retries=0)
+        provider = OllamaProvider(url="http://127.0.0.1:9", pool=pool)
+        assert provider.generate("x")["error"] == "Connection refused"
+        assert pool.stats()["http://127.0.0.1:9"]["errors"] == 1
@@ -0,0 +1,49 @@
+"Tests for lazy imports and lazily built providers."
+
+import subprocess
+import sys
+
+from llm_router import Router
+from llm_router.metrics import NULL_METRICS
+from llm_router.providers import OllamaProvider
+
+
+class TestLazyImports:
+    def test_router_import_skips_heavy_modules(self, tmp_path):
+        code = (
+            "import sys; from llm_router import Router; Router({'usage': {'storage_path': sys.argv[1]}}); "
+            "print(sorted(m for m in ('requests', 'urllib3', 'httpx', 'asyncio', 'concurrent.futures', 'sqlite3') "
+            "if m in sys.modules))"
+        )
+        out = subprocess.run([sys.executable, "-c", code, str(tmp_path / "usage.json")], capture_output=True, text=True)
+        assert out.stdout.strip() == "[]", out.stderr
+
+    def test_package_exports(self):
+        import llm_router
+        assert llm_router.OllamaProvider is OllamaProvider
+        assert "AsyncRouter" in dir(llm_router)
+
+
+class TestLazyProviders:
+    def test_built_on_first_use(self, monkeypatch):
+        monkeypatch.setenv("OLLAMA_FALLBACK_URL", "http://127.0.0.1:9")
+        router = Router({"ollama_models": {"keep_alive": {"default": "10m"}}})
+        assert list(router.providers) == ["ollama", "nvidia", "openrouter", "perplexity", "ollama_fallback"]
+        assert "nvidia" in router.providers
+        assert router.providers.built() == []
+
+        ollama = router.providers["ollama"]
+        assert router.providers.built() == ["ollama"]
+        assert router.providers.get("ollama") is ollama
+        assert ollama.metrics is NULL_METRICS
+        assert ollama.keep_alive == {"default": "10m"}
+
+    def test_replace_provider(self):
+        router = Router({"metrics": True, "ollama_models": {"keep_alive": {"default": "10m"}}})
+        replacement = OllamaProvider("http://127.0.0.1:9")
+        router.providers["ollama"] = replacement
+        assert router.providers["ollama"] is replacement
+        assert replacement.metrics is router.metrics
+        assert replacement.keep_alive == {"default": "10m"}
+        del router.providers["perplexity"]
+        assert "perplexity" not in router.providers
@@ -0,0 +1,113 @@
+"Tests for the warm state snapshot."
+
+import gc
+import json
+import time
+import weakref
+
+from llm_router import Router
+from llm_router.cache import ResponseCache
+from llm_router.health import CircuitBreaker, HealthChecker
+from llm_router.latency import LatencyTracker
+from llm_router.state import StateStore
+
+
+class TestSections:
+    def test_health_round_trip_and_expiry(self):
+        health = HealthChecker()
+        health.mark_unhealthy("nvidia", "HTTP 503")
+        health.check("openrouter", object())
+        saved = json.loads(json.dumps(health.export()))
+
+        restored = HealthChecker()
+        restored.restore(saved, max_age=60)
+        assert restored.breaker("nvidia").state == CircuitBreaker.OPEN
+        assert not restored.is_healthy("nvidia")
+        assert restored.status["openrouter"]["healthy"]
+
+        for key in ("opened_at", "failed_at"):
+            saved["breakers"]["nvidia"][key] -= 120
+        saved["checks"]["nvidia"][0] -= 120
+        stale = HealthChecker()
+        stale.restore(saved, max_age=60)
+        assert stale.is_healthy("nvidia")
+
+    def test_failure_streak_carries_over(self):
+        health = HealthChecker()
+        for _ in range(2):
+            health.record_failure("ollama", "Connection refused")
+        restored = HealthChecker()
+        restored.restore(health.export(), max_age=60)
+        restored.record_failure("ollama", "Connection refused")
+        assert restored.breaker("ollama").state == CircuitBreaker.OPEN
+
+    def test_latency_round_trip(self):
+        tracker = LatencyTracker()
+        for ms in (100, 200, 300):
+            tracker.record("ollama", ms, model="phi3:mini")
+        restored = LatencyTracker()
+        restored.restore(json.loads(json.dumps(tracker.export())), max_age=60)
+        assert restored.count("ollama", "phi3:mini") == 3
+        assert restored.percentile("ollama", 0.5) == tracker.percentile("ollama", 0.5)
+        assert restored.expected("ollama") == tracker.expected("ollama")
+
+    def test_cache_keeps_hottest_fresh_entries(self):
+        cache = ResponseCache(ttl=60)
+        for i in range(5):
+            cache.put(f"k{i}", {"content": str(i)})
+        cache.get("k0")
+        entries = cache.export(max_entries=2)
+        assert [key for key, _, _ in entries] == ["k4", "k0"]
+
+        restored = ResponseCache()
+        restored.restore(entries + [["old", time.time() - 1, {"content": "x"}]])
+        assert restored.get("k0")["content"] == "0"
+        assert restored.get("old") is None
+
+
+class TestStateStore:
+    def test_skips_unchanged_writes(self, tmp_path):
+        store = StateStore(tmp_path / "state.json")
+        assert store.save({"health": {}})
+        assert not store.save({"health": {}})
+        assert store.load()["health"] == {}
+        (tmp_path / "state.json").write_text("{not json")
+        assert store.load() is None
+
+
+class TestRouterState:
+    def test_restart_remembers_open_breaker(self, make_server, monkeypatch, tmp_path):
+        primary, fallback = make_server(), make_server()
+        primary.routes["/api/generate"] = (503, {"error": "down"})
+        fallback.routes["/api/generate"] = (200, {"response": "fallback"})
+        monkeypatch.setenv("OLLAMA_PRIMARY_URL", primary.url)
+        monkeypatch.setenv("OLLAMA_FALLBACK_URL", fallback.url)
+        config = {"state": {"path": str(tmp_path / "state.json"), "interval": None}}
+
+        router = Router(config)
+        for _ in range(3):
+            assert router.query("hi")["content"] == "fallback"
+        router.close()
+        calls = len(primary.requests)
+
+        restarted = Router(config)
+        assert restarted.health.breaker("ollama").state == CircuitBreaker.OPEN
+        assert restarted.latency.count("ollama_fallback") == 3
+        assert restarted.query("hi")["content"] == "fallback"
+        assert len(primary.requests) == calls
+        restarted.close()
+
+    def test_off_by_default(self):
+        for config in (None, {"state": False}):
+            router = Router(config)
+            assert router.state is None
+            router.close()
+
+    def test_dropped_router_is_collected(self, tmp_path):
+        router = Router({"state": {"path": str(tmp_path / "state.json"), "interval": 0.01}})
+        router._track_state()
+        store, ref = router.state, weakref.ref(router)
+        del router
+        gc.collect()
+        assert ref() is None
+        assert store._stop.is_set() and store._thread is None
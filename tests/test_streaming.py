@@ -0,0 +1,69 @@
+"Tests for streaming responses."
+
+import asyncio
+import json
+
+import pytest
+
+from llm_router import Router
+from llm_router.providers import OpenRouterProvider, ProviderError
+
+
+def _ndjson(*chunks):
+    lines = [{"response": c, "done": False} for c in chunks]
+    lines.append({"response": "", "done": True, "prompt_eval_count": 3, "eval_count": 5})
+    return 200, "\n".join(json.dumps(line) for line in lines) + "\n"
+
+
+def _sse(*chunks):
+    events = [{"choices": [{"delta": {"content": c}}]} for c in chunks]
+    events.append({"choices": [], "usage": {"total_tokens": 7}})
+    body = "".join(f"data: {json.dumps(e)}\n\n" for e in events) + "data: [DONE]\n\n"
+    return 200, body
+
+
+class TestStreaming:
+    def test_ollama_ndjson(self, http_server, monkeypatch):
+        http_server.routes["/api/generate"] = _ndjson("Hel", "lo")
+        monkeypatch.setenv("OLLAMA_PRIMARY_URL", http_server.url)
+        router = Router()
+        info = {}
+        assert list(router.stream("hi", task="fast", info=info)) == ["Hel", "lo"]
+        assert http_server.requests[0][2]["stream"] is True
+        assert info["model"] == "phi3:mini"
+        assert info["tokens"] == 8
+        assert router.get_usage()["ollama"]
+
+    def test_sse(self, http_server):
+        http_server.routes["/chat/completions"] = _sse("a", "b", "c")
+        provider = OpenRouterProvider(api_key="key")
+        provider.base_url = http_server.url
+        info = {}
+        assert "".join(provider.stream("hi", info=info)) == "abc"
+        assert info["tokens"] == 7
+
+    def test_failover_before_first_token(self, http_server, monkeypatch):
+        http_server.routes["/api/generate"] = _ndjson("ok")
+        monkeypatch.setenv("OLLAMA_PRIMARY_URL", "http://127.0.0.1:9")
+        monkeypatch.setenv("OLLAMA_FALLBACK_URL", http_server.url)
+        router = Router({"pool": {"max_retries": 0}})
+        assert list(router.stream("hi")) == ["ok"]
+
+    def test_all_failed(self, monkeypatch):
+        monkeypatch.setenv("OLLAMA_PRIMARY_URL", "http://127.0.0.1:9")
+        router = Router({"pool": {"max_retries": 0}})
+        with pytest.raises(ProviderError):
+            list(router.stream("hi"))
+
+    def test_astream(self, http_server, monkeypatch):
+        pytest.importorskip("httpx")
+        from llm_router import AsyncRouter
+
+        http_server.routes["/api/generate"] = _ndjson("a", "b")
+        monkeypatch.setenv("OLLAMA_PRIMARY_URL", http_server.url)
+
+        async def run():
+            async with AsyncRouter() as router:
+                return [c async for c in router.astream("hi")]
+
+        assert asyncio.run(run()) == ["a", "b"]
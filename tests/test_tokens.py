@@ -0,0 +1,74 @@
+"Tests for token estimation and prompt-size-aware routing."
+
+import time
+
+from llm_router import Router
+from llm_router.tokens import estimate_tokens, fits
+
+
+def _words(tokens):
+    # estimate_tokens counts ~4 ASCII characters per token
+    return "word " * (tokens * 4 // 5)
+
+
+class TestEstimate:
+    def test_estimates(self):
+        assert estimate_tokens("") == 1
+        assert 20 <= estimate_tokens("The quick brown fox jumps over the lazy dog. " * 2) <= 30
+        # CJK runs about one token per character
+        assert 90 <= estimate_tokens("漢" * 100) <= 110
+
+    def test_costs_microseconds(self):
+        text = "x = compute(a, b)  # note\n" * 4000  # ~100 KB
+        start = time.perf_counter()
+        for _ in range(100):
+            estimate_tokens(text)
+        assert (time.perf_counter() - start) / 100 < 0.0005
+
+    def test_fits(self):
+        assert fits("phi3:mini", 1000)
+        assert not fits("phi3:mini", 4000)
+        assert fits("unknown-model", 10 ** 6)
+
+
+class TestRouting:
+    def _chain(self, router, task, prompt):
+        return [(pid, model) for pid, model, _ in router._route(task, None, estimate_tokens(prompt))]
+
+    def test_short_prompt_unchanged(self, monkeypatch):
+        monkeypatch.setenv("OLLAMA_FALLBACK_URL", "http://127.0.0.1:9")
+        router = Router()
+        assert self._chain(router, "fast", "hi") == [
+            ("ollama", "phi3:mini"), ("ollama_fallback", None), ("openrouter", None)
+        ]
+
+    def test_moves_up_to_larger_local_model(self):
+        router = Router()
+        assert self._chain(router, "fast", _words(10000))[0] == ("ollama", "qwen2.5:3b")
+
+    def test_very_long_prompt_goes_remote(self, monkeypatch):
+        monkeypatch.setenv("OLLAMA_FALLBACK_URL", "http://127.0.0.1:9")
+        router = Router()
+        assert self._chain(router, "code", _words(60000)) == [("openrouter", None), ("nvidia", None)]
+
+    def test_context_window_override(self):
+        router = Router({"context_windows": {"phi3:mini": 131072}})
+        assert self._chain(router, "fast", _words(10000))[0] == ("ollama", "phi3:mini")
+
+
+class TestOutputBudget:
+    def test_max_tokens_fits_window(self, http_server, monkeypatch):
+        http_server.routes["/api/generate"] = (200, {"response": "ok"})
+        monkeypatch.setenv("OLLAMA_PRIMARY_URL", http_server.url)
+        router = Router()
+        prompt = _words(3000)
+        router.query(prompt, task="fast")
+        options = http_server.requests[-1][2]["options"]
+        assert options["num_predict"] == 4096 - estimate_tokens(prompt) - 256
+        assert options["num_ctx"] == 4096
+
+    def test_short_prompt_keeps_defaults(self, http_server, monkeypatch):
+        http_server.routes["/api/generate"] = (200, {"response": "ok"})
+        monkeypatch.setenv("OLLAMA_PRIMARY_URL", http_server.url)
+        Router().query("hi", task="fast")
+        assert http_server.requests[-1][2]["options"] == {"temperature": 0.7, "num_predict": 1500}
@@ -0,0 +1,145 @@
+"Tests for usage stores."
+
+import asyncio
+import gc
+import json
+import multiprocessing
+import threading
+import weakref
+
+import pytest
+
+from llm_router.usage import UsageTracker, JsonlUsageStore
+
+
+def _record_many(path, n):
+    tracker = UsageTracker(path)
+    for _ in range(n):
+        tracker.record("ollama", tokens=1)
+    tracker.close()
+
+
+@pytest.mark.parametrize("store", ["jsonl", "sqlite"])
+class TestUsageStores:
+    def test_persists_across_trackers(self, tmp_path, store):
+        path = str(tmp_path / "usage.json")
+        tracker = UsageTracker(path, store=store)
+        tracker.record("ollama", tokens=100)
+        tracker.record("openrouter", tokens=10, cost=0.5)
+        tracker.close()
+
+        reloaded = UsageTracker(path, store=store)
+        assert reloaded.get_today("ollama")["tokens"] == 100
+        assert reloaded.get_today("openrouter")["cost"] == 0.5
+
+    def test_reads_from_memory(self, tmp_path, store):
+        tracker = UsageTracker(str(tmp_path / "usage.json"), store=store)
+        tracker.record("ollama", tokens=5)
+        assert tracker.get_today("ollama")["calls"] == 1
+        tracker.close()
+
+
+class TestJsonlUsageStore:
+    def test_appends_compact_lines(self, tmp_path):
+        path = tmp_path / "usage.json"
+        tracker = UsageTracker(str(path))
+        tracker.record("ollama", tokens=3)
+        tracker.flush()
+        lines = (tmp_path / "usage.json.log").read_text().splitlines()
+        assert len(lines) == 1
+        assert " " not in lines[0]
+        tracker.close()
+
+    def test_compaction(self, tmp_path):
+        path = tmp_path / "usage.json"
+        tracker = UsageTracker(str(path), store=JsonlUsageStore(path, compact_every=5))
+        for _ in range(12):
+            tracker.record("ollama", tokens=2)
+        tracker.close()
+        assert len((tmp_path / "usage.json.log").read_text().splitlines()) < 5
+        assert UsageTracker(str(path)).get_today("ollama")["tokens"] == 24
+
+    def test_reads_legacy_file(self, tmp_path):
+        path = tmp_path / "usage.json"
+        path.write_text(json.dumps({"nvidia": {"2024-01-01": {"calls": 2, "tokens": 9, "cost": 0}}}, indent=2))
+        assert UsageTracker(str(path)).get_stats("nvidia")["2024-01-01"]["calls"] == 2
+
+    def test_multiple_processes(self, tmp_path):
+        path = str(tmp_path / "usage.json")
+        procs = [multiprocessing.Process(target=_record_many, args=(path, 200)) for _ in range(3)]
+        for p in procs:
+            p.start()
+        for p in procs:
+            p.join()
+        assert UsageTracker(path).get_today("ollama")["calls"] == 600
+
+
+class TestLazyLoad:
+    def test_history_loaded_on_first_read(self, tmp_path):
+        path = str(tmp_path / "usage.json")
+        _record_many(path, 3)
+
+        tracker = UsageTracker(path)
+        assert tracker._stats is None
+        tracker.record("ollama", tokens=1)
+        assert tracker._stats is None
+        # Queued records are flushed before the history is read, so nothing is counted twice
+        assert tracker.get_today("ollama")["calls"] == 4
+        tracker.record("ollama", tokens=1)
+        assert tracker.get_today("ollama")["calls"] == 5
+        tracker.close()
+
+
+class _StalledStore(JsonlUsageStore):
+    def __init__(self, path):
+        super().__init__(path)
+        self.release = threading.Event()
+
+    def append(self, records):
+        if threading.current_thread().name == "llm-router-usage":
+            self.release.wait(5)
+        super().append(records)
+
+
+class TestFlusher:
+    def test_stalled_flusher_does_not_block_readers(self, tmp_path):
+        store = _StalledStore(tmp_path / "usage.json")
+        tracker = UsageTracker(str(tmp_path / "usage.json"), store=store, queue_size=1)
+        tracker._stats = {}
+        done = threading.Event()
+
+        def record():
+            for _ in range(5):
+                tracker.record("ollama", tokens=1)
+            done.set()
+
+        threading.Thread(target=record, daemon=True).start()
+        assert done.wait(2)
+        assert tracker.get_today("ollama")["calls"] == 5
+        store.release.set()
+        tracker.close()
+        assert UsageTracker(str(tmp_path / "usage.json")).get_today("ollama")["calls"] == 5
+
+    def test_dropped_tracker_is_collected(self, tmp_path):
+        tracker = UsageTracker(str(tmp_path / "usage.json"))
+        tracker.record("ollama", tokens=1)
+        ref = weakref.ref(tracker)
+        del tracker
+        gc.collect()
+        assert ref() is None
+        assert UsageTracker(str(tmp_path / "usage.json")).get_today("ollama")["calls"] == 1
+
+    def test_direct_writes_leave_the_event_loop(self, tmp_path):
+        store = JsonlUsageStore(tmp_path / "usage.json")
+        writers = []
+        append = store.append
+        store.append = lambda records: writers.append(threading.current_thread()) or append(records)
+        tracker = UsageTracker(str(tmp_path / "usage.json"), store=store)
+        tracker.close()
+
+        async def record():
+            tracker.record("ollama", tokens=1)
+
+        asyncio.run(record())
+        assert writers and writers[0] is not threading.main_thread()
+        assert UsageTracker(str(tmp_path / "usage.json")).get_today("ollama")["calls"] == 1